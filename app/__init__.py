@@ -5,14 +5,16 @@ from pathlib import Path
 from flask import Flask
 from flask_session import Session
 from dotenv import load_dotenv
-import sentry_sdk
-from sentry_sdk.integrations.flask import FlaskIntegration
 from app.extensions import csrf
 from flask_mail import Mail
 from app.extensions import limiter, compress
 from app.context_processors import register_context_processors
 from app.services.cache import init_cache
 from app.services.middleware import init_middleware
+from app.services.webhooks import start_webhook_dispatcher
+from app.openapi import init_api_docs
+from app.assets import init_assets
+from app.templating import init_template_cache
 from config import Config
 from flask import request, abort
 
@@ -32,6 +34,9 @@ def create_app():
     load_dotenv()
 
     if os.getenv('SENTRY_DSN'):
+        # Imported only when configured — sentry_sdk pulls in every integration
+        import sentry_sdk
+        from sentry_sdk.integrations.flask import FlaskIntegration
         sentry_sdk.init(
             dsn=os.getenv('SENTRY_DSN'),
             integrations=[FlaskIntegration()],
@@ -40,6 +45,7 @@ def create_app():
 
     app = Flask(__name__)
     app.config.from_object(Config)
+    init_template_cache(app)
     app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
     app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', 587))
     app.config['MAIL_USE_TLS'] = os.getenv('MAIL_USE_TLS', 'True').lower() == 'true'
@@ -53,6 +59,7 @@ def create_app():
     app_root = Path(__file__).parent
     app.template_folder = str(app_root / "templates")
     app.static_folder = str(app_root / "static")
+    init_assets(app)
 
     init_cache(app)
     app.before_request(block_automation)
@@ -66,6 +73,7 @@ def create_app():
     compress.init_app(app)
     register_context_processors(app)
     init_middleware(app)
+    app.before_request(start_webhook_dispatcher)
 
     # --- Blueprints ---
     from app.routes.auth import auth_bp
@@ -111,77 +119,5 @@ def create_app():
                 .replace('\n', '\\n')
                 .replace('\r', '\\r'))
 
-    from flasgger import Swagger
-    swagger_config = {
-        "headers": [],
-        "specs": [
-            {
-                "endpoint": 'apispec_1',
-                "route": '/apispec_1.json',
-                "rule_filter": lambda rule: True,
-                "model_filter": lambda tag: True,
-            }
-        ],
-        "static_url_path": "/flasgger_static",
-        "swagger_ui": True,
-        "specs_route": "/apidocs/",
-        "title": "Groweasy API",
-        "description": "API for Groweasy ERP system",
-        "version": "1.0.0",
-        "termsOfService": "",
-        "contact": {},
-        "license": {},
-        "securityDefinitions": {
-            "Bearer": {
-                "type": "apiKey",
-                "name": "Authorization",
-                "in": "header",
-                "description": "Enter your API key in the format: Bearer <key>"
-            }
-        },
-        "definitions": {
-            "InventoryItem": {
-                "type": "object",
-                "properties": {
-                    "id": {"type": "integer"},
-                    "name": {"type": "string"},
-                    "sku": {"type": "string"},
-                    "current_stock": {"type": "number"},
-                    "cost_price": {"type": "number"},
-                    "selling_price": {"type": "number"},
-                    "category": {"type": "string"},
-                    "supplier": {"type": "string"},
-                    "location": {"type": "string"}
-                }
-            },
-            "Customer": {
-                "type": "object",
-                "properties": {
-                    "id": {"type": "integer"},
-                    "name": {"type": "string"},
-                    "email": {"type": "string"},
-                    "phone": {"type": "string"},
-                    "address": {"type": "string"},
-                    "tax_id": {"type": "string"},
-                    "total_spent": {"type": "number"},
-                    "invoice_count": {"type": "integer"}
-                }
-            },
-            "Invoice": {
-                "type": "object",
-                "properties": {
-                    "id": {"type": "integer"},
-                    "invoice_number": {"type": "string"},
-                    "client_name": {"type": "string"},
-                    "invoice_date": {"type": "string", "format": "date"},
-                    "due_date": {"type": "string", "format": "date"},
-                    "grand_total": {"type": "number"},
-                    "status": {"type": "string"},
-                    "created_at": {"type": "string", "format": "date-time"}
-                }
-            }
-        }
-    }
-
-    swagger = Swagger(app, config=swagger_config)
+    init_api_docs(app)
     return app
@@ -0,0 +1,102 @@
+# app/assets.py
+"""
+Fingerprinted, precompressed static assets.
+
+build_assets.py (run at image build) writes everything under static/css,
+static/js, static/img and static/assets to static/dist/ with a content hash
+in the name (css/app.css -> dist/css/app.3f2a1b4c.css).  It minifies our
+own CSS/JS, concatenates BUNDLES, and writes .gz/.br siblings for text
+files.  dist/manifest.json maps logical names to hashed paths.
+
+At runtime:
+  - url_for('static', filename='js/chart.umd.js') returns the hashed path
+    automatically (url_defaults hook), so existing templates are
+    cache-busted without edits;
+  - asset_urls('css/app.css') returns the bundle's URL, or — without a
+    manifest (local dev) — the URLs of its member files, so templates work
+    before a build;
+  - requests for dist/ files are answered with the .br/.gz sibling the
+    client accepts, with Content-Encoding set, so Flask-Compress skips them
+    and no CPU is spent compressing;
+  - only dist/ (hashed) URLs are marked immutable; see add_cache_headers.
+"""
+import json
+import logging
+import mimetypes
+from pathlib import Path
+from flask import request, url_for, send_from_directory, current_app
+
+logger = logging.getLogger(__name__)
+
+ASSET_DIST_DIR = 'dist'
+ASSET_MANIFEST = 'dist/manifest.json'
+
+# Logical bundle name -> member files (concatenated in this order)
+BUNDLES = {
+    'css/app.css': ['css/bootstrap.min.css', 'css/invoice.min.css'],
+}
+
+# Content-Encoding -> file suffix, in order of preference
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+def load_manifest(static_folder):
+    path = Path(static_folder) / ASSET_MANIFEST
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except Exception as e:
+        logger.warning(f"Asset manifest unreadable, serving unhashed assets: {e}")
+        return {}
+
+
+def asset_urls(name):
+    """URLs for a logical asset or bundle (one hashed URL once built)."""
+    manifest = current_app.extensions.get('asset_manifest', {})
+    if name in manifest:
+        return [url_for('static', filename=name)]
+    members = BUNDLES.get(name)
+    if members:
+        return [url_for('static', filename=m) for m in members]
+    return [url_for('static', filename=name)]
+
+
+def init_assets(app):
+    manifest = load_manifest(app.static_folder)
+    app.extensions['asset_manifest'] = manifest
+    static_root = Path(app.static_folder)
+    precompressed = {
+        str(p.relative_to(static_root)).replace('\\', '/')
+        for p in (static_root / ASSET_DIST_DIR).rglob('*')
+        if p.suffix in ('.br', '.gz')
+    } if manifest else set()
+
+    if manifest:
+        logger.info(f"Assets: {len(manifest)} fingerprinted, {len(precompressed)} precompressed")
+
+    @app.url_defaults
+    def fingerprint_static(endpoint, values):
+        if endpoint == 'static' and manifest:
+            hashed = manifest.get(values.get('filename'))
+            if hashed:
+                values['filename'] = hashed
+
+    app.add_template_global(asset_urls)
+
+    serve_plain = app.view_functions['static']
+
+    def serve_static(filename):
+        if precompressed and filename.startswith(ASSET_DIST_DIR + '/'):
+            for encoding, suffix in PRECOMPRESSED:
+                candidate = filename + suffix
+                if candidate in precompressed and request.accept_encodings[encoding]:
+                    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                    response = send_from_directory(app.static_folder, candidate,
+                                                   mimetype=mimetype, max_age=31536000)
+                    response.headers['Content-Encoding'] = encoding
+                    response.headers['Vary'] = 'Accept-Encoding'
+                    return response
+        return serve_plain(filename=filename)
+
+    app.view_functions['static'] = serve_static
@@ -20,9 +20,38 @@ _redis_pool = redis.ConnectionPool.from_url(
     decode_responses=True,
     max_connections=20
 )
+# Raw bytes (pickled values); never decoded as UTF-8
+_redis_binary_pool = redis.ConnectionPool.from_url(
+    Config.REDIS_URL,
+    decode_responses=False,
+    max_connections=20
+)
 
 def get_redis():
     return redis.Redis(connection_pool=_redis_pool)
 
 
+def get_redis_binary():
+    return redis.Redis(connection_pool=_redis_binary_pool)
+
+
+def reset_redis_pool():
+    """
+    Give this process a fresh pool.  Called in each gunicorn worker after
+    fork so no socket opened by the master is ever shared; the inherited
+    pool is dropped without closing (closing would shut the parent's side).
+    """
+    global _redis_pool, _redis_binary_pool
+    _redis_pool = redis.ConnectionPool.from_url(
+        Config.REDIS_URL,
+        decode_responses=True,
+        max_connections=20
+    )
+    _redis_binary_pool = redis.ConnectionPool.from_url(
+        Config.REDIS_URL,
+        decode_responses=False,
+        max_connections=20
+    )
+
+
 
@@ -0,0 +1,113 @@
+# app/lifecycle.py
+"""
+Server lifecycle hooks for gunicorn --preload (wired up in gunicorn.conf.py).
+
+With --preload the master imports main:app once and forks every worker from
+it.  That import creates DB_ENGINE, the Redis pools and runs the schema
+bootstrap in app/services/db.py, so before this module existed each worker
+inherited the master's pooled sockets — two processes talking over one
+Postgres/Redis connection corrupts the protocol stream for both.
+
+  before fork (master, once, when_ready):
+      prepare_for_fork(app)
+        - warm what every worker would otherwise load on first use:
+          compiled Jinja templates (app/templating.py), fontconfig/Pango
+          (one tiny PDF), the PDF header logo and the resized QR logo
+        - run the schema bootstrap once, then dispose DB_ENGINE so the
+          master holds no connections at all
+        - gc.collect() then gc.freeze(): everything allocated so far moves
+          to the permanent generation, so the collector never touches
+          (and copy-on-write duplicates) those pages in the workers
+
+  without --preload (each worker, post_worker_init):
+      warm_worker(app) — templates only, from the shared bytecode cache
+
+  after fork (each worker, post_fork):
+      reset_after_fork(app)
+        - DB_ENGINE.dispose(close=False) — forget inherited connections
+          without closing the parent's sockets
+        - fresh Redis pools for get_redis(), get_redis_binary(), Flask-Session and
+          Flask-Caching
+
+Background threads (webhooks, audit log, usage reconciler) already start
+lazily behind a pid check, so nothing else needs restarting.
+"""
+import gc
+import os
+import time
+import logging
+
+from app.templating import warm_templates
+
+logger = logging.getLogger(__name__)
+
+PRELOAD_WARM_UP = os.getenv('PRELOAD_WARM_UP', 'true').lower() == 'true'
+
+
+# ─── Before fork ──────────────────────────────────────────────
+
+def warm_pdf():
+    from app.services import pdf_engine, pdf_generator
+    pdf_engine.warm_up()
+    pdf_generator.warm_up()
+
+
+def prepare_for_fork(app):
+    started = time.monotonic()
+    if PRELOAD_WARM_UP:
+        try:
+            templates, seconds = warm_templates(app)
+            logger.info(f"Warm-up: {templates} templates compiled in {seconds:.2f}s")
+        except Exception as e:
+            logger.warning(f"Template warm-up failed: {e}")
+        try:
+            warm_pdf()
+        except Exception as e:
+            logger.warning(f"PDF warm-up failed: {e}")
+
+    from app.services.db import DB_ENGINE, ensure_schema
+    ensure_schema()         # once here, so workers inherit it as done
+    DB_ENGINE.dispose()
+
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preload ready in {time.monotonic() - started:.2f}s "
+                f"({gc.get_freeze_count()} objects frozen)")
+
+
+def warm_worker(app):
+    """Template warm-up for workers that load the app themselves (no preload)."""
+    if not PRELOAD_WARM_UP:
+        return
+    try:
+        templates, seconds = warm_templates(app)
+        logger.info(f"Worker {os.getpid()}: {templates} templates ready in {seconds:.2f}s")
+    except Exception as e:
+        logger.warning(f"Template warm-up failed: {e}")
+
+
+# ─── After fork ───────────────────────────────────────────────
+
+def _reset_client_pool(client):
+    pool = getattr(client, 'connection_pool', None)
+    if pool is not None:
+        pool.reset()
+
+
+def reset_after_fork(app=None):
+    from app.services.db import DB_ENGINE
+    DB_ENGINE.dispose(close=False)
+
+    try:
+        from app.extensions import reset_redis_pool
+        reset_redis_pool()
+    except Exception as e:
+        logger.warning(f"Redis pool reset failed: {e}")
+
+    if app is not None:
+        _reset_client_pool(app.config.get('SESSION_REDIS'))
+        for backend in app.extensions.get('cache', {}).values():
+            for attr in ('_write_client', '_read_client'):
+                _reset_client_pool(getattr(backend, attr, None))
+
+    logger.info(f"Worker {os.getpid()}: connection pools reset after fork")
@@ -0,0 +1,174 @@
+# app/openapi.py
+"""
+API docs (/apidocs/ and /apispec_1.json).
+
+flasgger imports jsonschema, yaml and mistune and walks every URL rule's
+docstring to build the spec — work every worker boot and `flask` command
+paid for documentation almost nobody opens.  The spec is now generated at
+build time:
+
+    python build_openapi.py        # writes app/static/openapi.json
+
+When that file exists the app serves it as-is, plus a plain Swagger UI page
+using flasgger's bundled assets (located without importing flasgger).
+Without it — or with OPENAPI_LIVE=true while editing route docstrings —
+flasgger is initialised exactly as before.
+"""
+import os
+import json
+import importlib.util
+from pathlib import Path
+from flask import send_file, send_from_directory, abort
+
+OPENAPI_SPEC_FILE = 'openapi.json'
+OPENAPI_LIVE = os.getenv('OPENAPI_LIVE', 'false').lower() == 'true'
+
+_SWAGGER_UI_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  <title>Groweasy API</title>
+  <link rel="stylesheet" href="/flasgger_static/swagger-ui.css">
+</head>
+<body>
+  <div id="swagger-ui"></div>
+  <script src="/flasgger_static/swagger-ui-bundle.js"></script>
+  <script src="/flasgger_static/swagger-ui-standalone-preset.js"></script>
+  <script>
+    window.ui = SwaggerUIBundle({
+      url: "/apispec_1.json",
+      dom_id: "#swagger-ui",
+      deepLinking: true,
+      presets: [SwaggerUIBundle.presets.apis, SwaggerUIStandalonePreset],
+      layout: "StandaloneLayout"
+    });
+  </script>
+</body>
+</html>
+"""
+
+
+def spec_path(app):
+    return Path(app.static_folder) / OPENAPI_SPEC_FILE
+
+
+def init_api_docs(app):
+    path = spec_path(app)
+    if path.exists() and not OPENAPI_LIVE:
+        init_static_api_docs(app, path)
+    else:
+        init_live_swagger(app)
+
+
+def _flasgger_ui_dir():
+    spec = importlib.util.find_spec('flasgger')
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    return Path(list(spec.submodule_search_locations)[0]) / 'ui3' / 'static'
+
+
+def init_static_api_docs(app, path):
+    ui_dir = _flasgger_ui_dir()
+
+    @app.route('/apispec_1.json')
+    def apispec_1():
+        return send_file(path, mimetype='application/json', max_age=300)
+
+    @app.route('/apidocs/')
+    def apidocs():
+        return _SWAGGER_UI_PAGE
+
+    @app.route('/flasgger_static/<path:filename>')
+    def flasgger_static(filename):
+        if ui_dir is None:
+            abort(404)
+        return send_from_directory(ui_dir, filename, max_age=86400)
+
+
+def build_spec(app):
+    """Generate the spec with flasgger (app must have been set up live)."""
+    with app.test_request_context():
+        return app.swag.get_apispecs('apispec_1')
+
+
+def write_spec(app, path=None):
+    path = Path(path) if path else spec_path(app)
+    spec = build_spec(app)
+    path.write_text(json.dumps(spec, indent=2, sort_keys=True, default=str))
+    return path, spec
+
+
+def init_live_swagger(app):
+    from flasgger import Swagger
+    swagger_config = {
+        "headers": [],
+        "specs": [
+            {
+                "endpoint": 'apispec_1',
+                "route": '/apispec_1.json',
+                "rule_filter": lambda rule: True,
+                "model_filter": lambda tag: True,
+            }
+        ],
+        "static_url_path": "/flasgger_static",
+        "swagger_ui": True,
+        "specs_route": "/apidocs/",
+        "title": "Groweasy API",
+        "description": "API for Groweasy ERP system",
+        "version": "1.0.0",
+        "termsOfService": "",
+        "contact": {},
+        "license": {},
+        "securityDefinitions": {
+            "Bearer": {
+                "type": "apiKey",
+                "name": "Authorization",
+                "in": "header",
+                "description": "Enter your API key in the format: Bearer <key>"
+            }
+        },
+        "definitions": {
+            "InventoryItem": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "name": {"type": "string"},
+                    "sku": {"type": "string"},
+                    "current_stock": {"type": "number"},
+                    "cost_price": {"type": "number"},
+                    "selling_price": {"type": "number"},
+                    "category": {"type": "string"},
+                    "supplier": {"type": "string"},
+                    "location": {"type": "string"}
+                }
+            },
+            "Customer": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "name": {"type": "string"},
+                    "email": {"type": "string"},
+                    "phone": {"type": "string"},
+                    "address": {"type": "string"},
+                    "tax_id": {"type": "string"},
+                    "total_spent": {"type": "number"},
+                    "invoice_count": {"type": "integer"}
+                }
+            },
+            "Invoice": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "invoice_number": {"type": "string"},
+                    "client_name": {"type": "string"},
+                    "invoice_date": {"type": "string", "format": "date"},
+                    "due_date": {"type": "string", "format": "date"},
+                    "grand_total": {"type": "number"},
+                    "status": {"type": "string"},
+                    "created_at": {"type": "string", "format": "date-time"}
+                }
+            }
+        }
+    }
+
+    return Swagger(app, config=swagger_config)
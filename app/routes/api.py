@@ -7,6 +7,7 @@ import os
 import datetime as dt_module
 from datetime import datetime, date, timedelta
 from app.services.db import DB_ENGINE
+from app.services.data_versions import mark_changed
 from app import limiter
 from app.extensions import csrf
 
@@ -23,6 +24,7 @@ def complete_purchase_order(po_number):
                 UPDATE purchase_orders SET status = 'completed'
                 WHERE account_id = :aid AND po_number = :po_number
             """), {"aid": account_id, "po_number": po_number})
+            mark_changed(conn, account_id, 'purchases')
         return jsonify({'success': True, 'message': f'PO {po_number} marked as completed'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -55,6 +57,7 @@ def cancel_purchase_order(po_number):
                     "po_number": po_number,
                     "order_data": json.dumps(order_data)
                 })
+                mark_changed(conn, account_id, 'purchases')
         return jsonify({'success': True, 'message': f'PO {po_number} cancelled'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
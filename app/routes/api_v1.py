@@ -11,6 +11,10 @@ from sqlalchemy import text
 
 from app.services.db import DB_ENGINE
 from app.services.api_keys import validate_api_key
+from app.services.audit_log import api_log_writer
+from app.services.cache import get_account_locations_cached, invalidate_locations_cache
+from app.services.data_versions import mark_changed
+from app.services.tenant import current_tenant
 from app.services.inventory import InventoryManager
 from app.decorators import role_required
 from app.extensions import limiter, csrf
@@ -44,15 +48,8 @@ def get_api_rate_limit_key():
 # ---------------------------------------------------------------------------
 
 def log_api_call(account_id, endpoint, method, status_code, ip):
-    try:
-        with DB_ENGINE.begin() as conn:
-            conn.execute(text("""
-                INSERT INTO api_logs (account_id, endpoint, method, status_code, ip_address)
-                VALUES (:aid, :endpoint, :method, :status, :ip)
-            """), {"aid": account_id, "endpoint": endpoint,
-                   "method": method, "status": status_code, "ip": ip})
-    except Exception as e:
-        logger.warning(f"API log insert failed: {e}")
+    """Queue an api_logs row; the audit writer inserts it in a background batch."""
+    api_log_writer.submit((account_id, endpoint, method, status_code, ip))
 
 
 # ---------------------------------------------------------------------------
@@ -212,13 +209,9 @@ def create_inventory_item():
     if not data.get('name') or not data.get('sku'):
         return error_response("name and sku are required", "MISSING_FIELD", 400)
 
-    with DB_ENGINE.connect() as conn:
-        row = conn.execute(text("""
-            SELECT id FROM users WHERE account_id = :aid AND role = 'owner' LIMIT 1
-        """), {"aid": account_id}).first()
-        if not row:
-            return error_response("No owner found for account", "INTERNAL_ERROR", 400)
-        user_id = row[0]
+    user_id = current_tenant().owner_user_id
+    if not user_id:
+        return error_response("No owner found for account", "INTERNAL_ERROR", 400)
 
     product_data = {
         'name': data['name'], 'sku': data['sku'],
@@ -268,12 +261,9 @@ def update_stock_by_sku(sku):
             return error_response("Product not found", "NOT_FOUND", 404)
         product_id, product_name, current_stock = row
 
-        owner = conn.execute(text("""
-            SELECT id FROM users WHERE account_id = :aid AND role = 'owner' LIMIT 1
-        """), {"aid": account_id}).first()
-        if not owner:
-            return error_response("No owner found", "INTERNAL_ERROR", 400)
-        user_id = owner[0]
+    user_id = current_tenant().owner_user_id
+    if not user_id:
+        return error_response("No owner found", "INTERNAL_ERROR", 400)
 
     success = InventoryManager.update_stock_delta(
         user_id, account_id, product_id, delta,
@@ -296,13 +286,9 @@ def update_stock_via_patch(product_id):
     reason = data.get('reason', 'API adjustment')
     if delta is None:
         return error_response("delta required", "MISSING_FIELD", 400)
-    with DB_ENGINE.connect() as conn:
-        row = conn.execute(text(
-            "SELECT id FROM users WHERE account_id = :aid AND role = 'owner' LIMIT 1"
-        ), {"aid": account_id}).first()
-        if not row:
-            return error_response("No owner found", "INTERNAL_ERROR", 400)
-        user_id = row[0]
+    user_id = current_tenant().owner_user_id
+    if not user_id:
+        return error_response("No owner found", "INTERNAL_ERROR", 400)
     success = InventoryManager.update_stock_delta(
         user_id, account_id, product_id, delta, 'api_adjustment', notes=reason
     )
@@ -343,13 +329,9 @@ def create_customer():
     data = request.get_json()
     if not data or not data.get('name'):
         return error_response("name is required", "MISSING_FIELD", 400)
-    with DB_ENGINE.connect() as conn:
-        row = conn.execute(text(
-            "SELECT id FROM users WHERE account_id = :aid AND role = 'owner' LIMIT 1"
-        ), {"aid": account_id}).first()
-        if not row:
-            return error_response("No owner found", "INTERNAL_ERROR", 400)
-        user_id = row[0]
+    user_id = current_tenant().owner_user_id
+    if not user_id:
+        return error_response("No owner found", "INTERNAL_ERROR", 400)
     from app.services.auth import save_customer
     customer_id = save_customer(user_id, account_id, data)
     if customer_id:
@@ -444,13 +426,9 @@ def create_invoice():
     if not data.get('items') or not isinstance(data['items'], list) or len(data['items']) == 0:
         return error_response("items list is required with at least one item", "MISSING_FIELD", 400)
 
-    with DB_ENGINE.connect() as conn:
-        row = conn.execute(text(
-            "SELECT id FROM users WHERE account_id = :aid AND role = 'owner' LIMIT 1"
-        ), {"aid": account_id}).first()
-        if not row:
-            return error_response("No owner found", "INTERNAL_ERROR", 400)
-        user_id = row[0]
+    user_id = current_tenant().owner_user_id
+    if not user_id:
+        return error_response("No owner found", "INTERNAL_ERROR", 400)
 
     from werkzeug.datastructures import MultiDict
     from datetime import datetime as dt
@@ -505,13 +483,9 @@ def create_expense():
     data = request.get_json()
     if not data or not data.get('description') or data.get('amount') is None:
         return error_response("description and amount are required", "MISSING_FIELD", 400)
-    with DB_ENGINE.connect() as conn:
-        row = conn.execute(text(
-            "SELECT id FROM users WHERE account_id = :aid AND role = 'owner' LIMIT 1"
-        ), {"aid": account_id}).first()
-        if not row:
-            return error_response("No owner found", "INTERNAL_ERROR", 400)
-        user_id = row[0]
+    user_id = current_tenant().owner_user_id
+    if not user_id:
+        return error_response("No owner found", "INTERNAL_ERROR", 400)
     from app.services.auth import create_expense_api
     expense_id = create_expense_api(account_id, user_id, data)
     if expense_id:
@@ -567,8 +541,7 @@ def list_stock_movements():
 @limiter.limit("60 per minute", key_func=get_api_rate_limit_key)
 @require_auth
 def list_locations():
-    from app.services.location_inventory import LocationInventoryManager
-    return jsonify(LocationInventoryManager.get_account_locations(g.api_account_id))
+    return jsonify(get_account_locations_cached(g.api_account_id))
 
 
 @api_v1_bp.route('/locations', methods=['POST'])
@@ -609,6 +582,8 @@ def update_location(location_id):
             "type": data.get('location_type'), "address": data.get('address'),
             "lid": location_id
         })
+        mark_changed(conn, account_id, 'locations')
+    invalidate_locations_cache(account_id)
     return jsonify({"message": "Location updated"})
 
 
@@ -626,6 +601,8 @@ def delete_location(location_id):
             return error_response("Location not found", "NOT_FOUND", 404)
         conn.execute(text("DELETE FROM product_locations WHERE location_id=:lid"), {"lid": location_id})
         conn.execute(text("DELETE FROM locations WHERE id=:lid"), {"lid": location_id})
+        mark_changed(conn, account_id, 'inventory', 'locations')
+    invalidate_locations_cache(account_id)
     return jsonify({"message": "Location deleted"})
 
 
@@ -726,13 +703,9 @@ def transfer_stock():
     for field in ['product_id', 'from_location_id', 'to_location_id', 'quantity']:
         if field not in data:
             return error_response(f"{field} is required", "MISSING_FIELD", 400)
-    with DB_ENGINE.connect() as conn:
-        row = conn.execute(text(
-            "SELECT id FROM users WHERE account_id=:aid AND role='owner' LIMIT 1"
-        ), {"aid": account_id}).first()
-        if not row:
-            return error_response("No owner found", "INTERNAL_ERROR", 400)
-        user_id = row[0]
+    user_id = current_tenant().owner_user_id
+    if not user_id:
+        return error_response("No owner found", "INTERNAL_ERROR", 400)
     from app.services.location_inventory import LocationInventoryManager
     transfer_number = LocationInventoryManager.transfer_between_locations(
         account_id=account_id,
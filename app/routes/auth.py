@@ -5,7 +5,7 @@ from app.services.db import DB_ENGINE
 from sqlalchemy import text
 from app.services.auth import verify_user, get_user_profile, create_user, change_user_password
 from app.services.utils import random_success_message
-from app.services.cache import get_user_profile_cached
+from app.services.cache import get_user_profile_cached, invalidate_user_identity_cache
 from app.services.account import create_account, check_user_limit
 from app.decorators import role_required
 import threading
@@ -191,11 +191,12 @@ def register():
                     text("UPDATE user_invites SET accepted_at = NOW() WHERE id = :id"),
                     {"id": invite.id}
                 )
-                flash('✅ You have been added to the team! Please login.', 'success')
-                return redirect(url_for('auth.login'))
-            else:
-                flash('❌ This invite link is invalid or expired. Please ask the owner to send a new one.', 'error')
-                return redirect(url_for('auth.register'))
+        if invite:
+            invalidate_user_identity_cache(user_id, invite.account_id)
+            flash('✅ You have been added to the team! Please login.', 'success')
+            return redirect(url_for('auth.login'))
+        flash('❌ This invite link is invalid or expired. Please ask the owner to send a new one.', 'error')
+        return redirect(url_for('auth.register'))
     else:
         account_id = create_account(company_name, plan)
         with DB_ENGINE.begin() as conn:
@@ -203,6 +204,7 @@ def register():
                 text("UPDATE users SET account_id = :aid, role = 'owner' WHERE id = :uid"),
                 {"aid": account_id, "uid": user_id}
             )
+        invalidate_user_identity_cache(user_id, account_id)
         flash('✅ Account created! Please login.', 'success')
         send_welcome_email_async(email, plan)
         return redirect(url_for('auth.login'))
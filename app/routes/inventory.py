@@ -11,7 +11,8 @@ from app.services.db import DB_ENGINE
 from app.extensions import limiter
 from app.decorators import role_required
 from app.context_processors import CURRENCY_SYMBOLS
-from app.services.cache import get_user_profile_cached
+from app.services.cache import get_user_profile_cached, invalidate_locations_cache
+from app.services.data_versions import mark_changed
 
 inventory_bp = Blueprint('inventory', __name__)
 
@@ -32,10 +33,13 @@ def _safe_float(val, default):
     except (ValueError, TypeError):
         return default
 
-def _get_or_create_main_location(conn, account_id):
+def _get_or_create_main_location(account_id):
     """
     Return the ID of the 'Main' location for this account, creating it if it
-    doesn't exist yet.
+    doesn't exist yet.  Runs in its own transaction so the cached location
+    list is invalidated only after the new row has committed — invalidating
+    inside the transaction let a concurrent request re-cache the old list
+    for the full TTL.
 
     Uses a single atomic PostgreSQL upsert so there is no race condition and no
     UniqueViolation regardless of is_active state or concurrent requests.
@@ -43,14 +47,21 @@ def _get_or_create_main_location(conn, account_id):
     The ON CONFLICT targets the unique constraint on (account_id, location_code).
     The DO UPDATE is a no-op touch (sets location_name to itself) so that
     RETURNING id is always populated — both on INSERT and on conflict.
+    xmax = 0 only for a freshly inserted row.
     """
-    row = conn.execute(text("""
-        INSERT INTO locations (account_id, location_name, location_code, location_type, is_active)
-        VALUES (:aid, 'Main', 'MAIN', 'warehouse', TRUE)
-        ON CONFLICT (account_id, location_code)
-        DO UPDATE SET location_name = EXCLUDED.location_name
-        RETURNING id
-    """), {"aid": account_id}).fetchone()
+    with DB_ENGINE.begin() as conn:
+        row = conn.execute(text("""
+            INSERT INTO locations (account_id, location_name, location_code, location_type, is_active)
+            VALUES (:aid, 'Main', 'MAIN', 'warehouse', TRUE)
+            ON CONFLICT (account_id, location_code)
+            DO UPDATE SET location_name = EXCLUDED.location_name
+            RETURNING id, (xmax = 0) AS inserted
+        """), {"aid": account_id}).fetchone()
+        if row and row[1]:
+            mark_changed(conn, account_id, 'locations')
+    if row and row[1]:
+        # A brand-new location — the cached location list is stale
+        invalidate_locations_cache(account_id)
     return row[0] if row else None
 
 
@@ -191,8 +202,7 @@ def add_product():
     product_id = InventoryManager.add_product(user_id, account_id, product_data)
     if product_id:
         try:
-            with DB_ENGINE.begin() as conn:
-                location_id = _get_or_create_main_location(conn, account_id)
+            location_id = _get_or_create_main_location(account_id)
 
             if location_id:
                 LocationInventoryManager.add_product_to_location(
@@ -264,6 +274,7 @@ def update_product():
                     updated_at = NOW()
                 WHERE id = :pid AND account_id = :aid
             """), {**update_data, 'pid': product_id, 'aid': account_id})
+            mark_changed(conn, account_id, 'inventory')
         flash("Product updated successfully", "success")
     except Exception as e:
         flash(f"Update failed: {str(e)}", "error")
@@ -350,8 +361,7 @@ def adjust_stock_audit():
             return redirect(url_for('inventory.inventory'))
 
         # Always adjust at Main location — get or create it
-        with DB_ENGINE.begin() as conn:
-            location_id = _get_or_create_main_location(conn, account_id)
+        location_id = _get_or_create_main_location(account_id)
 
         success = InventoryManager.update_stock_delta(
             user_id=user_id,
@@ -377,6 +387,7 @@ def adjust_stock_audit():
                     conn.execute(text(
                         f"UPDATE inventory_items SET {set_clause} WHERE id = :product_id AND account_id = :aid"
                     ), params)
+                    mark_changed(conn, account_id, 'inventory')
 
         if success:
             flash(f'✅ {product_name} adjusted! Stock: {current_stock} → {current_stock + delta}', 'success')
@@ -535,8 +546,7 @@ def bulk_upload():
             product_id = InventoryManager.add_product(user_id, account_id, product_data)
             if product_id:
                 try:
-                    with DB_ENGINE.begin() as conn:
-                        location_id = _get_or_create_main_location(conn, account_id)
+                    location_id = _get_or_create_main_location(account_id)
                     if location_id:
                         LocationInventoryManager.add_product_to_location(
                             product_id, location_id, product_data['current_stock'], user_id
@@ -1,10 +1,10 @@
 #app/routes/main
 import os
-from flask import Blueprint, render_template, jsonify, session, g, current_app, redirect, url_for
+from flask import Blueprint, render_template, jsonify, session, g, current_app, redirect, url_for, request, Response
 from sqlalchemy import text
 from datetime import datetime
 from app.services.db import DB_ENGINE
-from app.services.cache import get_user_profile_cached
+from app.services.cache import get_user_profile_cached, cache_stats
 
 main_bp = Blueprint('main', __name__)
 
@@ -42,16 +42,14 @@ def health_check():
 def system_status():
     if 'user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
-    return jsonify({'status': 'operational', 'timestamp': datetime.now().isoformat()}), 200
+    return jsonify({'status': 'operational', 'timestamp': datetime.now().isoformat(),
+                    'cache': cache_stats()}), 200
 
 
-@main_bp.route('/admin/backup')
-def admin_backup():
-    """Manual database backup trigger.
-    
-    Access is controlled by the ADMIN_EMAILS environment variable.
-    Set it on Railway as a comma-separated list, e.g.:
-        ADMIN_EMAILS=you@example.com,other@example.com
+def _admin_denied(action):
+    """
+    Error response unless the session user is listed in ADMIN_EMAILS
+    (comma-separated, set on Railway), else None.
     """
     if 'user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
@@ -64,9 +62,23 @@ def admin_backup():
 
     if not allowed_emails or user_email not in allowed_emails:
         current_app.logger.warning(
-            f"Unauthorized backup attempt by user_id={session['user_id']} email={user_email}"
+            f"Unauthorized {action} attempt by user_id={session['user_id']} email={user_email}"
         )
         return jsonify({'error': 'Forbidden'}), 403
+    return None
+
+
+@main_bp.route('/admin/backup')
+def admin_backup():
+    """Manual database backup trigger.
+
+    Access is controlled by the ADMIN_EMAILS environment variable.
+    Set it on Railway as a comma-separated list, e.g.:
+        ADMIN_EMAILS=you@example.com,other@example.com
+    """
+    denied = _admin_denied('backup')
+    if denied:
+        return denied
 
     try:
         import subprocess
@@ -93,6 +105,46 @@ def admin_backup():
         return jsonify({'error': str(e)}), 500
 
 
+def _render_profiles(selected=None, collapsed=None):
+    from app.services import profiler
+    collapsed = collapsed or {}
+    return render_template("admin_profiles.html", nonce=g.nonce,
+                           enabled=profiler.PROFILE_ENABLED,
+                           every_n=profiler.PROFILE_EVERY_N,
+                           slow_ms=profiler.PROFILE_SLOW_MS,
+                           header=profiler.PROFILE_HEADER,
+                           token=profiler.make_profile_token(),
+                           token_ttl=profiler.PROFILE_TOKEN_TTL,
+                           profiles=profiler.list_profiles(),
+                           selected=selected,
+                           frames=profiler.hottest_frames(collapsed) if collapsed else [],
+                           total=sum(collapsed.values()))
+
+
+@main_bp.route('/admin/profiles')
+def admin_profiles():
+    """Request profiles captured by app/services/profiler.py (same access rule as backup)."""
+    denied = _admin_denied('profile viewer')
+    if denied:
+        return denied
+    return _render_profiles()
+
+
+@main_bp.route('/admin/profiles/<name>')
+def admin_profile_detail(name):
+    denied = _admin_denied('profile viewer')
+    if denied:
+        return denied
+
+    from app.services.profiler import load_collapsed
+    collapsed = load_collapsed(name)
+    if request.args.get('format') == 'collapsed':
+        body = ''.join(f"{stack} {count}\n" for stack, count in collapsed.most_common())
+        return Response(body, mimetype='text/plain', headers={
+            'Content-Disposition': f'attachment; filename={name}.collapsed'})
+    return _render_profiles(name, collapsed)
+
+
 # NOTE: /debug route has been removed — it exposed full session contents
 # (user_id, role, account_id, session_token) to any unauthenticated request.
 # If you need debug info, log it server-side via current_app.logger.
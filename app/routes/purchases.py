@@ -5,6 +5,7 @@ from datetime import datetime
 import json
 from app.services.utils import random_success_message
 from app.services.db import DB_ENGINE
+from app.services.data_versions import mark_changed
 from app.services.inventory import InventoryManager
 from app.services.invoice_logic_po import prepare_po_data
 from app.services.qr_engine import generate_qr_base64
@@ -273,6 +274,7 @@ def mark_po_received(po_number):
                 UPDATE purchase_orders SET status = :status
                 WHERE account_id = :aid AND po_number = :po_number
             """), {"aid": account_id, "po_number": po_number, "status": new_status})
+            mark_changed(conn, account_id, 'purchases')
 
         if all_fully_received:
             flash(f"✅ PO {po_number} fully received! {added_units} units added to stock.", "success")
@@ -4,10 +4,10 @@ from flask import redirect, url_for
 from app.services.pdf_engine import generate_pdf
 from app.context_processors import CURRENCY_SYMBOLS
 from app.services.cache import get_user_profile_cached
+from app.services.reports import compute_profit_loss
 from flask import Blueprint, render_template, session, request, jsonify
 from app.services.db import DB_ENGINE
 from sqlalchemy import text
-from weasyprint import HTML
 import io
 from datetime import datetime
 from app.decorators import role_required
@@ -227,154 +227,7 @@ def profit_loss():
         to_date = request.form.get('to_date')
         include_details = request.form.get('include_details') == 'yes'
 
-        with DB_ENGINE.connect() as conn:
-            # --- SALES TOTALS ---
-            sales_result = conn.execute(text("""
-                SELECT 
-                    COUNT(*) as invoice_count,
-                    SUM(grand_total) as total_sales,
-                    SUM(COALESCE((invoice_data::json->>'tax_amount')::numeric, 0)) as total_tax_collected
-                FROM user_invoices
-                WHERE account_id = :aid AND invoice_date BETWEEN :from_date AND :to_date
-            """), {"aid": account_id, "from_date": from_date, "to_date": to_date}).fetchone()
-            invoice_count = sales_result[0] or 0
-            total_sales = float(sales_result[1] or 0.0)
-            total_tax_collected = float(sales_result[2] or 0.0)
-
-            # --- EXPENSE TOTALS ---
-            expense_result = conn.execute(text("""
-                SELECT 
-                    COUNT(*) as expense_count,
-                    SUM(amount) as total_net_expenses,
-                    COALESCE(SUM(tax_amount), 0) as total_input_tax
-                FROM expenses
-                WHERE account_id = :aid AND expense_date BETWEEN :from_date AND :to_date
-            """), {"aid": account_id, "from_date": from_date, "to_date": to_date}).fetchone()
-            expense_count = expense_result[0] or 0
-            total_net_expenses = float(expense_result[1] or 0.0)
-            total_input_tax = float(expense_result[2] or 0.0)
-
-            # --- COGS (Cost of Goods Sold) from paid invoices ---
-            cogs = float(conn.execute(text("""
-                SELECT COALESCE(SUM(ii.quantity * i.cost_price), 0)
-                FROM invoice_items ii
-                JOIN user_invoices ui ON ii.invoice_id = ui.id
-                JOIN inventory_items i ON ii.product_id = i.id
-                WHERE ui.account_id = :aid 
-                    AND ui.status = 'paid'
-                    AND ui.invoice_date BETWEEN :from_date AND :to_date
-            """), {"aid": account_id, "from_date": from_date, "to_date": to_date}).scalar() or 0)
-
-            # --- OPENING INVENTORY (value before from_date) ---
-            opening_inventory = float(conn.execute(text("""
-                WITH inventory_snapshot AS (
-                    SELECT 
-                        i.id,
-                        i.cost_price,
-                        COALESCE((
-                            SELECT SUM(ii.quantity)
-                            FROM invoice_items ii
-                            JOIN user_invoices ui ON ii.invoice_id = ui.id
-                            WHERE ii.product_id = i.id 
-                                AND ui.status = 'paid'
-                                AND ui.invoice_date < :from_date
-                        ), 0) as sold_before,
-                        COALESCE((
-                            SELECT SUM(pr.received_qty)
-                            FROM po_receipts pr
-                            WHERE pr.product_id = i.id 
-                                AND pr.received_date < :from_date
-                        ), 0) as purchased_before
-                    FROM inventory_items i
-                    WHERE i.account_id = :aid
-                )
-                SELECT COALESCE(SUM(cost_price * (purchased_before - sold_before)), 0)
-                FROM inventory_snapshot
-            """), {"aid": account_id, "from_date": from_date}).scalar() or 0)
-
-            # --- PURCHASES DURING PERIOD (from receipts) ---
-            purchases = float(conn.execute(text("""
-                SELECT COALESCE(SUM(pr.received_qty * i.cost_price), 0)
-                FROM po_receipts pr
-                JOIN inventory_items i ON pr.product_id = i.id
-                WHERE i.account_id = :aid 
-                    AND pr.received_date BETWEEN :from_date AND :to_date
-            """), {"aid": account_id, "from_date": from_date, "to_date": to_date}).scalar() or 0)
-
-            # --- CLOSING INVENTORY (current value) ---
-            closing_inventory = float(conn.execute(text("""
-                SELECT COALESCE(SUM(current_stock * cost_price), 0)
-                FROM inventory_items
-                WHERE account_id = :aid
-            """), {"aid": account_id}).scalar() or 0)
-
-            # --- RECEIVABLES AGING ---
-            receivables = conn.execute(text("""
-                SELECT 
-                    COUNT(*) as total_invoices,
-                    COALESCE(SUM(grand_total), 0) as total_due,
-                    COALESCE(SUM(CASE 
-                        WHEN invoice_date < NOW() - INTERVAL '60 days' 
-                        THEN grand_total ELSE 0 
-                    END), 0) as over_60_days,
-                    COALESCE(SUM(CASE 
-                        WHEN invoice_date BETWEEN NOW() - INTERVAL '60 days' AND NOW() - INTERVAL '30 days'
-                        THEN grand_total ELSE 0 
-                    END), 0) as between_30_60,
-                    COALESCE(SUM(CASE 
-                        WHEN invoice_date > NOW() - INTERVAL '30 days'
-                        THEN grand_total ELSE 0 
-                    END), 0) as under_30_days
-                FROM user_invoices
-                WHERE account_id = :aid AND status = 'unpaid'
-            """), {"aid": account_id}).first()
-
-            # --- PAYABLES (unpaid purchase orders) ---
-            payables = conn.execute(text("""
-                SELECT 
-                    COUNT(*) as total_pos,
-                    COALESCE(SUM(grand_total), 0) as total_payable
-                FROM purchase_orders
-                WHERE account_id = :aid AND status = 'pending'
-            """), {"aid": account_id}).first()
-
-            # --- DETAILED LISTS (if requested) ---
-            invoices = []
-            expenses = []
-            if include_details:
-                inv_rows = conn.execute(text("""
-                    SELECT invoice_number, invoice_date, client_name, grand_total,
-                           COALESCE((invoice_data::json->>'tax_amount')::numeric, 0) as tax_amount
-                    FROM user_invoices
-                    WHERE account_id = :aid AND invoice_date BETWEEN :from_date AND :to_date
-                    ORDER BY invoice_date DESC
-                """), {"aid": account_id, "from_date": from_date, "to_date": to_date}).fetchall()
-                for row in inv_rows:
-                    invoices.append({
-                        'number': row[0],
-                        'date': row[1].strftime('%Y-%m-%d') if row[1] else '',
-                        'client': row[2],
-                        'total': float(row[3]),
-                        'tax': float(row[4])
-                    })
-
-                exp_rows = conn.execute(text("""
-                    SELECT expense_date, description, category, amount, notes
-                    FROM expenses
-                    WHERE account_id = :aid AND expense_date BETWEEN :from_date AND :to_date
-                    ORDER BY expense_date DESC
-                """), {"aid": account_id, "from_date": from_date, "to_date": to_date}).fetchall()
-                for row in exp_rows:
-                    expenses.append({
-                        'date': row[0].strftime('%Y-%m-%d') if row[0] else '',
-                        'description': row[1],
-                        'category': row[2],
-                        'amount': float(row[3]),
-                        'notes': row[4]
-                    })
-
-        gross_profit = total_sales - cogs
-        net_profit = gross_profit - total_net_expenses
+        pl = compute_profit_loss(account_id, from_date, to_date, include_details)
 
         user_profile = get_user_profile_cached(user_id)
         company_name = user_profile.get('company_name', 'Your Company')
@@ -390,23 +243,23 @@ def profit_loss():
                                issue_date=issue_date,
                                from_date=from_date,
                                to_date=to_date,
-                               invoice_count=invoice_count,
-                               total_sales=total_sales,
-                               total_tax_collected=total_tax_collected,
-                               expense_count=expense_count,
-                               total_expenses=total_net_expenses,
-                               total_input_tax=total_input_tax,
-                               cogs=cogs,
-                               opening_inventory=opening_inventory,
-                               purchases=purchases,
-                               closing_inventory=closing_inventory,
-                               gross_profit=gross_profit,
-                               net_profit=net_profit,
-                               receivables=receivables,
-                               payables=payables,
+                               invoice_count=pl['invoice_count'],
+                               total_sales=pl['total_sales'],
+                               total_tax_collected=pl['total_tax_collected'],
+                               expense_count=pl['expense_count'],
+                               total_expenses=pl['total_net_expenses'],
+                               total_input_tax=pl['total_input_tax'],
+                               cogs=pl['cogs'],
+                               opening_inventory=pl['opening_inventory'],
+                               purchases=pl['purchases'],
+                               closing_inventory=pl['closing_inventory'],
+                               gross_profit=pl['gross_profit'],
+                               net_profit=pl['net_profit'],
+                               receivables=pl['receivables'],
+                               payables=pl['payables'],
                                include_details=include_details,
-                               invoices=invoices,
-                               expenses=expenses)
+                               invoices=pl['invoices'],
+                               expenses=pl['expenses'])
 
         from app.services.pdf_engine import generate_pdf
         pdf_bytes = generate_pdf(html)
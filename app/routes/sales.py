@@ -9,7 +9,7 @@ from app.utils.qr import generate_simple_qr
 from app.extensions import limiter
 from app.context_processors import CURRENCY_SYMBOLS
 from app.services.utils import random_success_message
-from app.services.cache import get_user_profile_cached
+from app.services.cache import get_user_profile_cached, get_account_locations_cached
 from app.services.inventory import InventoryManager
 from app.services.invoice_logic import prepare_invoice_data
 from app.services.invoice_logic_po import prepare_po_data
@@ -18,6 +18,7 @@ from app.services.pdf_engine import generate_pdf, HAS_WEASYPRINT
 from app.services.invoice_service import InvoiceService
 from app.services.number_generator import NumberGenerator
 from app.services.purchases import save_purchase_order
+from app.services.audit_log import log_download
 from app.decorators import role_required
 
 
@@ -53,7 +54,7 @@ def create_invoice():
         }
     
     # Get all locations for this account
-    locations = LocationInventoryManager.get_account_locations(account_id)
+    locations = get_account_locations_cached(account_id)
     
     # Optional: default location from user profile
     default_location_id = user_profile.get('default_location_id') if user_profile else None
@@ -275,6 +276,9 @@ def download_document(document_number):
             from app.services.pdf_generator import generate_invoice_pdf
             pdf_bytes = generate_invoice_pdf(service_data, currency_symbol=user_symbol)
 
+        log_download(user_id, document_type, document_number,
+                     request.remote_addr, request.headers.get('User-Agent', ''))
+
         # Create filename
         import re
         safe_doc_number = re.sub(r'[^\w\-]', '_', document_number)
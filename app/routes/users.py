@@ -3,6 +3,7 @@ from flask import Blueprint, render_template, session, redirect, url_for, reques
 from app.services.db import DB_ENGINE
 from sqlalchemy import text
 from app.decorators import role_required
+from app.services.cache import invalidate_user_identity_cache
 from werkzeug.security import generate_password_hash
 import secrets
 from datetime import datetime, timedelta
@@ -109,6 +110,7 @@ def edit_user(user_id):
                 text("UPDATE users SET role = :role WHERE id = :uid AND account_id = :aid"),
                 {"role": role, "uid": user_id, "aid": account_id}
             )
+        invalidate_user_identity_cache(user_id, account_id)
         flash("✅ User role updated", 'success')
         return redirect(url_for('users.list_users'))
 
@@ -140,6 +142,7 @@ def delete_user(user_id):
             text("DELETE FROM users WHERE id = :uid AND account_id = :aid"),
             {"uid": user_id, "aid": account_id}
         )
+    invalidate_user_identity_cache(user_id, account_id)
     flash("✅ User deleted", 'success')
     return redirect(url_for('users.list_users'))
 
@@ -241,7 +244,7 @@ def revoke_api_key(key_id):
     flash("API key revoked.", "success")
     return redirect(url_for('users.api_keys'))
 
-from app.services.webhooks import create_webhook, get_webhooks, delete_webhook
+from app.services.webhooks import create_webhook, get_webhooks, delete_webhook, rotate_webhook_secret
 
 @users_bp.route('/webhooks', methods=['GET'])
 @role_required('owner')
@@ -259,8 +262,20 @@ def add_webhook():
     if not url or not events:
         flash("URL and at least one event are required", "error")
         return redirect(url_for('users.list_webhooks'))
-    create_webhook(account_id, url, events)
-    flash("Webhook added", "success")
+    _, signing_secret = create_webhook(account_id, url, events)
+    flash(f"Webhook added. Its signing secret is: {signing_secret}. Copy it now, it won't be shown again.",
+          "success")
+    return redirect(url_for('users.list_webhooks'))
+
+@users_bp.route('/webhooks/<int:webhook_id>/rotate_secret', methods=['POST'])
+@role_required('owner')
+def rotate_webhook_secret_route(webhook_id):
+    account_id = session['account_id']
+    signing_secret = rotate_webhook_secret(account_id, webhook_id)
+    if signing_secret is None:
+        flash("Webhook not found", "error")
+    else:
+        flash(f"New signing secret: {signing_secret}. Copy it now, it won't be shown again.", "success")
     return redirect(url_for('users.list_webhooks'))
 
 @users_bp.route('/webhooks/<int:webhook_id>/delete', methods=['POST'])
@@ -2,6 +2,7 @@
 from app.services.db import DB_ENGINE
 from sqlalchemy import text
 from datetime import datetime
+from app.services import usage_meter
 
 # Hard‑coded plan limits (you can later move to a DB table)
 PLAN_LIMITS = {
@@ -53,82 +54,25 @@ def get_plan_limits(plan_name):
 
 def get_current_usage(account_id):
     """Get usage counts for current month (year, month)."""
-    now = datetime.now()
-    year = now.year
-    month = now.month
-    with DB_ENGINE.connect() as conn:
-        row = conn.execute(
-            text("SELECT invoice_count, inventory_count FROM monthly_usage WHERE account_id = :aid AND year = :year AND month = :month"),
-            {"aid": account_id, "year": year, "month": month}
-        ).first()
-    if row:
-        return {"invoices": row[0], "inventory": row[1]}
-    return {"invoices": 0, "inventory": 0}
+    return usage_meter.current_usage(account_id)
 
 def increment_invoice_count(account_id):
-    """Increment invoice count for current month (create row if needed)."""
-    now = datetime.now()
-    year = now.year
-    month = now.month
-    with DB_ENGINE.begin() as conn:
-        # Upsert: try update, if no rows affected insert
-        result = conn.execute(
-            text("""
-                UPDATE monthly_usage
-                SET invoice_count = invoice_count + 1
-                WHERE account_id = :aid AND year = :year AND month = :month
-                RETURNING id
-            """),
-            {"aid": account_id, "year": year, "month": month}
-        )
-        if result.rowcount == 0:
-            conn.execute(
-                text("INSERT INTO monthly_usage (account_id, year, month, invoice_count) VALUES (:aid, :year, :month, 1)"),
-                {"aid": account_id, "year": year, "month": month}
-            )
+    """Increment invoice count for current month (Redis counter, reconciled to monthly_usage)."""
+    usage_meter.record(account_id, 'invoices')
 
 def increment_inventory_count(account_id):
     """Increment active inventory count (when adding a new product)."""
-    now = datetime.now()
-    year = now.year
-    month = now.month
-    with DB_ENGINE.begin() as conn:
-        result = conn.execute(
-            text("""
-                UPDATE monthly_usage
-                SET inventory_count = inventory_count + 1
-                WHERE account_id = :aid AND year = :year AND month = :month
-                RETURNING id
-            """),
-            {"aid": account_id, "year": year, "month": month}
-        )
-        if result.rowcount == 0:
-            conn.execute(
-                text("INSERT INTO monthly_usage (account_id, year, month, inventory_count) VALUES (:aid, :year, :month, 1)"),
-                {"aid": account_id, "year": year, "month": month}
-            )
+    usage_meter.record(account_id, 'inventory')
 
 def decrement_inventory_count(account_id):
     """Decrement when a product is deleted (soft delete maybe)."""
-    now = datetime.now()
-    year = now.year
-    month = now.month
-    with DB_ENGINE.begin() as conn:
-        conn.execute(
-            text("""
-                UPDATE monthly_usage
-                SET inventory_count = GREATEST(inventory_count - 1, 0)
-                WHERE account_id = :aid AND year = :year AND month = :month
-            """),
-            {"aid": account_id, "year": year, "month": month}
-        )
+    usage_meter.record(account_id, 'inventory', -1)
 
 def check_invoice_limit(account_id):
     """Return (allowed, message) tuple."""
-    account = get_account(account_id)
-    if not account:
+    limits = usage_meter.plan_limits(account_id)
+    if limits is None:
         return False, "Account not found"
-    limits = get_plan_limits(account['subscription_plan'])
     if limits['invoice_limit'] is None:
         return True, "Unlimited"
     usage = get_current_usage(account_id)
@@ -138,10 +82,9 @@ def check_invoice_limit(account_id):
 
 def check_inventory_limit(account_id):
     """Return (allowed, message)."""
-    account = get_account(account_id)
-    if not account:
+    limits = usage_meter.plan_limits(account_id)
+    if limits is None:
         return False, "Account not found"
-    limits = get_plan_limits(account['subscription_plan'])
     if limits['inventory_limit'] is None:
         return True, "Unlimited"
     usage = get_current_usage(account_id)
@@ -151,10 +94,9 @@ def check_inventory_limit(account_id):
 
 def check_user_limit(account_id, additional_users=1):
     """Check if adding additional_users would exceed plan limit."""
-    account = get_account(account_id)
-    if not account:
+    limits = usage_meter.plan_limits(account_id)
+    if limits is None:
         return False, "Account not found"
-    limits = get_plan_limits(account['subscription_plan'])
     if limits['user_limit'] is None:
         return True, "Unlimited"
     with DB_ENGINE.connect() as conn:
@@ -168,8 +110,7 @@ def check_user_limit(account_id, additional_users=1):
 
 def has_feature(account_id, feature):
     """feature can be 'purchase_orders' or 'ai_insights'."""
-    account = get_account(account_id)
-    if not account:
+    limits = usage_meter.plan_limits(account_id)
+    if limits is None:
         return False
-    limits = get_plan_limits(account['subscription_plan'])
     return limits.get(feature, False)
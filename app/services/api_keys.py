@@ -1,13 +1,55 @@
 # app/services/api_keys.py
+"""
+API key storage and validation.
+
+Hot path: every /api/v1 request calls validate_api_key().  It used to do a
+SELECT by key_hash plus a separately committed UPDATE of last_used_at — two
+DB transactions per API call before the handler even ran.
+
+Now:
+  - Resolved principals (key_hash → account_id, is_active, expires_at) live in
+    a per-process LRU of at most API_KEY_CACHE_MAX entries for
+    API_KEY_CACHE_TTL seconds.  A cache hit is a dict lookup; the DB is only
+    consulted on a miss or after the TTL lapses.  Unknown hashes are never
+    cached, so random bearer tokens cannot grow worker memory.
+  - revoke_api_key() evicts the entry locally and publishes the key_hash on a
+    Redis pub/sub channel so every other worker evicts it immediately instead
+    of waiting out the TTL.  Without Redis the TTL is the upper bound.  A
+    load that raced an eviction is not cached, and the listener clears the
+    whole cache when it (re)subscribes, since it missed whatever was
+    published while it was disconnected.
+  - last_used_at is no longer written per request.  Used hashes are collected
+    in a set and flushed by a background thread in one UPDATE every
+    API_KEY_LAST_USED_FLUSH_SECONDS (and once more at interpreter exit).
+"""
+import os
+import time
+import atexit
 import secrets
 import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from sqlalchemy import text
 from app.services.db import DB_ENGINE
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+API_KEY_CACHE_TTL = int(os.getenv('API_KEY_CACHE_TTL', 60))
+API_KEY_CACHE_MAX = int(os.getenv('API_KEY_CACHE_MAX', 10000))
+API_KEY_LAST_USED_FLUSH_SECONDS = int(os.getenv('API_KEY_LAST_USED_FLUSH_SECONDS', 60))
+REVOCATION_CHANNEL = 'groweasy:api_keys:revoked'
+
+# key_hash -> (account_id, is_active, expires_at, loaded_at_monotonic), least
+# recently used first.  Only hashes found in api_keys are stored.
+_principal_cache: OrderedDict = OrderedDict()
+# Bumped on every eviction; a load that saw it change does not cache its row
+_eviction_gen = 0
+_pending_last_used: set = set()
+_state_lock = threading.Lock()
+_background_started = False
+
 
 def hash_key(key: str) -> str:
     """Hash a raw API key (SHA-256) for storage. Keys are long random values so no salt needed."""
@@ -46,12 +88,39 @@ def get_api_keys(account_id: int) -> list:
 
 
 def revoke_api_key(account_id: int, key_id: int) -> None:
-    """Soft-delete an API key (set is_active = FALSE)."""
+    """
+    Soft-delete an API key (set is_active = FALSE).
+
+    The revoked hash is evicted from this worker's principal cache and
+    broadcast to the other workers so the key stops working everywhere
+    straight away, not when the cache TTL runs out.
+    """
     with DB_ENGINE.begin() as conn:
-        conn.execute(text("""
+        rows = conn.execute(text("""
             UPDATE api_keys SET is_active = FALSE
             WHERE id = :key_id AND account_id = :account_id
-        """), {"key_id": key_id, "account_id": account_id})
+            RETURNING key_hash
+        """), {"key_id": key_id, "account_id": account_id}).fetchall()
+
+    for (key_hash,) in rows:
+        evict_principal(key_hash)
+        _publish_revocation(key_hash)
+
+
+def evict_principal(key_hash: str) -> None:
+    """Drop a key_hash from this process's principal cache."""
+    global _eviction_gen
+    with _state_lock:
+        _eviction_gen += 1
+        _principal_cache.pop(key_hash, None)
+
+
+def clear_principals() -> None:
+    """Drop every cached principal in this process."""
+    global _eviction_gen
+    with _state_lock:
+        _eviction_gen += 1
+        _principal_cache.clear()
 
 
 def validate_api_key(raw_key: str):
@@ -59,39 +128,134 @@ def validate_api_key(raw_key: str):
     Validate a raw API key and return (account_id, None) on success
     or (None, error_message) on failure.
 
-    FIX: The original code used DB_ENGINE.connect() (read-only) and then
-    attempted an UPDATE inside that context.  The UPDATE was never committed,
-    so last_used_at was silently ignored on every single API call.
-    Fixed by splitting into two explicit transactions:
-      1. A read-only SELECT to validate.
-      2. A separate DB_ENGINE.begin() to commit the last_used_at UPDATE.
+    Served from the principal cache when possible; see module docstring.
     """
     key_hash = hash_key(raw_key)
+    _ensure_background_workers()
 
-    # Step 1: validate (read-only)
+    with _state_lock:
+        entry = _principal_cache.get(key_hash)
+        if entry is not None:
+            _principal_cache.move_to_end(key_hash)
+    if entry is None or time.monotonic() - entry[3] > API_KEY_CACHE_TTL:
+        entry = _load_principal(key_hash)
+        if entry is None:
+            return None, "Invalid API key"
+
+    account_id, is_active, expires_at, _ = entry
+    if not is_active:
+        return None, "API key revoked"
+    if expires_at and expires_at < datetime.now():
+        return None, "API key expired"
+
+    # last_used_at is written lazily by the flush thread
+    _pending_last_used.add(key_hash)
+    return account_id, None
+
+
+def flush_last_used() -> int:
+    """
+    Write last_used_at for every key used since the previous flush in a
+    single UPDATE.  Returns the number of hashes flushed.
+    """
+    with _state_lock:
+        if not _pending_last_used:
+            return 0
+        hashes = list(_pending_last_used)
+        # difference_update keeps hashes added concurrently outside the lock
+        _pending_last_used.difference_update(hashes)
+
+    try:
+        with DB_ENGINE.begin() as conn:
+            conn.execute(text("""
+                UPDATE api_keys SET last_used_at = NOW()
+                WHERE key_hash = ANY(:hashes)
+            """), {"hashes": hashes})
+    except Exception as e:
+        # Non-fatal: the keys are valid even if we can't update the timestamp
+        logger.warning(f"Failed to flush last_used_at for {len(hashes)} API key(s): {e}")
+        with _state_lock:
+            _pending_last_used.update(hashes)
+        return 0
+    return len(hashes)
+
+
+# ---------------------------------------------------------------------------
+# Internals
+# ---------------------------------------------------------------------------
+
+def _load_principal(key_hash: str):
+    """Fresh (account_id, is_active, expires_at, loaded_at) for a stored hash, else None (not cached)."""
+    # Read before the SELECT: a revocation evicting between the SELECT and
+    # the insert below would otherwise be undone for API_KEY_CACHE_TTL
+    gen = _eviction_gen
     with DB_ENGINE.connect() as conn:
         row = conn.execute(text("""
-            SELECT id, account_id, is_active, expires_at
+            SELECT account_id, is_active, expires_at
             FROM api_keys
             WHERE key_hash = :key_hash
         """), {"key_hash": key_hash}).first()
 
     if not row:
-        return None, "Invalid API key"
-    if not row.is_active:
-        return None, "API key revoked"
-    if row.expires_at and row.expires_at < datetime.now():
-        return None, "API key expired"
+        with _state_lock:
+            _principal_cache.pop(key_hash, None)
+        return None
+    entry = (row.account_id, bool(row.is_active), row.expires_at, time.monotonic())
+    with _state_lock:
+        if _eviction_gen != gen:
+            return entry
+        _principal_cache[key_hash] = entry
+        _principal_cache.move_to_end(key_hash)
+        while len(_principal_cache) > API_KEY_CACHE_MAX:
+            _principal_cache.popitem(last=False)
+    return entry
 
-    # Step 2: update last_used_at (write transaction — actually committed)
+
+def _publish_revocation(key_hash: str) -> None:
     try:
-        with DB_ENGINE.begin() as conn:
-            conn.execute(text("""
-                UPDATE api_keys SET last_used_at = NOW()
-                WHERE key_hash = :key_hash
-            """), {"key_hash": key_hash})
+        from app.extensions import get_redis
+        get_redis().publish(REVOCATION_CHANNEL, key_hash)
     except Exception as e:
-        # Non-fatal: the key is valid even if we can't update the timestamp
-        logger.warning(f"Failed to update last_used_at for API key: {e}")
+        # Other workers fall back to the cache TTL
+        logger.warning(f"API key revocation broadcast failed: {e}")
+
+
+def _revocation_listener() -> None:
+    """Evict revoked hashes published by other workers.  Reconnects on error."""
+    from app.extensions import get_redis
+    while True:
+        try:
+            pubsub = get_redis().pubsub()
+            pubsub.subscribe(REVOCATION_CHANNEL)
+            for message in pubsub.listen():
+                if message.get('type') == 'subscribe':
+                    # (Re)subscribed: revocations published while disconnected were missed
+                    clear_principals()
+                elif message.get('type') == 'message':
+                    evict_principal(message['data'])
+        except Exception as e:
+            logger.warning(f"API key revocation listener error, retrying: {e}")
+            time.sleep(5)
+
+
+def _last_used_flusher() -> None:
+    while True:
+        time.sleep(API_KEY_LAST_USED_FLUSH_SECONDS)
+        flush_last_used()
+
+
+def _ensure_background_workers() -> None:
+    """Start the flush and revocation threads once per process, on first use."""
+    global _background_started
+    if _background_started:
+        return
+    with _state_lock:
+        if _background_started:
+            return
+        _background_started = True
 
-    return row.account_id, None
+    threading.Thread(target=_last_used_flusher, daemon=True,
+                     name="api-key-last-used").start()
+    threading.Thread(target=_revocation_listener, daemon=True,
+                     name="api-key-revocations").start()
+    atexit.register(flush_last_used)
@@ -0,0 +1,194 @@
+# app/services/audit_log.py
+"""
+Buffered, asynchronous writer for append-only audit tables
+(api_logs, download_logs).
+
+The request path only puts a tuple on a bounded in-process queue — it never
+opens a transaction or checks out a pool connection.  A daemon thread per
+writer drains the queue and writes one multi-row INSERT per batch, flushing
+when AUDIT_LOG_BATCH_SIZE rows are waiting or every
+AUDIT_LOG_FLUSH_SECONDS, whichever comes first.  Whatever is still queued at
+interpreter exit is drained by an atexit hook.
+
+Overflow policy (AUDIT_LOG_OVERFLOW) when the queue is full:
+  drop   — discard the new entry (default; logging never slows a request)
+  sample — above 80% full keep only 1 in AUDIT_LOG_SAMPLE_RATE entries,
+           drop when completely full
+  block  — wait up to AUDIT_LOG_BLOCK_SECONDS for room, then drop
+Every discarded entry is counted in stats().
+"""
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from sqlalchemy import text
+from app.services.db import DB_ENGINE
+
+logger = logging.getLogger(__name__)
+
+AUDIT_LOG_QUEUE_SIZE = int(os.getenv('AUDIT_LOG_QUEUE_SIZE', 10000))
+AUDIT_LOG_BATCH_SIZE = int(os.getenv('AUDIT_LOG_BATCH_SIZE', 500))
+AUDIT_LOG_FLUSH_SECONDS = float(os.getenv('AUDIT_LOG_FLUSH_SECONDS', 2.0))
+AUDIT_LOG_OVERFLOW = os.getenv('AUDIT_LOG_OVERFLOW', 'drop')
+AUDIT_LOG_SAMPLE_RATE = int(os.getenv('AUDIT_LOG_SAMPLE_RATE', 10))
+AUDIT_LOG_BLOCK_SECONDS = float(os.getenv('AUDIT_LOG_BLOCK_SECONDS', 0.05))
+
+_OVERFLOW_POLICIES = ('drop', 'sample', 'block')
+
+
+class AuditLogWriter:
+    """Bounded queue + background bulk INSERT for one table."""
+
+    def __init__(self, table, columns, maxsize=AUDIT_LOG_QUEUE_SIZE,
+                 batch_size=AUDIT_LOG_BATCH_SIZE, flush_interval=AUDIT_LOG_FLUSH_SECONDS,
+                 overflow=AUDIT_LOG_OVERFLOW):
+        if overflow not in _OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown audit log overflow policy: {overflow}")
+        self.table = table
+        self.columns = tuple(columns)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pid = None
+        self._sample_counter = 0
+        self._counters = {'enqueued': 0, 'written': 0, 'dropped': 0,
+                          'sampled_out': 0, 'batches': 0, 'flush_errors': 0}
+
+    # ─── Request path ─────────────────────────────────────────
+
+    def submit(self, row):
+        """
+        Queue one row (a tuple in self.columns order).  Never raises and
+        never touches the database.  Returns True if the row was accepted.
+        """
+        self._ensure_started()
+
+        if self.overflow == 'sample':
+            high_water = self._queue.maxsize * 0.8
+            if self._queue.qsize() >= high_water:
+                self._sample_counter += 1
+                if self._sample_counter % AUDIT_LOG_SAMPLE_RATE:
+                    self._count('sampled_out')
+                    return False
+
+        try:
+            if self.overflow == 'block':
+                self._queue.put(row, timeout=AUDIT_LOG_BLOCK_SECONDS)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            self._count('dropped')
+            return False
+
+        self._count('enqueued')
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, 'queued': self._queue.qsize(),
+                    'table': self.table, 'overflow': self.overflow}
+
+    # ─── Background side ──────────────────────────────────────
+
+    def flush(self):
+        """Write everything currently queued, in batches.  Returns rows written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    break
+                written += self._write_batch(batch)
+                if len(batch) < self.batch_size:
+                    break
+        return written
+
+    def _write_batch(self, batch):
+        """One multi-row INSERT for the whole batch."""
+        params = {}
+        value_groups = []
+        for i, row in enumerate(batch):
+            names = []
+            for j, value in enumerate(row):
+                key = f"v{i}_{j}"
+                params[key] = value
+                names.append(f":{key}")
+            value_groups.append(f"({', '.join(names)})")
+
+        sql = (f"INSERT INTO {self.table} ({', '.join(self.columns)}) "
+               f"VALUES {', '.join(value_groups)}")
+        try:
+            with DB_ENGINE.begin() as conn:
+                conn.execute(text(sql), params)
+        except Exception as e:
+            # Audit rows are best-effort — never let them take a worker down
+            logger.warning(f"{self.table} bulk insert of {len(batch)} rows failed: {e}")
+            self._count('flush_errors')
+            self._count('dropped', len(batch))
+            return 0
+
+        self._count('written', len(batch))
+        self._count('batches')
+        return len(batch)
+
+    def _run(self):
+        while True:
+            deadline = time.monotonic() + self.flush_interval
+            while self._queue.qsize() < self.batch_size and time.monotonic() < deadline:
+                time.sleep(min(0.05, self.flush_interval))
+            self.flush()
+
+    def _ensure_started(self):
+        # Re-check the pid so a writer created before a gunicorn --preload
+        # fork gets its own flusher thread in every worker.
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+        threading.Thread(target=self._run, daemon=True,
+                         name=f"audit-log-{self.table}").start()
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+
+api_log_writer = AuditLogWriter(
+    'api_logs', ('account_id', 'endpoint', 'method', 'status_code', 'ip_address'))
+
+download_log_writer = AuditLogWriter(
+    'download_logs', ('user_id', 'document_type', 'document_number', 'ip_address', 'user_agent'))
+
+
+def log_download(user_id, document_type, document_number, ip, user_agent):
+    """Queue a download_logs row for the background writer."""
+    download_log_writer.submit((user_id, document_type, document_number, ip, user_agent))
+
+
+def audit_log_stats():
+    return {w.table: w.stats() for w in (api_log_writer, download_log_writer)}
+
+
+def drain_audit_logs():
+    """Flush every writer synchronously (shutdown hook)."""
+    for writer in (api_log_writer, download_log_writer):
+        try:
+            writer.flush()
+        except Exception as e:
+            logger.warning(f"Draining {writer.table} failed: {e}")
+
+
+atexit.register(drain_audit_logs)
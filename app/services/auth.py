@@ -6,6 +6,8 @@ from sqlalchemy import text
 import json
 from datetime import datetime
 from app.services.webhooks import fire_webhook
+from app.services.data_versions import mark_changed
+from app.services.single_flight import single_flight
 
 # FIX: werkzeug is already a Flask dependency — use it everywhere for password hashing.
 # SHA256 without salt (the old approach) is vulnerable to rainbow table attacks.
@@ -200,6 +202,7 @@ def change_user_password(user_id: int, new_password: str) -> bool:
 # ---------------------------------------------------------------------------
 # Business data functions 
 # ---------------------------------------------------------------------------
+@single_flight()
 def get_business_summary(account_id):
     with DB_ENGINE.connect() as conn:
         result = conn.execute(text('''
@@ -311,6 +314,7 @@ def save_user_invoice(user_id, account_id, invoice_data):
                 "phone": customer_data['phone'], "address": customer_data['address'],
                 "tax_id": customer_data['tax_id'], "grand_total": grand_total
             })
+        mark_changed(conn, account_id, 'invoices', 'customers')
     return True
 
 
@@ -401,6 +405,7 @@ def save_customer(user_id, account_id, data):
             "phone": data.get('phone'), "address": data.get('address'),
             "tax_id": data.get('tax_id')
         })
+        mark_changed(conn, account_id, 'customers')
         return result.scalar()
 
 
@@ -416,6 +421,7 @@ def update_customer(account_id, customer_id, data):
             "phone": data.get('phone'), "address": data.get('address'),
             "tax_id": data.get('tax_id'), "cid": customer_id, "aid": account_id
         })
+        mark_changed(conn, account_id, 'customers')
         return result.rowcount > 0
 
 
@@ -424,6 +430,7 @@ def delete_customer(account_id, customer_id):
         result = conn.execute(text("""
             DELETE FROM customers WHERE id = :cid AND account_id = :aid
         """), {"cid": customer_id, "aid": account_id})
+        mark_changed(conn, account_id, 'customers')
         return result.rowcount > 0
 
 
@@ -469,6 +476,7 @@ def update_invoice_status(account_id, invoice_id, status):
             UPDATE user_invoices SET status=:status, updated_at=CURRENT_TIMESTAMP
             WHERE id=:id AND account_id=:aid
         """), {"status": status, "id": invoice_id, "aid": account_id})
+        mark_changed(conn, account_id, 'invoices')
         return result.rowcount > 0
 
 
@@ -494,21 +502,23 @@ def get_invoice_by_number(account_id, invoice_number):
 
 def update_invoice_status_by_number(account_id, invoice_number, status):
     with DB_ENGINE.begin() as conn:
-        result = conn.execute(text("""
+        row = conn.execute(text("""
             UPDATE user_invoices SET status=:status, updated_at=CURRENT_TIMESTAMP
             WHERE invoice_number=:inv_num AND account_id=:aid
-        """), {"status": status, "inv_num": invoice_number, "aid": account_id})
-        success = result.rowcount > 0
-
-    if success and status == 'paid':
-        invoice = get_invoice_by_number(account_id, invoice_number)
-        if invoice:
+            RETURNING grand_total, client_name
+        """), {"status": status, "inv_num": invoice_number, "aid": account_id}).first()
+        success = row is not None
+        if success:
+            mark_changed(conn, account_id, 'invoices')
+
+        # Outbox row commits atomically with the status change
+        if success and status == 'paid':
             fire_webhook(account_id, 'invoice.paid', {
                 'invoice_number': invoice_number,
                 'status': status,
-                'grand_total': invoice['grand_total'],
-                'client_name': invoice['client_name']
-            })
+                'grand_total': float(row[0]),
+                'client_name': row[1]
+            }, conn=conn)
     return success
 
 
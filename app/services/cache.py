@@ -9,14 +9,42 @@ None and Flask-Caching raises a connection error on startup.
 Fixed: detect missing REDIS_URL and fall back to SimpleCache with a loud
 warning.  In production on Railway, REDIS_URL is always set, so this only
 affects local dev.
+
+FIX 2 (ROUND TRIPS): get_user_profile_cached() is called by the
+inject_currency context processor on every render and again by most
+routes, so a single page paid several Redis round trips for the same
+profile.  Hot lookups (profile, account, plan limits, locations) now go
+through LayeredCache:
+
+  L1  flask.g             — per request, free after the first lookup
+  L1b process-local LRU   — optional, CACHE_LOCAL_TTL seconds (0 = off).
+                            Invalidation only reaches the local worker, so
+                            other workers may serve a value up to
+                            CACHE_LOCAL_TTL old; keep it short.
+  L2  Flask-Caching/Redis — shared by all workers, CACHE_DEFAULT_TIMEOUT
+
+Concurrent misses for the same key inside a worker collapse into one
+loader call; the other threads wait for its result.  None is never cached.
+Hit/miss/latency counters are available from cache_stats().
 """
 import os
+import time
 import logging
+import threading
+from collections import OrderedDict
+from flask import g, has_app_context
 from flask_caching import Cache
 
 logger = logging.getLogger(__name__)
 cache = Cache()
 
+CACHE_DEFAULT_TIMEOUT = 300
+CACHE_LOCAL_TTL = float(os.getenv('CACHE_LOCAL_TTL', 0))
+CACHE_LOCAL_MAXSIZE = int(os.getenv('CACHE_LOCAL_MAXSIZE', 1024))
+CACHE_LOAD_WAIT_SECONDS = float(os.getenv('CACHE_LOAD_WAIT_SECONDS', 5))
+
+_MISS = object()
+
 
 def init_cache(app):
     redis_url = os.getenv('REDIS_URL')
@@ -25,14 +53,14 @@ def init_cache(app):
         cache_config = {
             'CACHE_TYPE': 'RedisCache',
             'CACHE_REDIS_URL': redis_url,
-            'CACHE_DEFAULT_TIMEOUT': 300,
+            'CACHE_DEFAULT_TIMEOUT': CACHE_DEFAULT_TIMEOUT,
         }
         logger.info("Cache: using Redis")
     else:
         # Safe local fallback — NOT suitable for multi-worker production
         cache_config = {
             'CACHE_TYPE': 'SimpleCache',
-            'CACHE_DEFAULT_TIMEOUT': 300,
+            'CACHE_DEFAULT_TIMEOUT': CACHE_DEFAULT_TIMEOUT,
         }
         logger.warning(
             "REDIS_URL not set — falling back to SimpleCache (per-process, "
@@ -42,17 +70,254 @@ def init_cache(app):
     cache.init_app(app, config=cache_config)
 
 
-@cache.memoize(timeout=300)
+class _Flight:
+    """One in-progress load that other threads can wait on."""
+    __slots__ = ('event', 'value', 'ok')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.ok = False
+
+
+class LayeredCache:
+    """Request-local → process-local → Redis lookup with miss collapsing."""
+
+    def __init__(self, local_ttl=CACHE_LOCAL_TTL, local_maxsize=CACHE_LOCAL_MAXSIZE):
+        self.local_ttl = local_ttl
+        self.local_maxsize = local_maxsize
+        self._local = OrderedDict()          # key -> (expires_at, value)
+        self._inflight = {}                  # key -> _Flight
+        self._lock = threading.Lock()
+        self._counters = {'request_hits': 0, 'local_hits': 0, 'redis_hits': 0,
+                          'misses': 0, 'collapsed': 0, 'load_errors': 0,
+                          'redis_errors': 0, 'load_seconds': 0.0, 'load_max_seconds': 0.0}
+
+    # ─── Public API ───────────────────────────────────────────
+
+    def get_or_load(self, key, loader, timeout=CACHE_DEFAULT_TIMEOUT):
+        memo = self._request_memo()
+        if memo is not None and key in memo:
+            self._count('request_hits')
+            return memo[key]
+
+        value = self._local_get(key)
+        if value is not _MISS:
+            self._count('local_hits')
+        else:
+            value = self._redis_get(key)
+            if value is not _MISS:
+                self._count('redis_hits')
+                self._local_set(key, value)
+            else:
+                value = self._load(key, loader, timeout)
+
+        if memo is not None and value is not None:
+            memo[key] = value
+        return value
+
+    def delete(self, *keys):
+        memo = self._request_memo()
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+        for key in keys:
+            if memo is not None:
+                memo.pop(key, None)
+            try:
+                cache.delete(key)
+            except Exception as e:
+                self._count('redis_errors')
+                logger.warning(f"Cache delete failed for {key}: {e}")
+
+    def stats(self):
+        with self._lock:
+            c = dict(self._counters)
+            c['local_size'] = len(self._local)
+        hits = c['request_hits'] + c['local_hits'] + c['redis_hits']
+        lookups = hits + c['misses']
+        c['hit_rate'] = round(hits / lookups, 4) if lookups else None
+        c['avg_load_ms'] = round(c['load_seconds'] * 1000 / c['misses'], 2) if c['misses'] else None
+        return c
+
+    # ─── Tiers ────────────────────────────────────────────────
+
+    @staticmethod
+    def _request_memo():
+        if not has_app_context():
+            return None
+        memo = g.get('_layered_cache')
+        if memo is None:
+            memo = g._layered_cache = {}
+        return memo
+
+    def _local_get(self, key):
+        if self.local_ttl <= 0:
+            return _MISS
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return _MISS
+            if entry[0] < time.monotonic():
+                del self._local[key]
+                return _MISS
+            self._local.move_to_end(key)
+            return entry[1]
+
+    def _local_set(self, key, value):
+        if self.local_ttl <= 0:
+            return
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.local_ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_maxsize:
+                self._local.popitem(last=False)
+
+    def _redis_get(self, key):
+        try:
+            value = cache.get(key)
+        except Exception as e:
+            self._count('redis_errors')
+            logger.warning(f"Cache get failed for {key}: {e}")
+            return _MISS
+        return _MISS if value is None else value
+
+    def _redis_set(self, key, value, timeout):
+        try:
+            cache.set(key, value, timeout=timeout)
+        except Exception as e:
+            self._count('redis_errors')
+            logger.warning(f"Cache set failed for {key}: {e}")
+
+    # ─── Miss path ────────────────────────────────────────────
+
+    def _load(self, key, loader, timeout):
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            # Someone in this process is already loading the key — wait for it
+            if flight.event.wait(CACHE_LOAD_WAIT_SECONDS) and flight.ok:
+                self._count('collapsed')
+                return flight.value
+            return self._timed_load(key, loader)
+
+        try:
+            value = self._timed_load(key, loader)
+            flight.value, flight.ok = value, True
+            if value is not None:
+                self._local_set(key, value)
+                self._redis_set(key, value, timeout)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def _timed_load(self, key, loader):
+        start = time.perf_counter()
+        try:
+            return loader()
+        except Exception:
+            self._count('load_errors')
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._counters['misses'] += 1
+                self._counters['load_seconds'] += elapsed
+                if elapsed > self._counters['load_max_seconds']:
+                    self._counters['load_max_seconds'] = elapsed
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+
+layered = LayeredCache()
+
+
+def cache_stats():
+    return layered.stats()
+
+
+# ─── Cached lookups ───────────────────────────────────────────
+
 def get_user_profile_cached(user_id):
     from app.services.auth import get_user_profile
-    return get_user_profile(user_id)
+    return layered.get_or_load(f"profile:{user_id}", lambda: get_user_profile(user_id))
 
 
 def invalidate_user_profile_cache(user_id):
     """
-    Delete the memoized cache entry for a specific user's profile.
+    Drop the cached profile for a specific user.
     Must be called after any update_user_profile() call so the next
     GET request reads fresh data from the DB instead of stale cache.
     """
-    cache.delete_memoized(get_user_profile_cached, user_id)
+    layered.delete(f"profile:{user_id}")
     logger.debug("Invalidated profile cache for user %s", user_id)
+
+
+def get_account_cached(account_id):
+    from app.services.account import get_account
+    return layered.get_or_load(f"account:{account_id}", lambda: get_account(account_id))
+
+
+def get_account_plan_limits_cached(account_id):
+    """Plan limits for the account's subscription, or None if it doesn't exist."""
+    from app.services.account import get_plan_limits
+    account = get_account_cached(account_id)
+    if not account:
+        return None
+    return get_plan_limits(account['subscription_plan'])
+
+
+def invalidate_account_cache(account_id):
+    layered.delete(f"account:{account_id}")
+
+
+def get_account_locations_cached(account_id):
+    """Active locations for the account (same shape as get_account_locations)."""
+    from app.services.location_inventory import LocationInventoryManager
+    return layered.get_or_load(f"locations:{account_id}",
+                               lambda: LocationInventoryManager.get_account_locations(account_id))
+
+
+def invalidate_locations_cache(account_id):
+    layered.delete(f"locations:{account_id}")
+
+
+def get_user_identity_cached(user_id):
+    """{'account_id': ..., 'role': ...} for a user, or None."""
+    def load():
+        from sqlalchemy import text
+        from app.services.db import DB_ENGINE
+        with DB_ENGINE.connect() as conn:
+            row = conn.execute(text(
+                "SELECT account_id, role FROM users WHERE id = :uid"
+            ), {"uid": user_id}).first()
+        return {'account_id': row[0], 'role': row[1]} if row else None
+    return layered.get_or_load(f"identity:{user_id}", load)
+
+
+def get_account_owner_cached(account_id):
+    """User id of the account owner, or None."""
+    def load():
+        from sqlalchemy import text
+        from app.services.db import DB_ENGINE
+        with DB_ENGINE.connect() as conn:
+            return conn.execute(text(
+                "SELECT id FROM users WHERE account_id = :aid AND role = 'owner' ORDER BY id LIMIT 1"
+            ), {"aid": account_id}).scalar()
+    return layered.get_or_load(f"owner:{account_id}", load)
+
+
+def invalidate_user_identity_cache(user_id, account_id=None):
+    """Call after changing users.account_id or users.role."""
+    keys = [f"identity:{user_id}"]
+    if account_id:
+        keys.append(f"owner:{account_id}")
+    layered.delete(*keys)
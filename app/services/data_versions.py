@@ -0,0 +1,283 @@
+# app/services/data_versions.py
+"""
+Per-account, per-domain data versions for invalidate-on-write caching.
+
+Every write path marks the domains it touched on its connection:
+
+    with DB_ENGINE.begin() as conn:
+        conn.execute(...)
+        mark_changed(conn, account_id, 'inventory')
+
+The bump is deferred until the connection goes back to the pool, i.e. after
+COMMIT — a reader can never see the new version while the old rows are still
+the committed state, so nothing stale gets cached under a fresh key.  A
+rolled-back transaction drops its pending bumps.
+
+Cached values embed the current versions in their key:
+
+    key = versioned_key('inv_report', account_id, ('inventory', 'locations'))
+    # -> "inv_report:42:inventory=1718000000123456.locations=1718000000000001"
+
+so any write to those domains moves readers onto a new key and the old
+entry simply ages out.  No TTL guessing, no explicit delete fan-out.
+
+Storage: a Redis hash per account (HINCRBY).  A missing field is seeded
+from the current time in microseconds, so a flushed or restarted Redis
+jumps versions forward instead of restarting at 0 and re-matching old keys.
+If Redis is unreachable, versions are bumped and read from the
+account_data_versions table instead.  Shared cache entries live in the same
+Redis, so only process-local caches can observe the switch.  Bumps from the
+pool checkin hook reach that table through a background flusher: a pool
+event must not check out a second connection (under pool exhaustion it
+would wait pool_timeout, and a pool of one would deadlock).
+
+Required migration (run once; ensure_data_versions_table() is idempotent):
+    CREATE TABLE IF NOT EXISTS account_data_versions (
+        account_id INTEGER NOT NULL,
+        domain     TEXT    NOT NULL,
+        version    BIGINT  NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT NOW(),
+        PRIMARY KEY (account_id, domain)
+    );
+"""
+import os
+import time
+import logging
+import threading
+from flask import g, has_app_context
+from sqlalchemy import text, event
+from app.services.db import DB_ENGINE
+
+logger = logging.getLogger(__name__)
+
+DOMAINS = ('inventory', 'invoices', 'customers', 'locations', 'purchases')
+
+_REDIS_KEY = 'groweasy:data_version:{}'
+_PENDING = 'data_version_pending'      # key in the pooled connection's .info
+
+_table_ready = False
+
+# (account_id, domain) bumps waiting for the DB fallback, drained by _flush_backlog
+_backlog = set()
+_backlog_lock = threading.Lock()
+_backlog_wake = threading.Event()
+_flusher_pid = None
+
+
+def ensure_data_versions_table():
+    global _table_ready
+    if _table_ready:
+        return
+    try:
+        with DB_ENGINE.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS account_data_versions (
+                    account_id INTEGER NOT NULL,
+                    domain     TEXT    NOT NULL,
+                    version    BIGINT  NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT NOW(),
+                    PRIMARY KEY (account_id, domain)
+                )
+            """))
+        _table_ready = True
+    except Exception as e:
+        logger.warning(f"account_data_versions migration warning: {e}")
+
+
+def _check_domains(domains):
+    for domain in domains:
+        if domain not in DOMAINS:
+            raise ValueError(f"Unknown data domain: {domain}")
+
+
+def _seed():
+    return time.time_ns() // 1000
+
+
+# ─── Write side ───────────────────────────────────────────────
+
+def mark_changed(conn, account_id, *domains):
+    """Bump the account's domain versions once conn's transaction commits."""
+    if not account_id:
+        return
+    _check_domains(domains)
+    pending = conn.info.setdefault(_PENDING, set())
+    pending.update((account_id, d) for d in domains)
+
+
+def bump(account_id, *domains):
+    """Bump immediately — for writes that have already committed."""
+    if not account_id:
+        return
+    _check_domains(domains)
+    _apply({(account_id, d) for d in domains})
+
+
+def _apply(pending, defer_db=False):
+    by_account = {}
+    for account_id, domain in pending:
+        by_account.setdefault(account_id, set()).add(domain)
+
+    try:
+        from app.extensions import get_redis
+        pipe = get_redis().pipeline(transaction=False)
+        seed = _seed()
+        for account_id, domains in by_account.items():
+            key = _REDIS_KEY.format(account_id)
+            for domain in domains:
+                pipe.hsetnx(key, domain, seed)
+                pipe.hincrby(key, domain, 1)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Redis data-version bump failed, using DB fallback: {e}")
+        if defer_db:
+            _defer_db(by_account)
+        else:
+            _apply_db(by_account)
+
+    _forget_request_versions(by_account)
+
+
+def _apply_db(by_account):
+    ensure_data_versions_table()
+    try:
+        with DB_ENGINE.begin() as conn:
+            for account_id, domains in by_account.items():
+                for domain in domains:
+                    conn.execute(text("""
+                        INSERT INTO account_data_versions (account_id, domain, version)
+                        VALUES (:aid, :domain, 1)
+                        ON CONFLICT (account_id, domain)
+                        DO UPDATE SET version = account_data_versions.version + 1,
+                                      updated_at = NOW()
+                    """), {"aid": account_id, "domain": domain})
+    except Exception as e:
+        logger.error(f"Data-version bump failed for {sorted(by_account)}: {e}")
+
+
+def _defer_db(by_account):
+    """Queue DB-fallback bumps for the flusher thread (started per process)."""
+    global _flusher_pid
+    with _backlog_lock:
+        _backlog.update((account_id, d) for account_id, domains in by_account.items()
+                        for d in domains)
+        if _flusher_pid != os.getpid():
+            _flusher_pid = os.getpid()
+            threading.Thread(target=_flush_backlog, daemon=True,
+                             name="data-version-flush").start()
+    _backlog_wake.set()
+
+
+def _flush_backlog():
+    while True:
+        _backlog_wake.wait()
+        _backlog_wake.clear()
+        with _backlog_lock:
+            pending = set(_backlog)
+            _backlog.clear()
+        by_account = {}
+        for account_id, domain in pending:
+            by_account.setdefault(account_id, set()).add(domain)
+        if by_account:
+            _apply_db(by_account)
+
+
+@event.listens_for(DB_ENGINE, 'rollback')
+def _discard_on_rollback(conn):
+    conn.info.pop(_PENDING, None)
+
+
+@event.listens_for(DB_ENGINE.pool, 'checkin')
+def _apply_on_checkin(dbapi_connection, connection_record):
+    # Checkin happens after the transaction committed (or rolled back, in
+    # which case the rollback hook above already cleared the set).
+    if connection_record is None:
+        return
+    pending = connection_record.info.pop(_PENDING, None)
+    if pending:
+        _apply(pending, defer_db=True)
+
+
+# ─── Read side ────────────────────────────────────────────────
+
+def _request_memo():
+    if not has_app_context():
+        return None
+    memo = g.get('_data_versions')
+    if memo is None:
+        memo = g._data_versions = {}
+    return memo
+
+
+def _forget_request_versions(by_account):
+    memo = _request_memo()
+    if memo is None:
+        return
+    for account_id, domains in by_account.items():
+        for domain in domains:
+            memo.pop((account_id, domain), None)
+
+
+def get_versions(account_id, domains=DOMAINS):
+    """Return {domain: version} for the account (memoized per request)."""
+    _check_domains(domains)
+    memo = _request_memo()
+    versions = {}
+    missing = []
+    for domain in domains:
+        if memo is not None and (account_id, domain) in memo:
+            versions[domain] = memo[(account_id, domain)]
+        else:
+            missing.append(domain)
+
+    if missing:
+        loaded = _load_versions(account_id, missing)
+        versions.update(loaded)
+        if memo is not None:
+            memo.update(((account_id, d), v) for d, v in loaded.items())
+    return versions
+
+
+def _load_versions(account_id, domains):
+    key = _REDIS_KEY.format(account_id)
+    try:
+        from app.extensions import get_redis
+        r = get_redis()
+        values = r.hmget(key, domains)
+        unseeded = [d for d, v in zip(domains, values) if v is None]
+        if unseeded:
+            pipe = r.pipeline(transaction=False)
+            seed = _seed()
+            for domain in unseeded:
+                pipe.hsetnx(key, domain, seed)
+            pipe.hmget(key, domains)
+            values = pipe.execute()[-1]
+        return {d: int(v) for d, v in zip(domains, values)}
+    except Exception as e:
+        logger.warning(f"Redis data-version read failed, using DB fallback: {e}")
+
+    ensure_data_versions_table()
+    try:
+        with DB_ENGINE.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT domain, version FROM account_data_versions
+                WHERE account_id = :aid
+            """), {"aid": account_id}).fetchall()
+        found = {row[0]: int(row[1]) for row in rows}
+    except Exception as e:
+        logger.error(f"Data-version read failed for account {account_id}: {e}")
+        found = {}
+    return {d: found.get(d, 0) for d in domains}
+
+
+def versioned_key(prefix, account_id, domains, *parts):
+    """
+    Cache key that embeds the account's current versions of `domains`.
+    Extra `parts` (filters, page numbers, ...) are appended verbatim.
+    """
+    versions = get_versions(account_id, domains)
+    stamp = '.'.join(f"{d}={versions[d]}" for d in domains)
+    key = f"{prefix}:{account_id}:{stamp}"
+    if parts:
+        key += ':' + ':'.join(str(p) for p in parts)
+    return key
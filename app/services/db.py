@@ -1,17 +1,27 @@
 # app/services/db.py
 import os
 import logging
-from sqlalchemy import create_engine, text
+import threading
+from sqlalchemy import create_engine, text, event
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///users.db')
+
+# Per-process pool.  The gevent profile (gevent_profile.py) sets its own
+# defaults: hundreds of greenlets share one process there, so the pool is
+# the concurrency limit towards Postgres and callers queue on it.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+
 DB_ENGINE = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
     pool_recycle=300,
 )
 
@@ -388,11 +398,36 @@ def fix_reference_id_column():
         logger.warning(f"Column fix issue: {e}")
 
 
-# Run on import
-try:
-    create_all_tables()
-    create_missing_tables()
-    apply_inventory_constraints()
-    fix_reference_id_column()
-except Exception as e:
-    logger.error(f"Initial database setup failed: {e}", exc_info=True)
+# Schema bootstrap — used to run on import, so every worker boot and every
+# `flask` CLI command paid a dozen DDL round trips before doing anything.
+# It now runs once per process on the first real connection (gunicorn's
+# master runs it before fork via app/lifecycle.py, so workers inherit
+# _schema_ready=True and skip it).  SCHEMA_BOOTSTRAP=false disables it
+# entirely when migrations are applied out of band.
+SCHEMA_BOOTSTRAP = os.getenv('SCHEMA_BOOTSTRAP', 'true').lower() == 'true'
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def ensure_schema():
+    global _schema_ready
+    if _schema_ready or not SCHEMA_BOOTSTRAP:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        # Set first: the bootstrap's own connections must not re-enter it
+        _schema_ready = True
+        try:
+            create_all_tables()
+            create_missing_tables()
+            apply_inventory_constraints()
+            fix_reference_id_column()
+        except Exception as e:
+            logger.error(f"Initial database setup failed: {e}", exc_info=True)
+
+
+@event.listens_for(DB_ENGINE, 'engine_connect', once=True)
+def _bootstrap_on_first_connect(conn):
+    ensure_schema()
@@ -6,6 +6,7 @@ from sqlalchemy import text
 from datetime import datetime
 import logging
 from app.services.webhooks import fire_webhook
+from app.services.data_versions import mark_changed
 
 logger = logging.getLogger(__name__)
 
@@ -94,8 +95,9 @@ class InventoryManager:
                         'sku': product_data.get('sku'),
                         'category': product_data.get('category'),
                         'current_stock': float(new_stock)   # keep webhook payload as float
-                    })
+                    }, conn=conn)
 
+                    mark_changed(conn, account_id, 'inventory')
                     logger.info(f"Product reactivated: {product_data['name']} (ID: {product_id})")
                     return product_id
 
@@ -154,8 +156,9 @@ class InventoryManager:
                         'sku': product_data.get('sku'),
                         'category': product_data.get('category'),
                         'current_stock': product_data.get('current_stock', 0)
-                    })
+                    }, conn=conn)
 
+                    mark_changed(conn, account_id, 'inventory')
                     logger.info(f"Product added: {product_data['name']} (ID: {product_id})")
                     return product_id
 
@@ -209,13 +212,14 @@ class InventoryManager:
     def update_product(user_id, product_id, product_data):
         try:
             with DB_ENGINE.begin() as conn:
-                conn.execute(text('''
+                account_id = conn.execute(text('''
                     UPDATE inventory_items
                     SET name = :name, sku = :sku, category = :category, description = :description,
                         min_stock_level = :min_stock_level, cost_price = :cost_price,
                         selling_price = :selling_price, supplier = :supplier, location = :location,
                         updated_at = CURRENT_TIMESTAMP
                     WHERE id = :product_id AND user_id = :user_id
+                    RETURNING account_id
                 '''), {
                     "name": product_data['name'],
                     "sku": product_data.get('sku'),
@@ -228,7 +232,8 @@ class InventoryManager:
                     "location": product_data.get('location'),
                     "product_id": product_id,
                     "user_id": user_id
-                })
+                }).scalar()
+                mark_changed(conn, account_id, 'inventory')
 
                 if 'current_stock' in product_data:
                     current = conn.execute(text('''
@@ -321,9 +326,16 @@ class InventoryManager:
                         total = conn.execute(text("""
                             SELECT COALESCE(SUM(quantity), 0) FROM product_locations WHERE product_id = :pid
                         """), {"pid": product_id}).scalar()
-                        conn.execute(text("""
+                        previous = conn.execute(text("""
+                            SELECT current_stock FROM inventory_items WHERE id = :pid FOR UPDATE
+                        """), {"pid": product_id}).scalar()
+                        min_level = conn.execute(text("""
                             UPDATE inventory_items SET current_stock = :total WHERE id = :pid
-                        """), {"total": total, "pid": product_id})
+                            RETURNING min_stock_level
+                        """), {"total": total, "pid": product_id}).scalar()
+                        InventoryManager._fire_stock_low(conn, account_id, product_id,
+                                                         previous, total, min_level)
+                        mark_changed(conn, account_id, 'inventory', 'locations')
                     
                     # Log movement — clean type, location_id stored as column
                     with DB_ENGINE.begin() as conn:
@@ -352,7 +364,7 @@ class InventoryManager:
             with DB_ENGINE.begin() as conn:
                 # Lock row
                 result = conn.execute(text("""
-                    SELECT current_stock FROM inventory_items
+                    SELECT current_stock, min_stock_level FROM inventory_items
                     WHERE id = :pid AND account_id = :aid AND is_active = TRUE
                     FOR UPDATE
                 """), {"pid": product_id, "aid": account_id}).fetchone()
@@ -383,12 +395,33 @@ class InventoryManager:
                     "ref": reference_id,
                     "notes": notes
                 })
+                InventoryManager._fire_stock_low(conn, account_id, product_id,
+                                                 current_stock, new_stock, result[1])
+                mark_changed(conn, account_id, 'inventory')
                 logger.info(f"Global stock updated: {current_stock} → {new_stock} ({movement_type})")
                 return True
         except Exception as e:
             logger.error(f"Global stock update failed: {e}", exc_info=True)
             return False
     
+    @staticmethod
+    def _fire_stock_low(conn, account_id, product_id, previous, stock, min_level):
+        """
+        Queue a stock.low webhook when this update takes stock from above its
+        reorder level to at or below it.  Further sales of an item that is
+        already low do not alert again; it re-arms once stock goes back above.
+        """
+        if min_level is None:
+            return
+        previous = Decimal(str(previous if previous is not None else 0))
+        stock, min_level = Decimal(str(stock)), Decimal(str(min_level))
+        if previous > min_level >= stock:
+            fire_webhook(account_id, 'stock.low', {
+                'product_id': product_id,
+                'current_stock': float(stock),
+                'min_stock_level': float(min_level)
+            }, conn=conn)
+
     @staticmethod
     def delete_product(user_id, account_id, product_id, reason=None):
         try:
@@ -418,6 +451,7 @@ class InventoryManager:
                         "notes": reason or "Product deleted"
                     })
 
+                mark_changed(conn, account_id, 'inventory')
                 logger.info(f"Product {product_name} (ID: {product_id}) soft deleted")
                 return True
         except Exception as e:
@@ -10,22 +10,20 @@ from app.services.inventory import InventoryManager
 from app.services.invoice_logic import prepare_invoice_data
 from app.services.invoice_logic_po import prepare_po_data
 from app.services.account import check_invoice_limit, increment_invoice_count, has_feature
+from app.services.tenant import tenant_for_user
 from sqlalchemy import text
 
 logger = logging.getLogger(__name__)
 
 class InvoiceService:
-    def __init__(self, user_id):
+    def __init__(self, user_id, tenant=None):
         self.user_id = user_id
         self.errors = []
         self.warnings = []
-        # Fetch account_id from users table
-        with DB_ENGINE.connect() as conn:
-            row = conn.execute(
-                text("SELECT account_id FROM users WHERE id = :uid"),
-                {"uid": user_id}
-            ).first()
-            self.account_id = row[0] if row else None
+        # Identity comes from the request's tenant context (cached), not a
+        # fresh SELECT on users per instantiation
+        self.tenant = tenant or tenant_for_user(user_id)
+        self.account_id = self.tenant.account_id
 
     def create_invoice(self, form_data, files=None):
         """
@@ -40,26 +38,20 @@ class InvoiceService:
                 return None, self.errors
             
             # Validate location belongs to account
-            from app.services.location_inventory import LocationInventoryManager
-            locations = LocationInventoryManager.get_account_locations(self.account_id)
-            if not any(str(loc['id']) == str(location_id) for loc in locations):
+            location = self.tenant.location(location_id)
+            if location is None:
                 self.errors.append("Invalid location selected.")
                 return None, self.errors
             
-            location_id = int(location_id)
+            location_id = location['id']
             
             # Prepare invoice data (existing logic)
             invoice_data = prepare_invoice_data(form_data, files=files)
-            # Fetch location name for PDF
-            loc_name = next(
-                (l['location_name'] for l in locations if l['id'] == location_id),
-                'Main Warehouse'
-            )
-            invoice_data['location_name'] = loc_name
+            # Location name for PDF
+            invoice_data['location_name'] = location['location_name'] or 'Main Warehouse'
 
             # Fetch FBR fields from user profile for PDF
-            from app.services.auth import get_user_profile
-            _profile = get_user_profile(self.user_id)
+            _profile = self.tenant.profile
             invoice_data['show_fbr_fields'] = _profile.get('show_fbr_fields', False)
             invoice_data['seller_ntn']      = _profile.get('seller_ntn', '')
             invoice_data['seller_strn']     = _profile.get('seller_strn', '')
@@ -153,11 +145,8 @@ class InvoiceService:
             
             # Check if plan allows purchase orders
             if self.account_id:
-                from app.services.account import has_feature, get_account
-                
                 # Stronger check - also directly verify Pro plan
-                account = get_account(self.account_id)
-                if account and account.get('subscription_plan') == 'pro':
+                if self.tenant.plan == 'pro':
                     pass  # Pro always allowed
                 elif not has_feature(self.account_id, 'purchase_orders'):
                     self.errors.append("Your plan does not include purchase orders. Upgrade to Growth or Pro.")
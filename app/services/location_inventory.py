@@ -2,6 +2,9 @@ from decimal import Decimal
 from sqlalchemy import text
 from app.services.db import DB_ENGINE
 from app.services.inventory import InventoryManager
+from app.services.cache import invalidate_locations_cache
+from app.services.data_versions import mark_changed
+from app.services.single_flight import single_flight
 import logging
 from datetime import datetime
 
@@ -31,7 +34,10 @@ class LocationInventoryManager:
                     "manager": location_data.get('manager_name'),
                     "phone": location_data.get('phone')
                 })
-                return result.scalar()
+                location_id = result.scalar()
+                mark_changed(conn, account_id, 'locations')
+            invalidate_locations_cache(account_id)
+            return location_id
         except Exception as e:
             logger.error(f"Error creating location: {e}")
             return None
@@ -90,12 +96,21 @@ class LocationInventoryManager:
                     (user_id, product_id, movement_type, quantity, notes)
                     VALUES (:uid, :pid, 'location_add', :qty, 'Added to location')
                 """), {"uid": user_id, "pid": product_id, "qty": quantity})
-                
+
+                mark_changed(conn, LocationInventoryManager._location_account(conn, location_id),
+                             'inventory', 'locations')
                 return True
         except Exception as e:
             logger.error(f"Error adding product to location: {e}")
             return False
     
+    @staticmethod
+    def _location_account(conn, location_id):
+        """Owning account of a location (for data-version bumps)."""
+        return conn.execute(text(
+            "SELECT account_id FROM locations WHERE id = :lid"
+        ), {"lid": location_id}).scalar()
+
     @staticmethod
     def transfer_between_locations(account_id, product_id, from_location_id, 
                                    to_location_id, quantity, user_id, notes=None):
@@ -149,6 +164,7 @@ class LocationInventoryManager:
                     SET status = 'completed', completed_at = NOW()
                     WHERE id = :tid
                 """), {"tid": transfer_id})
+                mark_changed(conn, account_id, 'inventory', 'locations')
                 
                 logger.info(f"Transfer {transfer_number} completed: {quantity} units")
                 return transfer_number
@@ -198,7 +214,9 @@ class LocationInventoryManager:
                     (user_id, product_id, movement_type, quantity, notes)
                     VALUES (:uid, :pid, 'location_remove', :qty, 'Removed from location')
                 """), {"uid": user_id, "pid": product_id, "qty": -quantity})
-                
+
+                mark_changed(conn, LocationInventoryManager._location_account(conn, location_id),
+                             'inventory', 'locations')
                 return True
         except Exception as e:
             logger.error(f"Error removing from location: {e}")
@@ -235,6 +253,7 @@ class LocationInventoryManager:
             return {'total_stock': 0, 'locations': []}
     
     @staticmethod
+    @single_flight()
     def get_location_stock_value(account_id, location_id=None):
         """Get total inventory value for a location or all locations"""
         try:
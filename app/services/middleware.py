@@ -1,7 +1,13 @@
 # app/services/middleware.py
 
+import os
 from flask import g, request
 import secrets
+from app.services.profiler import init_profiler
+
+# Unhashed static files (robots.txt, sitemap.xml, anything not yet built
+# into static/dist/) may change under the same URL.
+STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', 3600))
 
 def init_middleware(app):  # Renamed from security_headers to fix the ImportError
     """
@@ -93,11 +99,16 @@ def init_middleware(app):  # Renamed from security_headers to fix the ImportErro
     @app.after_request
     def add_cache_headers(response):
         """Add appropriate cache headers"""
-        if request.path.startswith('/static/'):
+        if request.path.startswith('/static/dist/'):
+            # Content-hashed by build_assets.py — the URL changes with the bytes
             response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        elif request.path.startswith('/static/'):
+            response.headers['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE}'
         else:
             response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
             response.headers['Pragma'] = 'no-cache'
             response.headers['Expires'] = '0'
 
         return response
+
+    init_profiler(app)
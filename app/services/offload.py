@@ -0,0 +1,107 @@
+# app/services/offload.py
+"""
+CPU offload for the gevent worker profile.
+
+Under gevent every greenlet of a worker shares one OS thread, so a 2s
+WeasyPrint render or an ABC engine run stalls every other request on that
+worker for 2s.  run_cpu() sends such calls to a small process pool and waits
+cooperatively, so the hub keeps serving I/O-bound requests meanwhile.
+
+    pdf_bytes = run_cpu(_render_pdf, html, base_url)
+
+OFFLOAD_MODE:
+    auto     (default) process pool only when gevent has patched this
+             process; sync/gthread workers run the call inline, where
+             threads (or separate workers) already provide concurrency
+    process  always use the pool
+    inline   never use the pool
+
+The callable and its arguments must be picklable (module-level functions,
+plain data).  Pool processes are started with OFFLOAD_START_METHOD
+('forkserver' by default) so they don't inherit the worker's hub, sockets
+or DB pool.  If the pool is broken the call falls back to running inline.
+A call that exceeds OFFLOAD_TIMEOUT_SECONDS raises TimeoutError instead —
+it may still be running in the pool, so it is not started a second time.
+"""
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+OFFLOAD_MODE = os.getenv('OFFLOAD_MODE', 'auto').lower()
+OFFLOAD_WORKERS = int(os.getenv('OFFLOAD_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+OFFLOAD_TIMEOUT_SECONDS = float(os.getenv('OFFLOAD_TIMEOUT_SECONDS', 120))
+OFFLOAD_START_METHOD = os.getenv('OFFLOAD_START_METHOD', 'forkserver')
+
+_pool = None
+_pool_pid = None
+_lock = threading.Lock()
+
+
+def _gevent_patched():
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+
+def offload_enabled():
+    if OFFLOAD_MODE == 'process':
+        return True
+    if OFFLOAD_MODE == 'inline':
+        return False
+    return _gevent_patched()
+
+
+def _get_pool():
+    # pid check: a pool created in the master must not be used by a worker
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+    with _lock:
+        if _pool is None or _pool_pid != pid:
+            try:
+                context = multiprocessing.get_context(OFFLOAD_START_METHOD)
+            except ValueError:
+                context = multiprocessing.get_context('spawn')
+            _pool = ProcessPoolExecutor(max_workers=OFFLOAD_WORKERS, mp_context=context)
+            _pool_pid = pid
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_cpu(fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) in the offload pool (or inline), return its result."""
+    if not offload_enabled():
+        return fn(*args, **kwargs)
+
+    pool = _get_pool()
+    try:
+        future = pool.submit(fn, *args, **kwargs)
+    except (BrokenProcessPool, RuntimeError) as e:
+        logger.warning(f"Offload pool unavailable for {fn.__qualname__}, running inline: {e}")
+        _discard_pool(pool)
+        return fn(*args, **kwargs)
+
+    try:
+        return future.result(timeout=OFFLOAD_TIMEOUT_SECONDS)
+    except BrokenProcessPool as e:
+        logger.error(f"Offload pool broke during {fn.__qualname__}, running inline: {e}")
+        _discard_pool(pool)
+    except FutureTimeout:
+        future.cancel()
+        raise TimeoutError(f"{fn.__qualname__} exceeded {OFFLOAD_TIMEOUT_SECONDS}s in the offload pool")
+    return fn(*args, **kwargs)
@@ -5,8 +5,7 @@ WeasyPrint PDF generation.
 import io
 import logging
 from pathlib import Path
-from weasyprint import HTML, CSS
-from weasyprint.text.fonts import FontConfiguration
+from app.services.offload import run_cpu
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +16,20 @@ def generate_pdf(html_content: str, base_url: str = None) -> bytes:
     """
     Render html_content to PDF bytes using WeasyPrint.
     Returns a minimal error PDF on failure instead of raising.
+    Under the gevent profile the render runs in the offload process pool.
     """
+    try:
+        return run_cpu(_render_pdf, html_content, base_url)
+    except TimeoutError as e:
+        logger.error(f"PDF generation timed out: {e}")
+        return b""
+
+
+def _render_pdf(html_content: str, base_url: str = None) -> bytes:
+    # WeasyPrint (Pango, cairo, fontTools) is imported on first render, not at boot
+    from weasyprint import HTML, CSS
+    from weasyprint.text.fonts import FontConfiguration
+
     try:
         font_config = FontConfiguration()
 
@@ -62,3 +74,15 @@ def generate_pdf(html_content: str, base_url: str = None) -> bytes:
          
             logger.error(f"PDF fallback also failed: {fallback_error}")
             return b""
+
+
+def warm_up():
+    """
+    Render a one-line document so fontconfig/Pango load their caches.
+    Called before gunicorn forks, so workers share the loaded font data
+    instead of each paying ~1s on its first PDF.
+    """
+    from weasyprint import HTML
+    from weasyprint.text.fonts import FontConfiguration
+    HTML(string="<html><body style='font-family:Arial'>warm-up</body></html>").write_pdf(
+        font_config=FontConfiguration())
@@ -6,11 +6,42 @@ from flask import render_template, request
 from pathlib import Path
 import base64
 import json
+from functools import lru_cache
 from app.services.pdf_engine import generate_pdf
 from app.services.qr_engine import generate_qr_base64
 
 logger = logging.getLogger(__name__)
 
+QR_LOGO_PATH = "static/images/logo.png"
+HEADER_LOGO_PATHS = (
+    "static/images/logo.png",
+    "static/img/logo.png",
+    "static/assets/logo.png",
+    "static/logo.png",
+)
+
+
+@lru_cache(maxsize=1)
+def _qr_logo_path():
+    return QR_LOGO_PATH if Path(QR_LOGO_PATH).exists() else None
+
+
+@lru_cache(maxsize=1)
+def _header_logo_b64():
+    """Base64 of the first header logo found — read once per process."""
+    for path in HEADER_LOGO_PATHS:
+        if Path(path).exists():
+            with open(path, "rb") as f:
+                return base64.b64encode(f.read()).decode('utf-8')
+    return None
+
+
+def warm_up():
+    """Load the logos and render one QR so the first PDF request doesn't pay for it."""
+    _header_logo_b64()
+    generate_qr_base64(data="warm-up", logo_path=_qr_logo_path(),
+                       fill_color="#2c5aa0", back_color="white")
+
 def generate_invoice_pdf(service_data, currency_symbol='Rs.'):
     service_data['currency_symbol'] = currency_symbol # Inject it here
     return _generate_pdf(service_data, template="invoice_pdf.html")
@@ -33,28 +64,16 @@ def _generate_pdf(service_data, template):
         # Generate QR
         doc_number = service_data.get('invoice_number') or service_data.get('po_number', 'INV-001')
         payment_data = f"Payment for {doc_number}"
-        logo_path = "static/images/logo.png"
 
         custom_qr_b64 = generate_qr_base64(
             data=payment_data,
-            logo_path=logo_path if Path(logo_path).exists() else None,
+            logo_path=_qr_logo_path(),
             fill_color="#2c5aa0",
             back_color="white"
         )
 
         # Load logo for header
-        logo_b64 = None
-        possible_paths = [
-            "static/images/logo.png",
-            "static/img/logo.png",
-            "static/assets/logo.png",
-            "static/logo.png"
-        ]
-        for path in possible_paths:
-            if Path(path).exists():
-                with open(path, "rb") as f:
-                    logo_b64 = base64.b64encode(f.read()).decode('utf-8')
-                break
+        logo_b64 = _header_logo_b64()
 
         # Context
         context = {
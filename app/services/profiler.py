@@ -0,0 +1,359 @@
+# app/services/profiler.py
+"""
+Opt-in sampling profiler for slow or selected requests.
+
+Sentry spans say *which* request was slow, not *where* the time went.  When
+PROFILE_ENABLED=true, a sampler thread snapshots the stacks of profiled
+requests every PROFILE_INTERVAL_MS (sys._current_frames — no tracing hooks,
+the request thread itself runs unmodified).  A request is profiled when:
+
+    PROFILE_EVERY_N=N      it is the Nth request of this worker
+    PROFILE_SLOW_MS=ms     it takes longer than ms (every request is sampled
+                           while it runs; the samples are kept only if it
+                           turns out slow)
+    X-GrowEasy-Profile     it carries a signed debug token (see
+                           make_profile_token(); valid PROFILE_TOKEN_TTL s)
+
+Samples are aggregated per endpoint in collapsed-stack format
+("frame;frame;frame count" — input for flamegraph.pl or speedscope) and
+written to PROFILE_DIR/<endpoint>.<pid>.collapsed after each profiled
+request; the admin viewer (/admin/profiles) merges the worker files.
+PROFILE_DIR defaults to instance/profiles in the app tree — never a fixed
+shared /tmp path — and is created with mode 0700; each file is replaced
+through a private mkstemp file.  Lines that do not parse are skipped.
+
+Off (the default) registers no hooks at all, so the cost is zero.
+
+Under the gevent worker (production) requests are greenlets sharing one OS
+thread, so profiles are keyed by greenlet instead of thread.  The sampler
+runs on a real OS thread (gevent's saved originals), which keeps sampling
+while a request greenlet hogs the CPU.  Per sample, a suspended request
+greenlet contributes its saved frame (gr_frame — where it waits on I/O);
+the one currently running contributes the OS thread's frame.
+"""
+import os
+import sys
+import hmac
+import time
+import _thread
+import hashlib
+import logging
+import sysconfig
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+from flask import g, request, current_app
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENABLED = os.getenv('PROFILE_ENABLED', 'false').lower() == 'true'
+PROFILE_EVERY_N = int(os.getenv('PROFILE_EVERY_N', 0))
+PROFILE_SLOW_MS = float(os.getenv('PROFILE_SLOW_MS', 0))
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', 5))
+PROFILE_MAX_DEPTH = int(os.getenv('PROFILE_MAX_DEPTH', 64))
+PROFILE_TOKEN_TTL = int(os.getenv('PROFILE_TOKEN_TTL', 3600))
+PROFILE_HEADER = 'X-GrowEasy-Profile'
+
+_APP_ROOT = str(Path(__file__).resolve().parent.parent.parent) + os.sep
+PROFILE_DIR = os.getenv('PROFILE_DIR') or os.path.join(_APP_ROOT, 'instance', 'profiles')
+_STDLIB = sysconfig.get_paths()['stdlib'] + os.sep
+
+
+# ─── Debug tokens ─────────────────────────────────────────────
+
+def _token_key():
+    secret = os.getenv('PROFILE_SECRET') or current_app.config['SECRET_KEY']
+    return secret.encode() if isinstance(secret, str) else secret
+
+
+def make_profile_token(issued_at=None):
+    """Header value that makes a request profiled for PROFILE_TOKEN_TTL seconds."""
+    ts = str(int(issued_at if issued_at is not None else time.time()))
+    sig = hmac.new(_token_key(), f"profile:{ts}".encode(), hashlib.sha256).hexdigest()
+    return f"{ts}.{sig}"
+
+
+def _valid_token(token):
+    try:
+        ts, sig = token.split('.', 1)
+        age = time.time() - int(ts)
+    except ValueError:
+        return False
+    if not 0 <= age <= PROFILE_TOKEN_TTL:
+        return False
+    expected = hmac.new(_token_key(), f"profile:{ts}".encode(), hashlib.sha256).hexdigest()
+    # bytes: compare_digest raises TypeError on non-ASCII str
+    return hmac.compare_digest(sig.encode('utf-8', 'surrogateescape'), expected.encode())
+
+
+# ─── Sampling ─────────────────────────────────────────────────
+
+def _frame_label(code):
+    filename = code.co_filename
+    if filename.startswith(_APP_ROOT):
+        filename = filename[len(_APP_ROOT):]
+    elif 'site-packages' + os.sep in filename:
+        filename = filename.split('site-packages' + os.sep, 1)[1]
+    elif filename.startswith(_STDLIB):
+        filename = filename[len(_STDLIB):]
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{filename}:{name}".replace(';', ':')
+
+
+def _collapse(frame):
+    labels = []
+    while frame is not None and len(labels) < PROFILE_MAX_DEPTH:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+def _gevent_patched():
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+
+def _native_threading():
+    """(get_ident, start_new_thread, allocate_lock, sleep) of real OS threads, even under gevent."""
+    if _gevent_patched():
+        from gevent import monkey
+        return tuple(monkey.get_original(module, name) for module, name in (
+            ('_thread', 'get_ident'), ('_thread', 'start_new_thread'),
+            ('_thread', 'allocate_lock'), ('time', 'sleep')))
+    return _thread.get_ident, _thread.start_new_thread, _thread.allocate_lock, time.sleep
+
+
+class _RequestProfile:
+    __slots__ = ('endpoint', 'reason', 'started', 'samples', 'thread', 'greenlet')
+
+    def __init__(self, endpoint, reason, thread, greenlet=None):
+        self.endpoint = endpoint
+        self.reason = reason
+        self.started = time.perf_counter()
+        self.samples = Counter()
+        self.thread = thread            # OS thread ident
+        self.greenlet = greenlet        # under gevent: the request's greenlet
+
+    def frame(self, frames):
+        """Current top frame of this request, given sys._current_frames()."""
+        if self.greenlet is not None:
+            frame = self.greenlet.gr_frame      # None while it is the one running
+            if frame is not None or self.greenlet.dead:
+                return frame
+        return frames.get(self.thread)
+
+
+class SamplingProfiler:
+    """One per process; samples every registered request thread or greenlet."""
+
+    def __init__(self, interval=PROFILE_INTERVAL_MS / 1000.0, directory=PROFILE_DIR):
+        self.interval = interval
+        self.directory = Path(directory)
+        self._active = {}               # thread ident / id(greenlet) -> _RequestProfile
+        self._totals = {}               # endpoint -> Counter (this process)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._requests = 0
+        self._green = False             # set per process by _ensure_started()
+        self._get_ident = _thread.get_ident
+        self._sleep = time.sleep
+
+    # ── request lifecycle ──
+
+    def should_profile(self):
+        """Reason this request is profiled, or None."""
+        self._ensure_started()
+        token = request.headers.get(PROFILE_HEADER)
+        if token and _valid_token(token):
+            return 'header'
+        if PROFILE_EVERY_N:
+            with self._lock:
+                self._requests += 1
+                if self._requests % PROFILE_EVERY_N == 0:
+                    return 'every_n'
+        if PROFILE_SLOW_MS:
+            return 'slow'
+        return None
+
+    def _key(self):
+        if self._green:
+            from greenlet import getcurrent
+            return id(getcurrent())
+        return self._get_ident()
+
+    def start(self, endpoint, reason):
+        self._ensure_started()
+        greenlet = None
+        if self._green:
+            from greenlet import getcurrent
+            greenlet = getcurrent()
+        profile = _RequestProfile(endpoint, reason, self._get_ident(), greenlet)
+        with self._lock:
+            self._active[self._key()] = profile
+
+    def stop(self):
+        with self._lock:
+            profile = self._active.pop(self._key(), None)
+        if profile is None or not profile.samples:
+            return None
+        elapsed_ms = (time.perf_counter() - profile.started) * 1000
+        if profile.reason == 'slow' and elapsed_ms < PROFILE_SLOW_MS:
+            return None
+        self._record(profile, elapsed_ms)
+        return profile
+
+    # ── sampler thread ──
+
+    def _ensure_started(self):
+        # pid check: a sampler started before a --preload fork is not running here.
+        # The gevent worker patches threading after fork, so the mode is picked
+        # here, not at import.
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            get_ident, start_thread, allocate_lock, sleep = _native_threading()
+            self._green = _gevent_patched()
+            self._get_ident, self._sleep = get_ident, sleep
+            self._active = {}
+            self._totals = {}
+            self._lock = allocate_lock()    # native: also taken by the OS sampler thread
+            self._pid = pid
+        start_thread(self._run, ())
+        logger.info(f"Request profiler sampling {'greenlets' if self._green else 'threads'} (pid {pid})")
+
+    def _run(self):
+        while True:
+            self._sleep(self.interval)
+            try:
+                self._sample()
+            except Exception:
+                # keep sampling: a dead sampler thread would silently end profiling
+                logger.exception("Profiler sample failed")
+
+    def _sample(self):
+        with self._lock:
+            active = list(self._active.items())
+        if not active:
+            return
+        frames = sys._current_frames()
+        stacks = []
+        for ident, profile in active:
+            frame = profile.frame(frames)
+            if frame is not None:
+                stacks.append((ident, profile, _collapse(frame)))
+        del frames
+        with self._lock:
+            # stop() pops under the same lock, so a finished profile
+            # never gains samples while it is being recorded
+            for ident, profile, stack in stacks:
+                if self._active.get(ident) is profile:
+                    profile.samples[stack] += 1
+
+    # ── aggregation ──
+
+    def _record(self, profile, elapsed_ms):
+        with self._lock:
+            totals = self._totals.setdefault(profile.endpoint, Counter())
+            totals.update(profile.samples)
+            snapshot = dict(totals)
+        logger.info(f"Profiled {profile.endpoint} ({profile.reason}): "
+                    f"{elapsed_ms:.0f} ms, {sum(profile.samples.values())} samples")
+        try:
+            self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            path = self.directory / f"{_safe_name(profile.endpoint)}.{os.getpid()}.collapsed"
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(''.join(f"{stack} {count}\n" for stack, count in snapshot.items()))
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError as e:
+            logger.warning(f"Profile write failed for {profile.endpoint}: {e}")
+
+
+def _safe_name(endpoint):
+    return ''.join(c if c.isalnum() or c in '._-' else '_' for c in endpoint)
+
+
+def _read_collapsed(path):
+    """(stack, count) pairs of one worker file; lines that do not parse are skipped."""
+    try:
+        lines = path.read_text(errors='replace').splitlines()
+    except OSError as e:
+        logger.warning(f"Profile read failed for {path}: {e}")
+        return
+    for line in lines:
+        stack, _, count = line.rpartition(' ')
+        if stack and count.isdigit():
+            yield stack, int(count)
+
+
+# ─── Reading (admin viewer) ───────────────────────────────────
+
+def list_profiles(directory=PROFILE_DIR):
+    """[{'endpoint', 'samples', 'workers', 'updated'}] newest first."""
+    found = {}
+    for path in Path(directory).glob('*.collapsed'):
+        endpoint = path.name.rsplit('.', 2)[0]
+        entry = found.setdefault(endpoint, {'endpoint': endpoint, 'samples': 0,
+                                            'workers': 0, 'updated': 0})
+        entry['workers'] += 1
+        entry['updated'] = max(entry['updated'], path.stat().st_mtime)
+        entry['samples'] += sum(count for _, count in _read_collapsed(path))
+    return sorted(found.values(), key=lambda e: e['updated'], reverse=True)
+
+
+def load_collapsed(endpoint, directory=PROFILE_DIR):
+    """Merged Counter of collapsed stacks for one endpoint across workers."""
+    merged = Counter()
+    for path in Path(directory).glob(f"{_safe_name(endpoint)}.*.collapsed"):
+        if path.name.rsplit('.', 2)[0] != _safe_name(endpoint):
+            continue
+        for stack, count in _read_collapsed(path):
+            merged[stack] += count
+    return merged
+
+
+def hottest_frames(collapsed, limit=30):
+    """[(frame, self_samples, total_samples)] by self time."""
+    self_counts, total_counts = Counter(), Counter()
+    for stack, count in collapsed.items():
+        frames = stack.split(';')
+        self_counts[frames[-1]] += count
+        for frame in set(frames):
+            total_counts[frame] += count
+    return [(frame, n, total_counts[frame]) for frame, n in self_counts.most_common(limit)]
+
+
+# ─── Flask wiring ─────────────────────────────────────────────
+
+profiler = SamplingProfiler()
+
+
+def init_profiler(app):
+    if not PROFILE_ENABLED:
+        return
+
+    @app.before_request
+    def start_profile():
+        reason = profiler.should_profile()
+        if reason:
+            profiler.start(request.endpoint or 'unknown', reason)
+            g._profiling = True
+
+    @app.teardown_request
+    def stop_profile(exc=None):
+        if g.pop('_profiling', False):
+            profiler.stop()
+
+    logger.info(f"Request profiler on: every_n={PROFILE_EVERY_N} slow_ms={PROFILE_SLOW_MS} "
+                f"interval={PROFILE_INTERVAL_MS}ms dir={PROFILE_DIR}")
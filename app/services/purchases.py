@@ -4,6 +4,7 @@ import logging
 from datetime import datetime
 from sqlalchemy import text
 from app.services.db import DB_ENGINE
+from app.services.data_versions import mark_changed
 
 logger = logging.getLogger(__name__)
 
@@ -72,6 +73,8 @@ def save_purchase_order(user_id, account_id, order_data):
                 })
                 logger.info(f"PO {po_number} saved; supplier '{supplier_name}' stats updated")
 
+            mark_changed(conn, account_id, 'purchases')
+
         return True
     except Exception as e:
         logger.error(f"save_purchase_order failed: {e}", exc_info=True)
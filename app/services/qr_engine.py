@@ -1,13 +1,24 @@
 # app/services/qr_engine.py - Final Version (Compatible + Modern)
 
-import qrcode
-from PIL import Image
 from io import BytesIO
 import base64
+from functools import lru_cache
 from pathlib import Path
 
+
+@lru_cache(maxsize=16)
+def _load_logo(logo_path, logo_size):
+    """Logo decoded and resized once per process (warmed before fork)."""
+    from PIL import Image
+    logo = Image.open(logo_path)
+    logo = logo.resize((logo_size, logo_size))
+    logo.load()
+    return logo
+
+
 def generate_qr_base64(data, logo_path=None, fill_color="black", back_color="white"):
     """Modern function: returns base64 string for WeasyPrint"""
+    import qrcode  # imported on first use — keeps qrcode/PIL out of boot
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_H,
@@ -21,9 +32,8 @@ def generate_qr_base64(data, logo_path=None, fill_color="black", back_color="whi
 
     if logo_path and Path(logo_path).exists():
         try:
-            logo = Image.open(logo_path)
             logo_size = int(img.size[0] * 0.2)
-            logo = logo.resize((logo_size, logo_size))
+            logo = _load_logo(str(logo_path), logo_size)
             pos = ((img.size[0] - logo_size) // 2, (img.size[1] - logo_size) // 2)
             img.paste(logo, pos, logo if logo.mode in ('RGBA', 'LA') else None)
         except Exception as e:
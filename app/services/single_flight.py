@@ -0,0 +1,177 @@
+# app/services/single_flight.py
+"""
+Single-flight execution for expensive, read-only computations.
+
+When a shop opens the dashboard on several terminals at once, or someone
+double-clicks a report, identical aggregates used to run N times in
+parallel.  Decorating the service function with @single_flight makes
+identical concurrent calls share one execution and one result:
+
+  1. In-process: the first thread to ask for a key runs it; other threads
+     asking for the same key wait for that result.
+  2. Cluster-wide: the in-process leader also takes a Redis lock
+     (SET NX PX).  If another worker already holds it, we wait for that
+     worker to publish its result under the lock's token, polling every
+     SINGLE_FLIGHT_POLL_SECONDS.
+
+Nothing is cached beyond the flight itself — a waiter only accepts the
+result of the execution that was in progress when it arrived, and the
+published copy expires after SINGLE_FLIGHT_RESULT_TTL seconds.
+
+Fallback: if the leader does not finish within SINGLE_FLIGHT_WAIT_SECONDS,
+raises, or Redis is unavailable, the caller simply runs the function
+itself.  Single-flight can only ever save work, never fail a request.
+"""
+import os
+import time
+import uuid
+import pickle
+import logging
+import functools
+import threading
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_WAIT_SECONDS = float(os.getenv('SINGLE_FLIGHT_WAIT_SECONDS', 30))
+SINGLE_FLIGHT_LOCK_SECONDS = float(os.getenv('SINGLE_FLIGHT_LOCK_SECONDS', 60))
+SINGLE_FLIGHT_POLL_SECONDS = float(os.getenv('SINGLE_FLIGHT_POLL_SECONDS', 0.05))
+SINGLE_FLIGHT_RESULT_TTL = int(os.getenv('SINGLE_FLIGHT_RESULT_TTL', 30))
+SINGLE_FLIGHT_DISTRIBUTED = os.getenv('SINGLE_FLIGHT_DISTRIBUTED', 'true').lower() == 'true'
+
+_LOCK_KEY = 'groweasy:sf:lock:{}'
+_RESULT_KEY = 'groweasy:sf:result:{}:{}'
+
+# Delete the lock only if we still own it (it may have expired and been
+# re-taken by another worker).
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+_inflight = {}
+_lock = threading.Lock()
+_counters = {'leader': 0, 'shared_local': 0, 'shared_remote': 0, 'fallback': 0}
+
+
+class _Flight:
+    __slots__ = ('event', 'value', 'ok')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.ok = False
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+
+
+def single_flight_stats():
+    with _lock:
+        return {**_counters, 'inflight': len(_inflight)}
+
+
+def run_single_flight(key, fn, wait=SINGLE_FLIGHT_WAIT_SECONDS):
+    """Run fn() once for all concurrent callers that use the same key."""
+    with _lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+
+    if not leader:
+        if flight.event.wait(wait) and flight.ok:
+            _count('shared_local')
+            return flight.value
+        _count('fallback')
+        return fn()
+
+    try:
+        value = _run_cluster_wide(key, fn, wait)
+        flight.value, flight.ok = value, True
+        return value
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        flight.event.set()
+
+
+def _run_cluster_wide(key, fn, wait):
+    if not SINGLE_FLIGHT_DISTRIBUTED:
+        _count('leader')
+        return fn()
+
+    try:
+        from app.extensions import get_redis, get_redis_binary
+        r = get_redis()
+        rb = get_redis_binary()     # results are pickles, not UTF-8
+        token = uuid.uuid4().hex
+        lock_key = _LOCK_KEY.format(key)
+        acquired = r.set(lock_key, token, nx=True, px=int(SINGLE_FLIGHT_LOCK_SECONDS * 1000))
+    except Exception as e:
+        logger.warning(f"Single-flight lock unavailable for {key}: {e}")
+        _count('fallback')
+        return fn()
+
+    if acquired:
+        _count('leader')
+        try:
+            value = fn()
+            try:
+                rb.set(_RESULT_KEY.format(key, token), pickle.dumps(value),
+                      ex=SINGLE_FLIGHT_RESULT_TTL)
+            except Exception as e:
+                logger.warning(f"Single-flight result publish failed for {key}: {e}")
+            return value
+        finally:
+            try:
+                r.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+            except Exception as e:
+                logger.warning(f"Single-flight lock release failed for {key}: {e}")
+
+    # Another worker is computing it — wait for that flight's result
+    try:
+        owner = r.get(lock_key)
+        result_key = _RESULT_KEY.format(key, owner)
+        deadline = time.monotonic() + wait
+        while owner is not None and time.monotonic() < deadline:
+            raw = rb.get(result_key)
+            if raw is not None:
+                _count('shared_remote')
+                return pickle.loads(raw)
+            if r.get(lock_key) != owner:
+                # Released (or expired) without publishing — the leader failed
+                raw = rb.get(result_key)
+                if raw is not None:
+                    _count('shared_remote')
+                    return pickle.loads(raw)
+                break
+            time.sleep(SINGLE_FLIGHT_POLL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Single-flight wait failed for {key}: {e}")
+
+    _count('fallback')
+    return fn()
+
+
+def single_flight(prefix=None, wait=SINGLE_FLIGHT_WAIT_SECONDS):
+    """
+    Decorator: concurrent calls with equal arguments share one execution.
+
+    The key is prefix (default: module.qualname) plus repr() of the
+    arguments, so only use it on functions whose arguments have a stable
+    repr (ids, dates, flags) and whose result is picklable.
+    """
+    def decorator(fn):
+        name = prefix or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = f"{name}:{args!r}:{sorted(kwargs.items())!r}"
+            return run_single_flight(key, lambda: fn(*args, **kwargs), wait=wait)
+
+        return wrapper
+    return decorator
@@ -16,6 +16,7 @@ import logging
 from datetime import datetime
 from sqlalchemy import text
 from app.services.db import DB_ENGINE
+from app.services.data_versions import mark_changed
 
 logger = logging.getLogger(__name__)
 
@@ -138,6 +139,7 @@ class SupplierManager:
                 if row is None:
                     logger.info(f"Supplier '{data.get('name')}' already exists for account {account_id}")
                     return None
+                mark_changed(conn, account_id, 'purchases')
                 return True
         except Exception as e:
             logger.error(f"Error adding supplier: {e}", exc_info=True)
@@ -161,6 +163,7 @@ class SupplierManager:
                     "bank_details": data.get('bank_details'),
                     "id": supplier_id, "aid": account_id,
                 })
+                mark_changed(conn, account_id, 'purchases')
                 return result.rowcount > 0
         except Exception as e:
             logger.error(f"Error updating supplier {supplier_id}: {e}")
@@ -173,6 +176,7 @@ class SupplierManager:
                 result = conn.execute(text(
                     "DELETE FROM suppliers WHERE id=:id AND account_id=:aid"
                 ), {"id": supplier_id, "aid": account_id})
+                mark_changed(conn, account_id, 'purchases')
                 return result.rowcount > 0
         except Exception as e:
             logger.error(f"Error deleting supplier {supplier_id}: {e}")
@@ -190,5 +194,6 @@ class SupplierManager:
                         order_count = order_count + 1
                     WHERE id=:id AND account_id=:aid
                 """), {"amount": amount, "id": int(supplier_id), "aid": account_id})
+                mark_changed(conn, account_id, 'purchases')
         except Exception as e:
             logger.error(f"Error updating supplier volume: {e}")
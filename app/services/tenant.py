@@ -0,0 +1,156 @@
+# app/services/tenant.py
+"""
+Request-scoped tenant context.
+
+Identity data used to be re-queried all over the request path:
+InvoiceService.__init__ ran SELECT account_id FROM users on every
+instantiation, every API write handler looked up the account owner with
+its own SELECT, and create_invoice re-fetched every location just to
+validate one location_id.
+
+current_tenant() builds one TenantContext per request (memoized in g).
+Every attribute is loaded lazily on first use and then memoized on the
+object; the loaders go through the shared LayeredCache, so most of them
+never reach the database.  Services accept a tenant instead of re-deriving
+identity themselves.
+"""
+from functools import cached_property
+from flask import g, session, has_request_context
+from app.services.cache import (
+    get_user_identity_cached, get_account_owner_cached, get_account_cached,
+    get_user_profile_cached, get_account_locations_cached,
+)
+
+
+class TenantContext:
+    """Identity, plan and directory data for one account (and user)."""
+
+    def __init__(self, user_id=None, account_id=None, role=None):
+        if user_id is None and account_id is None:
+            raise ValueError("TenantContext needs a user_id or an account_id")
+        self.user_id = user_id
+        self._account_id = account_id
+        self._role = role
+
+    # ─── Identity ─────────────────────────────────────────────
+
+    @cached_property
+    def _identity(self):
+        if self.user_id is None:
+            return {}
+        return get_user_identity_cached(self.user_id) or {}
+
+    @cached_property
+    def account_id(self):
+        if self._account_id is not None:
+            return self._account_id
+        return self._identity.get('account_id')
+
+    @cached_property
+    def role(self):
+        if self._role is not None:
+            return self._role
+        if self.user_id is None:
+            return None
+        return self._identity.get('role')
+
+    @cached_property
+    def owner_user_id(self):
+        if self.account_id is None:
+            return None
+        return get_account_owner_cached(self.account_id)
+
+    @property
+    def acting_user_id(self):
+        """The user writes are attributed to (API keys act as the owner)."""
+        return self.user_id if self.user_id is not None else self.owner_user_id
+
+    # ─── Plan ─────────────────────────────────────────────────
+
+    @cached_property
+    def account(self):
+        if self.account_id is None:
+            return None
+        return get_account_cached(self.account_id)
+
+    @cached_property
+    def plan(self):
+        return self.account.get('subscription_plan') if self.account else None
+
+    @cached_property
+    def plan_limits(self):
+        from app.services.usage_meter import plan_limits
+        if self.account_id is None:
+            return None
+        return plan_limits(self.account_id)
+
+    # ─── Profile / currency ───────────────────────────────────
+
+    @cached_property
+    def profile(self):
+        user_id = self.acting_user_id
+        if user_id is None:
+            return {}
+        return get_user_profile_cached(user_id) or {}
+
+    @cached_property
+    def currency(self):
+        return self.profile.get('preferred_currency') or 'PKR'
+
+    @cached_property
+    def currency_symbol(self):
+        from app.context_processors import CURRENCY_SYMBOLS
+        return CURRENCY_SYMBOLS.get(self.currency, 'Rs.')
+
+    # ─── Locations ────────────────────────────────────────────
+
+    @cached_property
+    def locations(self):
+        """Active locations, ordered by name."""
+        if self.account_id is None:
+            return []
+        return get_account_locations_cached(self.account_id)
+
+    @cached_property
+    def _locations_by_id(self):
+        return {loc['id']: loc for loc in self.locations}
+
+    def location(self, location_id):
+        """The active location with this id, or None (ids may arrive as strings)."""
+        try:
+            return self._locations_by_id.get(int(location_id))
+        except (TypeError, ValueError):
+            return None
+
+
+def current_tenant():
+    """
+    The TenantContext for this request: the logged-in session user, or the
+    account authenticated by an API key (g.api_account_id).  None outside a
+    request or when nobody is authenticated.
+    """
+    if not has_request_context():
+        return None
+    tenant = g.get('_tenant')
+    if tenant is not None:
+        return tenant
+
+    api_account_id = g.get('api_account_id')
+    if 'user_id' in session and api_account_id in (None, session.get('account_id')):
+        tenant = TenantContext(user_id=session['user_id'],
+                               account_id=session.get('account_id'),
+                               role=session.get('role'))
+    elif api_account_id:
+        tenant = TenantContext(account_id=api_account_id)
+    else:
+        return None
+    g._tenant = tenant
+    return tenant
+
+
+def tenant_for_user(user_id):
+    """Reuse the request's tenant when it is this user's, else build one."""
+    tenant = current_tenant()
+    if tenant is not None and tenant.user_id is not None and str(tenant.user_id) == str(user_id):
+        return tenant
+    return TenantContext(user_id=user_id)
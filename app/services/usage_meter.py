@@ -0,0 +1,281 @@
+# app/services/usage_meter.py
+"""
+Usage metering for plan limits (invoices per month, inventory items).
+
+The old path ran SELECT * FROM accounts plus a monthly_usage SELECT for every
+limit check, and increment_invoice_count() did UPDATE-then-INSERT, which
+double-inserted when two invoices raced at the start of a month.
+
+Counters now live in Redis, one hash per account and month:
+
+    groweasy:usage:{account_id}:{YYYYMM}          totals the limit checks read
+    groweasy:usage:pending:{account_id}:{YYYYMM}  deltas not yet in monthly_usage
+    groweasy:usage:dirty                          set of "{account_id}:{YYYYMM}"
+
+record() is a single pipelined HINCRBY.  The first touch of a month seeds
+the totals from monthly_usage (guarded by HSETNX so only one worker adds the
+DB value).  A background reconciler per worker, running every
+USAGE_RECONCILE_SECONDS and at exit, SPOPs dirty entries, RENAMEs the
+pending hash away (so a concurrent reconciler can never apply the same delta
+twice) and adds it to monthly_usage with one ON CONFLICT upsert.  If the
+upsert fails the delta is put back.
+
+Plan limits are memoized per process for USAGE_PLAN_CACHE_SECONDS on top of
+the shared account cache, so a limit check is a dict lookup plus (for
+metered plans) one HMGET.  With Redis down, everything falls back to direct
+monthly_usage reads and upserts.
+
+Required migration (run once; ensure_usage_index() is idempotent):
+    -- collapse rows duplicated by the old UPDATE-then-INSERT race
+    DELETE FROM monthly_usage a USING monthly_usage b
+    WHERE a.id > b.id AND a.account_id = b.account_id
+      AND a.year = b.year AND a.month = b.month;
+    CREATE UNIQUE INDEX IF NOT EXISTS uq_monthly_usage_account_month
+        ON monthly_usage (account_id, year, month);
+"""
+import os
+import time
+import uuid
+import atexit
+import logging
+import threading
+from datetime import datetime
+from sqlalchemy import text
+from app.services.db import DB_ENGINE
+
+logger = logging.getLogger(__name__)
+
+USAGE_RECONCILE_SECONDS = float(os.getenv('USAGE_RECONCILE_SECONDS', 30))
+USAGE_RECONCILE_BATCH = int(os.getenv('USAGE_RECONCILE_BATCH', 200))
+USAGE_PLAN_CACHE_SECONDS = float(os.getenv('USAGE_PLAN_CACHE_SECONDS', 60))
+USAGE_KEY_TTL = 40 * 24 * 3600      # a month plus slack for late reconciliation
+
+# metric name -> monthly_usage column
+USAGE_COLUMNS = {'invoices': 'invoice_count', 'inventory': 'inventory_count'}
+
+_TOTAL_KEY = 'groweasy:usage:{}:{}'
+_PENDING_KEY = 'groweasy:usage:pending:{}:{}'
+_DIRTY_SET = 'groweasy:usage:dirty'
+
+_plan_cache = {}            # account_id -> (limits, loaded_at)
+_state_lock = threading.Lock()
+_reconciler_pid = None
+_index_ready = False
+
+
+def _period(now=None):
+    now = now or datetime.now()
+    return now.year, now.month
+
+
+def _ym(year, month):
+    return f"{year}{month:02d}"
+
+
+def ensure_usage_index():
+    global _index_ready
+    if _index_ready:
+        return
+    try:
+        with DB_ENGINE.begin() as conn:
+            conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_monthly_usage_account_month
+                ON monthly_usage (account_id, year, month)
+            """))
+        _index_ready = True
+    except Exception as e:
+        logger.warning(f"monthly_usage unique index missing (see usage_meter docstring): {e}")
+
+
+# ─── Plan limits ──────────────────────────────────────────────
+
+def plan_limits(account_id):
+    """Limits dict for the account's plan, or None if the account doesn't exist."""
+    now = time.monotonic()
+    entry = _plan_cache.get(account_id)
+    if entry and now - entry[1] < USAGE_PLAN_CACHE_SECONDS:
+        return entry[0]
+
+    from app.services.cache import get_account_plan_limits_cached
+    limits = get_account_plan_limits_cached(account_id)
+    if limits is not None:
+        _plan_cache[account_id] = (limits, now)
+    return limits
+
+
+def forget_plan(account_id):
+    """Drop the memoized plan (call after changing accounts.subscription_plan)."""
+    _plan_cache.pop(account_id, None)
+    from app.services.cache import invalidate_account_cache
+    invalidate_account_cache(account_id)
+
+
+# ─── Counters ─────────────────────────────────────────────────
+
+def _db_usage(account_id, year, month):
+    with DB_ENGINE.connect() as conn:
+        row = conn.execute(text("""
+            SELECT invoice_count, inventory_count FROM monthly_usage
+            WHERE account_id = :aid AND year = :year AND month = :month
+        """), {"aid": account_id, "year": year, "month": month}).first()
+    if row:
+        return {'invoices': row[0] or 0, 'inventory': row[1] or 0}
+    return {'invoices': 0, 'inventory': 0}
+
+
+def _seed(r, key, account_id, year, month):
+    """Load this month's DB totals into Redis exactly once."""
+    base = _db_usage(account_id, year, month)
+    if r.hsetnx(key, '_seeded', 1):
+        pipe = r.pipeline(transaction=False)
+        for metric, value in base.items():
+            if value:
+                pipe.hincrby(key, metric, value)
+        pipe.expire(key, USAGE_KEY_TTL)
+        pipe.execute()
+
+
+def current_usage(account_id):
+    """{'invoices': n, 'inventory': n} for the current month."""
+    year, month = _period()
+    try:
+        from app.extensions import get_redis
+        r = get_redis()
+        key = _TOTAL_KEY.format(account_id, _ym(year, month))
+        seeded, invoices, inventory = r.hmget(key, '_seeded', 'invoices', 'inventory')
+        if seeded is None:
+            _seed(r, key, account_id, year, month)
+            seeded, invoices, inventory = r.hmget(key, '_seeded', 'invoices', 'inventory')
+        return {'invoices': max(int(invoices or 0), 0), 'inventory': max(int(inventory or 0), 0)}
+    except Exception as e:
+        logger.warning(f"Usage counter read failed, reading monthly_usage: {e}")
+        return _db_usage(account_id, year, month)
+
+
+def record(account_id, metric, amount=1):
+    """Add amount (may be negative) to this month's metric for the account."""
+    if metric not in USAGE_COLUMNS:
+        raise ValueError(f"Unknown usage metric: {metric}")
+    year, month = _period()
+    ym = _ym(year, month)
+    try:
+        from app.extensions import get_redis
+        r = get_redis()
+        key = _TOTAL_KEY.format(account_id, ym)
+        if not r.hexists(key, '_seeded'):
+            _seed(r, key, account_id, year, month)
+        pending = _PENDING_KEY.format(account_id, ym)
+        pipe = r.pipeline(transaction=False)
+        pipe.hincrby(key, metric, amount)
+        pipe.hincrby(pending, metric, amount)
+        pipe.expire(pending, USAGE_KEY_TTL)
+        pipe.sadd(_DIRTY_SET, f"{account_id}:{ym}")
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Usage counter write failed, writing monthly_usage directly: {e}")
+        _apply_delta(account_id, year, month, {metric: amount})
+        return
+    _ensure_reconciler()
+
+
+# ─── Reconciliation ───────────────────────────────────────────
+
+def _apply_delta(account_id, year, month, deltas):
+    ensure_usage_index()
+    d_inv = int(deltas.get('invoices', 0))
+    d_stock = int(deltas.get('inventory', 0))
+    with DB_ENGINE.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO monthly_usage (account_id, year, month, invoice_count, inventory_count)
+            VALUES (:aid, :year, :month, GREATEST(:d_inv, 0), GREATEST(:d_stock, 0))
+            ON CONFLICT (account_id, year, month) DO UPDATE SET
+                invoice_count   = GREATEST(monthly_usage.invoice_count + :d_inv, 0),
+                inventory_count = GREATEST(monthly_usage.inventory_count + :d_stock, 0)
+        """), {"aid": account_id, "year": year, "month": month,
+               "d_inv": d_inv, "d_stock": d_stock})
+
+
+def reconcile_usage():
+    """Move pending Redis deltas into monthly_usage.  Returns entries applied."""
+    try:
+        from app.extensions import get_redis
+        r = get_redis()
+    except Exception as e:
+        logger.warning(f"Usage reconcile skipped: {e}")
+        return 0
+
+    applied = 0
+    while True:
+        try:
+            members = r.spop(_DIRTY_SET, USAGE_RECONCILE_BATCH)
+        except Exception as e:
+            logger.warning(f"Usage reconcile skipped: {e}")
+            return applied
+        if not members:
+            return applied
+
+        for member in members:
+            if isinstance(member, bytes):
+                member = member.decode()
+            account_id, ym = member.split(':')
+            pending = _PENDING_KEY.format(account_id, ym)
+            claimed = f"{pending}:reconciling:{uuid.uuid4().hex}"
+            try:
+                r.rename(pending, claimed)
+            except Exception:
+                continue            # nothing pending (or another worker took it)
+
+            try:
+                raw = r.hgetall(claimed)
+            except Exception as e:
+                # Leave the claimed hash in place (it keeps the pending TTL)
+                logger.error(f"Usage reconcile could not read {claimed}: {e}")
+                continue
+            deltas = {(k.decode() if isinstance(k, bytes) else k): int(v) for k, v in raw.items()}
+            try:
+                _apply_delta(int(account_id), int(ym[:4]), int(ym[4:]), deltas)
+                applied += 1
+            except Exception as e:
+                logger.error(f"Usage reconcile failed for {member}, re-queueing: {e}")
+                try:
+                    pipe = r.pipeline(transaction=False)
+                    for metric, value in deltas.items():
+                        pipe.hincrby(pending, metric, value)
+                    pipe.expire(pending, USAGE_KEY_TTL)
+                    pipe.sadd(_DIRTY_SET, member)
+                    pipe.execute()
+                except Exception as e2:
+                    logger.error(f"Usage delta for {member} lost: {deltas} ({e2})")
+                    continue
+            try:
+                r.delete(claimed)
+            except Exception:
+                pass
+
+        if len(members) < USAGE_RECONCILE_BATCH:
+            return applied
+
+
+def _reconcile_loop():
+    while True:
+        time.sleep(USAGE_RECONCILE_SECONDS)
+        try:
+            reconcile_usage()
+        except Exception as e:
+            logger.error(f"Usage reconciler error: {e}")
+
+
+def _ensure_reconciler():
+    # pid check so every gunicorn worker gets its own thread after a fork
+    global _reconciler_pid
+    pid = os.getpid()
+    if _reconciler_pid == pid:
+        return
+    with _state_lock:
+        if _reconciler_pid == pid:
+            return
+        first = _reconciler_pid is None
+        _reconciler_pid = pid
+    if first:
+        atexit.register(reconcile_usage)
+    threading.Thread(target=_reconcile_loop, daemon=True, name="usage-reconciler").start()
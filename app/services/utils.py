@@ -10,10 +10,10 @@ to DEBUG level, flooding production logs with internal query details and
 request internals.  Removed entirely; Flask configures logging correctly
 through its own init sequence.
 """
-from PIL import Image
 import io
 import base64
 import logging
+from app.services.offload import run_cpu
 
 logger = logging.getLogger(__name__)
 
@@ -41,28 +41,33 @@ def process_uploaded_logo(logo_file, max_kb=150, max_width=150, max_height=150):
         )
 
     try:
-        img = Image.open(logo_file)
-        logger.debug(f"Logo upload: format={img.format}, size={img.size}, mode={img.mode}")
+        return run_cpu(_compress_logo, logo_file.read(), max_width, max_height)
+    except ValueError:
+        raise  # re-raise our own validation errors untouched
+    except Exception as e:
+        logger.error(f"Logo processing failed: {e}")
+        raise ValueError("Invalid image file. Please use a JPG or PNG under 150KB.")
 
-        # Strip alpha channel — WeasyPrint handles JPEG cleanly
-        if img.mode in ("RGBA", "LA", "P"):
-            img = img.convert("RGB")
 
-        img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+def _compress_logo(data, max_width, max_height):
+    """Decode, flatten, resize and JPEG-encode logo bytes (offloadable)."""
+    from PIL import Image
+    img = Image.open(io.BytesIO(data))
+    logger.debug(f"Logo upload: format={img.format}, size={img.size}, mode={img.mode}")
 
-        buffered = io.BytesIO()
-        img.save(buffered, format="JPEG", quality=85, optimize=True)
+    # Strip alpha channel — WeasyPrint handles JPEG cleanly
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGB")
 
-        final_kb = len(buffered.getvalue()) / 1024
-        logger.debug(f"Logo processed: JPEG {final_kb:.1f}KB")
+    img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
 
-        return base64.b64encode(buffered.getvalue()).decode('utf-8')
+    buffered = io.BytesIO()
+    img.save(buffered, format="JPEG", quality=85, optimize=True)
 
-    except ValueError:
-        raise  # re-raise our own validation errors untouched
-    except Exception as e:
-        logger.error(f"Logo processing failed: {e}")
-        raise ValueError("Invalid image file. Please use a JPG or PNG under 150KB.")
+    final_kb = len(buffered.getvalue()) / 1024
+    logger.debug(f"Logo processed: JPEG {final_kb:.1f}KB")
+
+    return base64.b64encode(buffered.getvalue()).decode('utf-8')
 
 
 # ---------------------------------------------------------------------------
@@ -14,32 +14,133 @@ Fixes applied:
    each webhook in a daemon thread — the invoice response returns immediately
    and deliveries happen in the background.  This matches the pattern already
    used by send_welcome_email_async and send_invite_email_async.
+
+3. DURABILITY: the thread-per-delivery approach lost every in-flight webhook
+   on restart, spawned one thread per webhook per event (hundreds during a
+   burst of stock updates) and opened a fresh TCP/TLS connection for every
+   POST.  fire_webhook now writes one row per matching subscription into
+   webhook_outbox — inside the caller's transaction when a connection is
+   passed, so the event exists if and only if the business change committed.
+   A per-process WebhookDispatcher claims due rows, delivers them on a
+   fixed-size thread pool using one keep-alive requests.Session per host,
+   retries with exponential backoff + jitter, and marks a row 'dead' after
+   WEBHOOK_MAX_ATTEMPTS failures (the dead-letter state, kept for inspection).
+   Active subscriptions are cached per account so firing an event does not
+   SELECT from webhooks every time.  Creating, editing or deleting a webhook
+   evicts the account locally and publishes it on a Redis pub/sub channel
+   so every other worker evicts it too (a worker that re-subscribes drops
+   its whole cache); without Redis the WEBHOOK_SUBSCRIPTION_TTL is the
+   upper bound.
+
+4. VOLUME: bulk CSV import, PO receiving and a busy POS day produced one POST
+   per product or stock change.  New outbox rows now wait
+   WEBHOOK_BATCH_WINDOW_SECONDS; each poll claims the due, unleased rows and
+   sends up to WEBHOOK_BATCH_MAX of them per (webhook, event) as one signed
+   delivery with an array payload:
+       {"event": "stock.low", "batch": true, "count": N, "data": [...]}
+   A single event keeps the original {"event": ..., "data": {...}} shape.
+   For COALESCE_EVENTS, successive payloads for the same product_id within
+   a batch collapse to the latest value; superseded rows end as 'coalesced'.
+   Every body is signed: X-GrowEasy-Signature: sha256=<HMAC of raw body>,
+   keyed with the webhook's own signing_secret (generated on creation or
+   rotation and shown to the owner once).  Webhooks created before the
+   column existed fall back to WEBHOOK_SIGNING_SECRET; with neither, the
+   delivery goes out unsigned rather than signed with an unrelated key.
+
+Required migration (run once; ensure_webhook_outbox_table() is idempotent):
+    CREATE TABLE IF NOT EXISTS webhook_outbox (
+        id              BIGSERIAL PRIMARY KEY,
+        account_id      INTEGER   NOT NULL,
+        webhook_id      INTEGER   NOT NULL,
+        url             TEXT      NOT NULL,
+        event           TEXT      NOT NULL,
+        payload         JSONB     NOT NULL,
+        status          TEXT      NOT NULL DEFAULT 'pending',  -- pending | delivered | coalesced | dead
+        attempts        INTEGER   NOT NULL DEFAULT 0,
+        next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        leased_until    TIMESTAMP,
+        last_error      TEXT,
+        created_at      TIMESTAMP DEFAULT NOW(),
+        delivered_at    TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_webhook_outbox_due
+        ON webhook_outbox (next_attempt_at) WHERE status = 'pending';
+    ALTER TABLE webhook_outbox ADD COLUMN IF NOT EXISTS leased_until TIMESTAMP;
+    ALTER TABLE webhooks ADD COLUMN IF NOT EXISTS signing_secret TEXT;
 """
-import threading
+import os
+import hmac
+import json
+import time
+import random
+import hashlib
+import secrets
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 from sqlalchemy import text
 from app.services.db import DB_ENGINE
 import requests
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
+WEBHOOK_WORKERS = int(os.getenv('WEBHOOK_WORKERS', 4))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv('WEBHOOK_MAX_ATTEMPTS', 8))
+WEBHOOK_BACKOFF_BASE = float(os.getenv('WEBHOOK_BACKOFF_BASE', 5.0))     # seconds
+WEBHOOK_BACKOFF_MAX = float(os.getenv('WEBHOOK_BACKOFF_MAX', 3600.0))    # seconds
+WEBHOOK_POLL_SECONDS = float(os.getenv('WEBHOOK_POLL_SECONDS', 2.0))
+WEBHOOK_LEASE_SECONDS = int(os.getenv('WEBHOOK_LEASE_SECONDS', 60))
+WEBHOOK_SUBSCRIPTION_TTL = int(os.getenv('WEBHOOK_SUBSCRIPTION_TTL', 30))
+WEBHOOK_BATCH_WINDOW_SECONDS = float(os.getenv('WEBHOOK_BATCH_WINDOW_SECONDS', 5.0))
+WEBHOOK_BATCH_MAX = int(os.getenv('WEBHOOK_BATCH_MAX', 200))
+WEBHOOK_SIGNING_SECRET = os.getenv('WEBHOOK_SIGNING_SECRET')   # only for webhooks without their own secret
+WEBHOOK_TIMEOUT = 10
+SUBSCRIPTION_CHANNEL = 'groweasy:webhooks:invalidated'
 
-def create_webhook(account_id: int, url: str, events: list) -> int:
-    """Store a new webhook and return its id."""
+# Events whose successive payloads for the same product collapse to the latest
+COALESCE_EVENTS = frozenset({'stock.low', 'stock.updated'})
+
+
+# ---------------------------------------------------------------------------
+# Subscription management
+# ---------------------------------------------------------------------------
+
+def create_webhook(account_id: int, url: str, events: list) -> tuple:
+    """
+    Store a new webhook with its own signing secret.
+    Returns (webhook_id, signing_secret) — show the secret once, like an API key.
+    """
+    signing_secret = secrets.token_hex(32)
     with DB_ENGINE.begin() as conn:
         result = conn.execute(text("""
-            INSERT INTO webhooks (account_id, url, events)
-            VALUES (:aid, :url, :events)
+            INSERT INTO webhooks (account_id, url, events, signing_secret)
+            VALUES (:aid, :url, :events, :secret)
             RETURNING id
-        """), {"aid": account_id, "url": url, "events": events})
-        return result.scalar()
+        """), {"aid": account_id, "url": url, "events": events, "secret": signing_secret})
+        webhook_id = result.scalar()
+    invalidate_subscriptions(account_id)
+    return webhook_id, signing_secret
+
+
+def rotate_webhook_secret(account_id: int, webhook_id: int):
+    """Replace a webhook's signing secret; returns the new one, or None if not found."""
+    signing_secret = secrets.token_hex(32)
+    with DB_ENGINE.begin() as conn:
+        result = conn.execute(text("""
+            UPDATE webhooks SET signing_secret = :secret
+            WHERE id = :id AND account_id = :aid AND is_active = TRUE
+        """), {"id": webhook_id, "aid": account_id, "secret": signing_secret})
+    return signing_secret if result.rowcount else None
 
 
 def get_webhooks(account_id: int) -> list:
     """List all active webhooks for an account."""
     with DB_ENGINE.connect() as conn:
         rows = conn.execute(text("""
-            SELECT id, url, events, is_active, created_at
+            SELECT id, url, events, is_active, created_at,
+                   signing_secret IS NOT NULL AS has_secret
             FROM webhooks
             WHERE account_id = :aid AND is_active = TRUE
             ORDER BY created_at DESC
@@ -62,6 +163,7 @@ def update_webhook(account_id: int, webhook_id: int, url: str, events: list) ->
             SET url = :url, events = :events
             WHERE id = :id AND account_id = :aid
         """), {"id": webhook_id, "aid": account_id, "url": url, "events": events})
+    invalidate_subscriptions(account_id)
 
 
 def delete_webhook(account_id: int, webhook_id: int) -> None:
@@ -71,58 +173,441 @@ def delete_webhook(account_id: int, webhook_id: int) -> None:
             UPDATE webhooks SET is_active = FALSE
             WHERE id = :id AND account_id = :aid
         """), {"id": webhook_id, "aid": account_id})
+    invalidate_subscriptions(account_id)
+
 
+# account_id -> (loaded_at_monotonic, [(webhook_id, url, events), ...])
+_subscription_cache: dict = {}
+# account_id -> invalidation count; a load that raced an invalidation is not cached
+_subscription_gen: dict = {}
+# bumped when the whole cache is dropped (the listener re-subscribed)
+_subscription_epoch = 0
 
-def _deliver_webhook(webhook_id: int, url: str, event: str, payload: dict) -> None:
+
+def get_active_subscriptions(account_id: int, conn=None) -> list:
     """
-    Internal: send a single webhook POST request.
-    Always runs in a background thread — never call directly from request handlers.
+    Active (webhook_id, url, events) for an account, cached for
+    WEBHOOK_SUBSCRIPTION_TTL.  A cache miss reads through `conn` when given,
+    so a caller inside a transaction does not check out a second connection.
     """
+    entry = _subscription_cache.get(account_id)
+    if entry and time.monotonic() - entry[0] < WEBHOOK_SUBSCRIPTION_TTL:
+        return entry[1]
+
+    gen = (_subscription_epoch, _subscription_gen.get(account_id, 0))
+    query = text("""
+        SELECT id, url, events FROM webhooks
+        WHERE account_id = :aid AND is_active = TRUE
+    """)
+    if conn is not None:
+        # SAVEPOINT: a failed read must not abort the caller's transaction
+        with conn.begin_nested():
+            rows = conn.execute(query, {"aid": account_id}).fetchall()
+    else:
+        with DB_ENGINE.connect() as own_conn:
+            rows = own_conn.execute(query, {"aid": account_id}).fetchall()
+    subs = [(r[0], r[1], frozenset(r[2] or ())) for r in rows]
+    if (_subscription_epoch, _subscription_gen.get(account_id, 0)) == gen:
+        _subscription_cache[account_id] = (time.monotonic(), subs)
+    return subs
+
+
+def _evict_subscriptions(account_id: int) -> None:
+    _subscription_gen[account_id] = _subscription_gen.get(account_id, 0) + 1
+    _subscription_cache.pop(account_id, None)
+
+
+def _clear_subscriptions() -> None:
+    global _subscription_epoch
+    _subscription_epoch += 1
+    _subscription_cache.clear()
+
+
+def invalidate_subscriptions(account_id: int) -> None:
+    """Evict an account's subscriptions here and in every other worker."""
+    _evict_subscriptions(account_id)
     try:
-        response = requests.post(
-            url,
-            json={"event": event, "data": payload},
-            timeout=10,
-            headers={"Content-Type": "application/json", "X-GrowEasy-Event": event}
-        )
-        response.raise_for_status()
-        logger.info(f"Webhook {webhook_id} delivered: {event} → {url} ({response.status_code})")
-    except requests.exceptions.Timeout:
-        logger.warning(f"Webhook {webhook_id} timed out: {url}")
-    except requests.exceptions.ConnectionError:
-        logger.warning(f"Webhook {webhook_id} connection failed: {url}")
+        from app.extensions import get_redis
+        get_redis().publish(SUBSCRIPTION_CHANNEL, account_id)
     except Exception as e:
-        logger.error(f"Webhook {webhook_id} failed: {e}")
+        # Other workers fall back to WEBHOOK_SUBSCRIPTION_TTL
+        logger.warning(f"Webhook subscription invalidation broadcast failed: {e}")
 
 
-def fire_webhook(account_id: int, event: str, payload: dict) -> None:
-    """
-    Dispatch a webhook event to all matching active webhooks for the account.
+def _subscription_listener() -> None:
+    """Evict accounts invalidated by other workers.  Reconnects on error."""
+    from app.extensions import get_redis
+    while True:
+        try:
+            pubsub = get_redis().pubsub()
+            pubsub.subscribe(SUBSCRIPTION_CHANNEL)
+            for message in pubsub.listen():
+                if message.get('type') == 'subscribe':
+                    # (Re)subscribed: invalidations published while disconnected were missed
+                    _clear_subscriptions()
+                elif message.get('type') == 'message':
+                    _evict_subscriptions(int(message['data']))
+        except Exception as e:
+            logger.warning(f"Webhook subscription listener error, retrying: {e}")
+            time.sleep(5)
+
+
+# ---------------------------------------------------------------------------
+# Outbox
+# ---------------------------------------------------------------------------
+
+def ensure_webhook_outbox_table():
+    """Create webhook_outbox if missing (idempotent)."""
+    try:
+        with DB_ENGINE.begin() as conn:
+            conn.execute(text('''
+                CREATE TABLE IF NOT EXISTS webhook_outbox (
+                    id              BIGSERIAL PRIMARY KEY,
+                    account_id      INTEGER   NOT NULL,
+                    webhook_id      INTEGER   NOT NULL,
+                    url             TEXT      NOT NULL,
+                    event           TEXT      NOT NULL,
+                    payload         JSONB     NOT NULL,
+                    status          TEXT      NOT NULL DEFAULT 'pending',
+                    attempts        INTEGER   NOT NULL DEFAULT 0,
+                    next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                    leased_until    TIMESTAMP,
+                    last_error      TEXT,
+                    created_at      TIMESTAMP DEFAULT NOW(),
+                    delivered_at    TIMESTAMP
+                );
+            '''))
+            conn.execute(text('''
+                CREATE INDEX IF NOT EXISTS idx_webhook_outbox_due
+                ON webhook_outbox (next_attempt_at) WHERE status = 'pending';
+            '''))
+            conn.execute(text('''
+                ALTER TABLE webhook_outbox ADD COLUMN IF NOT EXISTS leased_until TIMESTAMP;
+            '''))
+            conn.execute(text('''
+                ALTER TABLE webhooks ADD COLUMN IF NOT EXISTS signing_secret TEXT;
+            '''))
+    except Exception as e:
+        logger.debug(f"webhook_outbox migration notice: {e}")
 
-    FIX: Was synchronous — blocked the main request thread for up to
-    5s × number_of_webhooks on every invoice or product save.
-    Now fires each delivery in a daemon thread so the caller returns
-    immediately.  This matches the pattern used by Flask-Mail async sends.
 
-    Thread is daemon=True so it won't prevent process shutdown.
+def fire_webhook(account_id: int, event: str, payload: dict, conn=None) -> None:
+    """
+    Record a webhook event for every matching active subscription.
+
+    Pass the caller's open transaction as `conn` so the outbox rows commit
+    (or roll back) together with the business change.  Without `conn` the
+    rows are written in their own transaction.  Delivery happens later on
+    the dispatcher's worker pool; this function never does network I/O.
     """
     try:
-        with DB_ENGINE.connect() as conn:
-            rows = conn.execute(text("""
-                SELECT id, url FROM webhooks
-                WHERE account_id = :aid
-                  AND is_active = TRUE
-                  AND :event = ANY(events)
-            """), {"aid": account_id, "event": event}).fetchall()
+        targets = [(wid, url) for wid, url, events in get_active_subscriptions(account_id, conn)
+                   if event in events]
     except Exception as e:
         logger.error(f"Failed to fetch webhooks for account {account_id}: {e}")
         return
+    if not targets:
+        return
+
+    rows = [{"aid": account_id, "wid": wid, "url": url, "event": event,
+             "payload": json.dumps(payload, default=str),
+             "window": WEBHOOK_BATCH_WINDOW_SECONDS}
+            for wid, url in targets]
+    insert = text("""
+        INSERT INTO webhook_outbox (account_id, webhook_id, url, event, payload, next_attempt_at)
+        VALUES (:aid, :wid, :url, :event, CAST(:payload AS jsonb),
+                NOW() + INTERVAL '1 second' * :window)
+    """)
+
+    if conn is not None:
+        # SAVEPOINT: a failed outbox insert must not roll back the caller's change
+        try:
+            with conn.begin_nested():
+                conn.execute(insert, rows)
+        except Exception as e:
+            logger.error(f"Failed to queue webhook {event} for account {account_id}: {e}")
+            return
+    else:
+        try:
+            with DB_ENGINE.begin() as own_conn:
+                own_conn.execute(insert, rows)
+        except Exception as e:
+            logger.error(f"Failed to queue webhook {event} for account {account_id}: {e}")
+            return
+
+    dispatcher.wake()
+
+
+# ---------------------------------------------------------------------------
+# Dispatcher
+# ---------------------------------------------------------------------------
+
+class WebhookBatch:
+    """One outbound POST: every claimed row for a (webhook, event) pair."""
+
+    def __init__(self, webhook_id, url, event, signing_secret=None):
+        self.webhook_id = webhook_id
+        self.url = url
+        self.event = event
+        self.signing_secret = signing_secret
+        self.ids = []
+        self.superseded_ids = []
+        self.payloads = []
+        self.attempts = {}              # outbox id -> failed attempts so far (every row)
+        self.latest_by_product = {}
+
+
+def group_into_batches(rows: list) -> list:
+    """
+    Group claimed outbox rows (ordered by id) into one WebhookBatch per
+    (webhook_id, event).  For COALESCE_EVENTS, successive payloads for the
+    same product_id collapse to the latest one; the older rows are kept in
+    superseded_ids so they can be closed out with the batch.
+    """
+    batches: dict = {}
+    for row in rows:
+        key = (row['webhook_id'], row['event'])
+        batch = batches.get(key)
+        if batch is None:
+            batch = batches[key] = WebhookBatch(row['webhook_id'], row['url'], row['event'],
+                                                row.get('signing_secret'))
+        payload = row['payload']
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        batch.attempts[row['id']] = row['attempts']
+
+        product_id = payload.get('product_id') if isinstance(payload, dict) else None
+        if row['event'] in COALESCE_EVENTS and product_id is not None:
+            prev = batch.latest_by_product.get(product_id)
+            if prev is not None:
+                slot = batch.ids.index(prev)
+                batch.superseded_ids.append(prev)
+                batch.ids[slot] = row['id']
+                batch.payloads[slot] = payload
+                batch.latest_by_product[product_id] = row['id']
+                continue
+            batch.latest_by_product[product_id] = row['id']
+
+        batch.ids.append(row['id'])
+        batch.payloads.append(payload)
+    return list(batches.values())
+
+
+def retry_plan(batch) -> list:
+    """
+    [(outbox_id, attempts, dead)] after one more failed delivery of `batch`.
+    Each row counts its own attempts, so a new event coalesced into a row
+    that has failed many times is not dead-lettered with it.
+    """
+    plan = []
+    for outbox_id in batch.ids + batch.superseded_ids:
+        attempts = batch.attempts.get(outbox_id, 0) + 1
+        plan.append((outbox_id, attempts, attempts >= WEBHOOK_MAX_ATTEMPTS))
+    return plan
+
+
+def sign_payload(raw: bytes, signing_secret: str) -> str:
+    """HMAC-SHA256 of the exact request body, sent as X-GrowEasy-Signature."""
+    digest = hmac.new(signing_secret.encode(), raw, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def backoff_delay(attempts: int) -> float:
+    """
+    Exponential backoff with equal jitter: a delay between half the ceiling
+    and the ceiling, which doubles per attempt up to WEBHOOK_BACKOFF_MAX.
+    """
+    ceiling = min(WEBHOOK_BACKOFF_MAX, WEBHOOK_BACKOFF_BASE * (2 ** max(attempts - 1, 0)))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+class WebhookDispatcher:
+    """
+    Claims due outbox rows and delivers them on a fixed-size thread pool.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED and leased for
+    WEBHOOK_LEASE_SECONDS through leased_until, so several workers (or a
+    crash mid-delivery) never double-send beyond the lease.  The lease is
+    separate from next_attempt_at, which stays the retry schedule.
+    """
+
+    def __init__(self, workers=WEBHOOK_WORKERS):
+        self.workers = workers
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pool = None
+        self._sessions: dict = {}
+
+    def wake(self):
+        self.ensure_started()
+        self._wake.set()
+
+    def ensure_started(self):
+        # pid check: a dispatcher imported before a --preload fork must start
+        # its own threads (and sessions) in each worker.
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._sessions = {}
+            self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix="webhook")
+        ensure_webhook_outbox_table()
+        threading.Thread(target=self._run, daemon=True, name="webhook-dispatcher").start()
+        threading.Thread(target=_subscription_listener, daemon=True,
+                         name="webhook-subscriptions").start()
+
+    def session_for(self, url: str) -> requests.Session:
+        """One keep-alive session per scheme://host:port."""
+        parts = urlsplit(url)
+        host_key = f"{parts.scheme}://{parts.netloc}"
+        session = self._sessions.get(host_key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host_key)
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+                    session.mount(host_key, adapter)
+                    self._sessions[host_key] = session
+        return session
+
+    def _run(self):
+        while True:
+            try:
+                claimed = self._claim_due()
+            except Exception as e:
+                logger.error(f"Webhook outbox poll failed: {e}")
+                claimed = []
+
+            batches = group_into_batches(claimed)
+            futures = [self._pool.submit(self._deliver, batch) for batch in batches]
+            for f in futures:
+                f.result()
+
+            if not claimed:
+                self._wake.wait(WEBHOOK_POLL_SECONDS)
+                self._wake.clear()
+
+    def _claim_due(self):
+        """
+        Lease every due row nobody holds — next_attempt_at has passed and
+        leased_until is unset or expired — up to WEBHOOK_BATCH_MAX per
+        (webhook, event) group.  Coalescing happens within this claimed set;
+        rows still in their batching window or backoff wait for a later poll.
+        """
+        with DB_ENGINE.begin() as conn:
+            rows = conn.execute(text("""
+                WITH candidates AS (
+                    SELECT id, webhook_id, event
+                    FROM webhook_outbox
+                    WHERE status = 'pending'
+                      AND next_attempt_at <= NOW()
+                      AND (leased_until IS NULL OR leased_until <= NOW())
+                    ORDER BY id
+                    LIMIT :scan
+                    FOR UPDATE SKIP LOCKED
+                ),
+                ranked AS (
+                    SELECT id, ROW_NUMBER() OVER (PARTITION BY webhook_id, event ORDER BY id) AS rn
+                    FROM candidates
+                )
+                UPDATE webhook_outbox o
+                SET leased_until = NOW() + INTERVAL '1 second' * :lease
+                FROM ranked
+                WHERE o.id = ranked.id AND ranked.rn <= :batch_max
+                RETURNING o.id, o.webhook_id, o.url, o.event, o.payload, o.attempts,
+                          (SELECT w.signing_secret FROM webhooks w WHERE w.id = o.webhook_id)
+                              AS signing_secret
+            """), {"lease": WEBHOOK_LEASE_SECONDS, "batch_max": WEBHOOK_BATCH_MAX,
+                   "scan": self.workers * WEBHOOK_BATCH_MAX}).fetchall()
+        return [dict(r._mapping) for r in sorted(rows, key=lambda r: r.id)]
+
+    def _deliver(self, batch):
+        url, event = batch.url, batch.event
+        if len(batch.payloads) == 1:
+            body = {"event": event, "data": batch.payloads[0]}
+        else:
+            body = {"event": event, "batch": True,
+                    "count": len(batch.payloads), "data": batch.payloads}
+        raw = json.dumps(body, default=str).encode()
+        headers = {"Content-Type": "application/json",
+                   "X-GrowEasy-Event": event,
+                   "X-GrowEasy-Batch-Size": str(len(batch.payloads))}
+        signing_secret = batch.signing_secret or WEBHOOK_SIGNING_SECRET
+        if signing_secret:
+            headers["X-GrowEasy-Signature"] = sign_payload(raw, signing_secret)
+        else:
+            logger.warning(f"Webhook {batch.webhook_id} has no signing secret; delivering unsigned")
+        try:
+            response = self.session_for(url).post(
+                url,
+                data=raw,
+                timeout=WEBHOOK_TIMEOUT,
+                headers=headers
+            )
+            response.raise_for_status()
+        except Exception as e:
+            self._record_failure(batch, e)
+            return
+        logger.info(f"Webhook {batch.webhook_id} delivered: {event} x{len(batch.payloads)} "
+                    f"→ {url} ({response.status_code})")
+        self._record_success(batch)
+
+    def _record_success(self, batch):
+        try:
+            with DB_ENGINE.begin() as conn:
+                conn.execute(text("""
+                    UPDATE webhook_outbox
+                    SET status = 'delivered', delivered_at = NOW(),
+                        attempts = attempts + 1, last_error = NULL
+                    WHERE id = ANY(:ids)
+                """), {"ids": batch.ids})
+                if batch.superseded_ids:
+                    conn.execute(text("""
+                        UPDATE webhook_outbox
+                        SET status = 'coalesced', delivered_at = NOW()
+                        WHERE id = ANY(:ids)
+                    """), {"ids": batch.superseded_ids})
+        except Exception as e:
+            logger.error(f"Failed to mark webhook outbox rows {batch.ids} delivered: {e}")
+
+    def _record_failure(self, batch, error):
+        plan = retry_plan(batch)
+        dead = [outbox_id for outbox_id, _, is_dead in plan if is_dead]
+        if dead:
+            logger.error(f"Webhook {batch.webhook_id} dead-lettered rows {dead} after "
+                         f"{WEBHOOK_MAX_ATTEMPTS} attempts: {batch.url} ({error})")
+        if len(dead) < len(plan):
+            attempts = max(a for _, a, is_dead in plan if not is_dead)
+            logger.warning(f"Webhook {batch.webhook_id} attempt {attempts} failed: "
+                           f"{batch.url} ({error})")
+        try:
+            with DB_ENGINE.begin() as conn:
+                # Superseded rows stay pending too: the next attempt re-coalesces them
+                conn.execute(text("""
+                    UPDATE webhook_outbox
+                    SET attempts = :attempts,
+                        status = :status,
+                        leased_until = NULL,
+                        last_error = :error,
+                        next_attempt_at = NOW() + INTERVAL '1 second' * :delay
+                    WHERE id = :id
+                """), [{"id": outbox_id, "attempts": attempts,
+                        "status": 'dead' if is_dead else 'pending',
+                        "error": str(error)[:1000], "delay": backoff_delay(attempts)}
+                       for outbox_id, attempts, is_dead in plan])
+        except Exception as e:
+            logger.error(f"Failed to record webhook outbox failure for rows {batch.ids}: {e}")
+
+
+dispatcher = WebhookDispatcher()
+
 
-    for webhook_id, url in rows:
-        t = threading.Thread(
-            target=_deliver_webhook,
-            args=(webhook_id, url, event, payload),
-            daemon=True,
-            name=f"webhook-{webhook_id}-{event}"
-        )
-        t.start()
+def start_webhook_dispatcher():
+    """before_request hook: make sure this worker is draining the outbox."""
+    dispatcher.ensure_started()
@@ -0,0 +1,61 @@
+# app/templating.py
+"""
+Jinja compile caching.
+
+Every worker used to parse and compile base.html, dashboard.html,
+invoice_pdf.html, form.html ... on its first hit of each page, so the first
+users after a deploy or a worker recycle paid ~tens of ms per template.
+
+  - Bytecode cache: compiled templates are written to
+    JINJA_BYTECODE_CACHE_DIR (shared by every worker on the host and kept
+    across restarts).  Jinja checks the source checksum, so an edited
+    template is recompiled, never served stale.  Unset, Jinja picks its own
+    per-user temp directory (mode 0700, refused if another user owns it) —
+    never a fixed shared /tmp path, since Jinja executes whatever bytecode
+    it finds there.  A configured directory is created with mode 0700.
+    Set the variable to an empty string to disable.
+  - warm_templates(): loads every template in app/templates and the
+    blueprint folders (supply_chain) into the environment's in-memory
+    cache.  Run before fork in the gunicorn master (app/lifecycle.py),
+    in post_worker_init when not preloading, and at image build time
+    (build_templates.py) to pre-fill the bytecode cache.
+"""
+import os
+import time
+import logging
+from jinja2 import FileSystemBytecodeCache
+
+logger = logging.getLogger(__name__)
+
+JINJA_BYTECODE_CACHE_DIR = os.getenv('JINJA_BYTECODE_CACHE_DIR')   # None → Jinja's per-user directory
+TEMPLATE_EXTENSIONS = ('html', 'txt', 'xml')
+
+
+def init_template_cache(app):
+    """Attach the bytecode cache.  Must run before app.jinja_env is first used."""
+    if JINJA_BYTECODE_CACHE_DIR == '':
+        return
+    try:
+        if JINJA_BYTECODE_CACHE_DIR is None:
+            cache = FileSystemBytecodeCache()
+        else:
+            os.makedirs(JINJA_BYTECODE_CACHE_DIR, mode=0o700, exist_ok=True)
+            cache = FileSystemBytecodeCache(JINJA_BYTECODE_CACHE_DIR)
+    except (OSError, RuntimeError) as e:
+        logger.warning(f"Jinja bytecode cache disabled ({JINJA_BYTECODE_CACHE_DIR}): {e}")
+        return
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': cache}
+
+
+def warm_templates(app):
+    """Compile (or load from bytecode) every template.  Returns (count, seconds)."""
+    started = time.monotonic()
+    env = app.jinja_env
+    compiled = 0
+    for name in env.list_templates(extensions=TEMPLATE_EXTENSIONS):
+        try:
+            env.get_template(name)
+            compiled += 1
+        except Exception as e:
+            logger.debug(f"Template warm-up skipped {name}: {e}")
+    return compiled, time.monotonic() - started
@@ -0,0 +1,7 @@
+"""
+Standalone performance benchmarks.  Run from the repository root, e.g.
+
+    python -m benchmarks.gevent_profile_bench
+
+Nothing here is imported by the application.
+"""
@@ -0,0 +1,23 @@
+"""
+ABC decision engine benchmark (supply_chain/abc_engine.py).
+
+    python -m benchmarks.abc_engine                         # 1k / 10k / 50k items
+    python -m benchmarks.abc_engine --scenario 10000x1000000 --output run.json
+    python -m benchmarks.abc_engine --baseline baseline.json
+    python -m benchmarks.abc_engine.compare run.json baseline.json
+
+Each scenario (items x sale movements) runs in a fresh interpreter:
+
+    synthetic.py   deterministic tenant generator: heavy-tailed item sizes,
+                   weekly + annual seasonality, trends, intermittent
+                   (slow C-type) items and outlier spikes
+    database.py    loads it into a throwaway database and maps the engine
+                   onto it — Postgres when BENCH_DATABASE_URL is set (own
+                   `abc_bench` schema, the engine's real SQL), otherwise a
+                   temporary SQLite file with SQLite spellings of the
+                   Postgres-only queries
+    __main__.py    times the pipeline stages (load, profile, classify,
+                   evaluate, persist) and records the process peak RSS
+                   after each; results are written as JSON
+    compare.py     flags stages slower than a saved baseline
+"""
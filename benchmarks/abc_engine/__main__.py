@@ -0,0 +1,189 @@
+# benchmarks/abc_engine/__main__.py
+"""
+Time ABCDecisionEngine pipeline stages on synthetic tenants.
+
+    python -m benchmarks.abc_engine [--scenario 1000x200000 ...] [--output FILE]
+                                    [--baseline FILE] [--tolerance 0.25]
+
+Stages mirror a full (force=True) ABCDecisionEngine.run:
+
+    load      active items + daily demand matrix (_load_daily_demand)
+    profile   BatchDemandLearner.compute_profiles
+    classify  ABCClassifier.classify
+    evaluate  _evaluate_items (ROP / EOQ / reasons, vectorized)
+    persist   _persist_classifications + _persist_suggestions
+
+Every scenario runs in its own interpreter so peak RSS (ru_maxrss, recorded
+after each stage) belongs to that scenario alone.  Generation and loading
+are reported as setup, not as engine time.  With --baseline, regressions
+are listed (see compare.py) and the exit status is 1.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import tempfile
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+DEFAULT_SCENARIOS = ('1000x200000', '10000x1000000', '50000x2000000')
+STAGES = ('load', 'profile', 'classify', 'evaluate', 'persist')
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _child(items, movements, seed):
+    import logging
+    logging.disable(logging.WARNING)
+    from benchmarks.abc_engine.synthetic import generate_tenant
+    from benchmarks.abc_engine import database
+    from supply_chain.abc_engine import ItemClassification
+
+    started = time.perf_counter()
+    tenant = generate_tenant(items, movements, seed=seed)
+    database.create_schema()
+    database.load_tenant(tenant)
+    setup = time.perf_counter() - started
+
+    engine = database.BenchEngine()
+    uid    = tenant.user_id
+    stages = {}
+
+    def timed(name, fn):
+        began = time.perf_counter()
+        value = fn()
+        stages[name] = {'seconds': round(time.perf_counter() - began, 4), 'peak_rss_mb': _peak_rss_mb()}
+        return value
+
+    def load():
+        items_ = engine._load_active_items(uid)
+        db_today = engine._db_today()
+        matrix = engine._load_daily_demand(uid, [i.item_id for i in items_],
+                                           since=db_today - timedelta(days=365), until=db_today)
+        return items_, matrix
+
+    loaded, matrix = timed('load', load)
+    today    = datetime.now(timezone.utc)
+    profiles = timed('profile', lambda: engine.learner.compute_profiles(matrix, today))
+    abc_map  = timed('classify', lambda: engine.classifier.classify(loaded, profiles))
+    policies = engine.policy_repo.get_policies(uid)
+    suggestions = timed('evaluate', lambda: engine._evaluate_items(loaded, abc_map, profiles,
+                                                                   policies, set()))
+
+    def persist():
+        engine._persist_classifications([
+            ItemClassification(
+                item_id=i.item_id, user_id=uid, abc_class=abc_map[i.item_id],
+                annual_value=profiles[i.item_id]["avg_daily_demand"] * 365 * i.cost_price,
+                avg_daily_demand=profiles[i.item_id]["avg_daily_demand"],
+                demand_std=profiles[i.item_id]["demand_std"],
+                demand_trend=profiles[i.item_id]["demand_trend"],
+                seasonality_index=profiles[i.item_id]["seasonality_index"],
+                forecast_mape=profiles[i.item_id].get("mape"),
+                model_version=engine.MODEL_VERSION,
+            )
+            for i in loaded
+        ])
+        engine._persist_suggestions(suggestions)
+
+    timed('persist', persist)
+
+    classes = {}
+    for cls in abc_map.values():
+        classes[cls.value] = classes.get(cls.value, 0) + 1
+    print(json.dumps({
+        'scenario':      f"{items}x{movements}",
+        'items':         items,
+        'movements':     tenant.movements,
+        'product_days':  int(matrix.present.sum()),
+        'database':      database.DB_ENGINE.dialect.name,
+        'setup_seconds': round(setup, 2),
+        'stages':        stages,
+        'engine_seconds': round(sum(s['seconds'] for s in stages.values()), 4),
+        'peak_rss_mb':   _peak_rss_mb(),
+        'classes':       classes,
+        'suggestions':   len(suggestions),
+    }))
+
+
+def run_scenario(scenario, seed):
+    items, movements = (int(v) for v in scenario.lower().split('x'))
+    with tempfile.TemporaryDirectory(prefix='abc-bench-') as tmp:
+        env = dict(os.environ)
+        env['DATABASE_URL'] = _database_url(tmp)
+        env['SCHEMA_BOOTSTRAP'] = 'false'
+        env.setdefault('REDIS_URL', 'redis://localhost:6379/0')
+        out = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.abc_engine', '--child', str(items), str(movements),
+             '--seed', str(seed)],
+            cwd=_ROOT, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"scenario {scenario} failed:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _database_url(tmp):
+    # search_path option: the engine's unqualified table names resolve to the bench schema
+    url = os.getenv('BENCH_DATABASE_URL')
+    if not url:
+        return f"sqlite:///{os.path.join(tmp, 'abc_engine_bench.db')}"
+    separator = '&' if '?' in url else '?'
+    return f"{url}{separator}options=-csearch_path%3Dabc_bench"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scenario', action='append', help="ITEMSxMOVEMENTS (repeatable)")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default='abc_engine_bench.json')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--child', nargs=2, type=int, metavar=('ITEMS', 'MOVEMENTS'))
+    args = parser.parse_args()
+
+    from benchmarks.abc_engine.synthetic import SEED
+    seed = args.seed if args.seed is not None else SEED
+    if args.child:
+        _child(args.child[0], args.child[1], seed)
+        return 0
+
+    import numpy
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python':     platform.python_version(),
+        'numpy':      numpy.__version__,
+        'machine':    f"{platform.machine()} x{os.cpu_count()}",
+        'seed':       seed,
+        'results':    [],
+    }
+    print(f"{'scenario':<16} {'db':<10} " + ' '.join(f"{s:>9}" for s in STAGES)
+          + f" {'total':>9} {'rss MB':>8}")
+    for scenario in args.scenario or DEFAULT_SCENARIOS:
+        result = run_scenario(scenario, seed)
+        report['results'].append(result)
+        print(f"{scenario:<16} {result['database']:<10} "
+              + ' '.join(f"{result['stages'][s]['seconds']:>9.3f}" for s in STAGES)
+              + f" {result['engine_seconds']:>9.3f} {result['peak_rss_mb']:>8.0f}")
+
+    with open(args.output, 'w') as fh:
+        json.dump(report, fh, indent=2)
+    print(f"written {args.output}")
+
+    if args.baseline:
+        from benchmarks.abc_engine.compare import compare, load_report, print_regressions
+        regressions = compare(report, load_report(args.baseline), args.tolerance)
+        print_regressions(regressions)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
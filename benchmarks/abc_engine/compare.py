@@ -0,0 +1,75 @@
+# benchmarks/abc_engine/compare.py
+"""
+Flag engine stages that got slower than a saved baseline.
+
+    python -m benchmarks.abc_engine.compare run.json baseline.json [--tolerance 0.25]
+
+Results are matched by scenario and database; a stage regresses when it
+takes more than (1 + tolerance) x its baseline time.  Stages under
+MIN_STAGE_SECONDS in both runs are timer noise and never flagged.  Peak
+RSS is compared the same way.  Exit status 1 when anything regressed.
+"""
+import sys
+import json
+import argparse
+
+MIN_STAGE_SECONDS = 0.05
+MIN_RSS_MB = 50.0
+
+
+def load_report(path: str) -> dict:
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def _by_scenario(report: dict) -> dict:
+    return {(r['scenario'], r['database']): r for r in report.get('results', [])}
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.25) -> list[dict]:
+    """Regressions of `current` against `baseline`, worst (largest ratio) first."""
+    previous = _by_scenario(baseline)
+    regressions = []
+    for key, result in _by_scenario(current).items():
+        base = previous.get(key)
+        if base is None:
+            continue
+        checks = [(stage, 'seconds', timing['seconds'], base['stages'][stage]['seconds'], MIN_STAGE_SECONDS)
+                  for stage, timing in result['stages'].items() if stage in base['stages']]
+        checks.append(('process', 'peak_rss_mb', result['peak_rss_mb'], base['peak_rss_mb'], MIN_RSS_MB))
+        for stage, metric, now, then, floor in checks:
+            if max(now, then) < floor or now <= then * (1 + tolerance):
+                continue
+            regressions.append({
+                'scenario': key[0], 'database': key[1], 'stage': stage, 'metric': metric,
+                'current': now, 'baseline': then,
+                'ratio': round(now / then, 2) if then else float('inf'),
+            })
+    regressions.sort(key=lambda r: r['ratio'], reverse=True)
+    return regressions
+
+
+def print_regressions(regressions: list[dict]) -> None:
+    if not regressions:
+        print("no regressions against baseline")
+        return
+    print(f"{len(regressions)} regression(s) against baseline:")
+    for r in regressions:
+        print(f"  {r['scenario']:<16} {r['database']:<10} {r['stage']:<9} {r['metric']:<12} "
+              f"{r['baseline']:>10} -> {r['current']:<10} x{r['ratio']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('current')
+    parser.add_argument('baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    regressions = compare(load_report(args.current), load_report(args.baseline), args.tolerance)
+    print_regressions(regressions)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+# benchmarks/abc_engine/database.py
+"""
+Throwaway database for the engine benchmark.
+
+Postgres (BENCH_DATABASE_URL set): everything lives in the `abc_bench`
+schema, which is dropped and recreated per scenario — point it at a local
+scratch database anyway.  The engine runs its real SQL there.
+
+SQLite (default): a temporary file.  BenchEngine swaps in SQLite spellings
+of the engine's Postgres-only statements (date_trunc / ANY / unnest), with
+the same result shapes, so the non-SQL stages are identical and the SQL
+stages are indicative only.
+
+Import this module only after DATABASE_URL points at the bench database
+(__main__._database_url): the engine binds app.services.db.DB_ENGINE at
+import time.
+"""
+import io
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import text
+
+from app.services.db import DB_ENGINE
+from supply_chain.abc_engine import DemandMatrix, ABCDecisionEngine, PERSIST_BATCH_ROWS, _batches
+
+BENCH_SCHEMA = 'abc_bench'        # also in __main__._database_url
+IS_POSTGRES = DB_ENGINE.dialect.name == 'postgresql'
+
+_TABLES = """
+    CREATE TABLE inventory_items (
+        id            INTEGER PRIMARY KEY,
+        user_id       INTEGER NOT NULL,
+        sku           TEXT,
+        name          TEXT,
+        cost_price    NUMERIC,
+        current_stock NUMERIC,
+        is_active     BOOLEAN DEFAULT TRUE
+    );
+    CREATE TABLE scm_inventory_items (
+        id                INTEGER PRIMARY KEY,
+        user_id           INTEGER NOT NULL,
+        inventory_item_id INTEGER,
+        ordering_cost     NUMERIC,
+        holding_cost_pct  NUMERIC
+    );
+    CREATE TABLE stock_movements (
+        id            {serial},
+        user_id       INTEGER NOT NULL,
+        product_id    INTEGER NOT NULL,
+        movement_type TEXT NOT NULL,
+        quantity      INTEGER NOT NULL,
+        created_at    TIMESTAMP NOT NULL
+    );
+    CREATE TABLE scm_item_classifications (
+        inventory_item_id INTEGER NOT NULL,
+        user_id           INTEGER NOT NULL,
+        abc_class         CHAR(1),
+        annual_value      NUMERIC,
+        avg_daily_demand  NUMERIC,
+        demand_std        NUMERIC,
+        demand_trend      NUMERIC,
+        seasonality_index NUMERIC,
+        forecast_mape     NUMERIC,
+        model_version     TEXT,
+        updated_at        TIMESTAMP,
+        PRIMARY KEY (inventory_item_id, user_id)
+    );
+    CREATE TABLE scm_suggested_orders (
+        id                          {serial},
+        item_id                     INTEGER NOT NULL,
+        user_id                     INTEGER NOT NULL,
+        suggested_quantity          INTEGER,
+        reason                      TEXT,
+        reason_code                 TEXT,
+        abc_class                   TEXT,
+        confidence_score            NUMERIC,
+        days_of_stock               NUMERIC,
+        rop                         NUMERIC,
+        eoq                         NUMERIC,
+        safety_stock                NUMERIC,
+        current_stock_at_suggestion NUMERIC,
+        status                      TEXT
+    );
+"""
+_INDEX = """
+    CREATE INDEX idx_bench_sales_day ON stock_movements (user_id, movement_type, created_at)
+"""
+
+
+def create_schema() -> None:
+    serial = 'BIGSERIAL PRIMARY KEY' if IS_POSTGRES else 'INTEGER PRIMARY KEY AUTOINCREMENT'
+    with DB_ENGINE.begin() as conn:
+        if IS_POSTGRES:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {BENCH_SCHEMA}"))
+            conn.execute(text(f"SET LOCAL search_path TO {BENCH_SCHEMA}"))
+        for statement in _TABLES.format(serial=serial).split(';'):
+            if statement.strip():
+                conn.execute(text(statement))
+
+
+def load_tenant(tenant) -> None:
+    """Bulk-load the synthetic items and movements, then index and analyze."""
+    items = [(int(i), tenant.user_id, f"SKU-{i}", f"Item {i}", float(c), float(s))
+             for i, c, s in zip(tenant.item_ids, tenant.cost_price, tenant.current_stock)]
+    epoch = datetime.combine(tenant.start, datetime.min.time())
+    stamps = (epoch + timedelta(days=int(d), seconds=int(s))
+              for d, s in zip(tenant.day, tenant.second))
+
+    if IS_POSTGRES:
+        raw = DB_ENGINE.raw_connection()
+        try:
+            cur = raw.cursor()
+            cur.execute(f"SET search_path TO {BENCH_SCHEMA}")
+            _copy(cur, "inventory_items (id, user_id, sku, name, cost_price, current_stock)", items)
+            rows = ((tenant.user_id, int(p), 'sale', int(q), ts.isoformat(sep=' '))
+                    for p, q, ts in zip(tenant.product_id, tenant.quantity, stamps))
+            _copy(cur, "stock_movements (user_id, product_id, movement_type, quantity, created_at)", rows)
+            cur.execute(_INDEX)
+            cur.execute("ANALYZE")
+            raw.commit()
+        finally:
+            raw.close()
+        return
+
+    raw = DB_ENGINE.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.executemany("INSERT INTO inventory_items (id, user_id, sku, name, cost_price, current_stock) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", items)
+        cur.executemany(
+            "INSERT INTO stock_movements (user_id, product_id, movement_type, quantity, created_at) "
+            "VALUES (?, ?, 'sale', ?, ?)",
+            ((tenant.user_id, int(p), int(q), ts.isoformat(sep=' '))
+             for p, q, ts in zip(tenant.product_id, tenant.quantity, stamps)))
+        cur.execute(_INDEX)
+        cur.execute("ANALYZE")
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def _copy(cur, target, rows, chunk=200_000):
+    buffer, count = io.StringIO(), 0
+    for row in rows:
+        buffer.write('\t'.join(str(v) for v in row) + '\n')
+        count += 1
+        if count % chunk == 0:
+            buffer.seek(0)
+            cur.copy_expert(f"COPY {target} FROM STDIN", buffer)
+            buffer = io.StringIO()
+    if buffer.tell():
+        buffer.seek(0)
+        cur.copy_expert(f"COPY {target} FROM STDIN", buffer)
+
+
+class BenchEngine(ABCDecisionEngine):
+    """The production engine on Postgres; SQLite spellings of its PG-only SQL otherwise."""
+
+    def _db_today(self) -> date:
+        if IS_POSTGRES:
+            return super()._db_today()
+        return datetime.now(timezone.utc).date()
+
+    def _load_daily_demand(self, user_id, item_ids, since, until) -> DemandMatrix:
+        if IS_POSTGRES:
+            return super()._load_daily_demand(user_id, item_ids, since, until)
+        index = {iid: row for row, iid in enumerate(item_ids)}
+        with DB_ENGINE.connect() as conn:
+            result = conn.execute(text("""
+                SELECT product_id, date(created_at) AS day, SUM(ABS(quantity)) AS units_sold
+                FROM   stock_movements
+                WHERE  user_id = :uid AND movement_type = 'sale'
+                  AND  created_at >= :since AND created_at < :until
+                GROUP  BY product_id, day
+            """), {"uid": user_id, "since": since.isoformat(), "until": until.isoformat()})
+            cells = [(index[pid], date.fromisoformat(day).toordinal(), float(sold))
+                     for pid, day, sold in result if pid in index]
+        if not cells:
+            return DemandMatrix.from_cells(item_ids, [], [], [])
+        rows, ordinals, units = (np.array(c) for c in zip(*cells))
+        return DemandMatrix.from_cells(item_ids, rows, ordinals, units)
+
+    def _persist_classifications(self, rows) -> None:
+        if IS_POSTGRES:
+            return super()._persist_classifications(rows)
+        with DB_ENGINE.begin() as conn:
+            for batch in _batches(rows, PERSIST_BATCH_ROWS):
+                conn.execute(text("""
+                    INSERT INTO scm_item_classifications
+                        (inventory_item_id, user_id, abc_class, annual_value, avg_daily_demand,
+                         demand_std, demand_trend, seasonality_index, forecast_mape,
+                         model_version, updated_at)
+                    VALUES (:iid, :uid, :abc, :av, :ad, :ds, :dt, :si, :mape, :mv, CURRENT_TIMESTAMP)
+                    ON CONFLICT (inventory_item_id, user_id) DO UPDATE SET
+                        abc_class = excluded.abc_class, annual_value = excluded.annual_value,
+                        avg_daily_demand = excluded.avg_daily_demand, demand_std = excluded.demand_std,
+                        demand_trend = excluded.demand_trend, seasonality_index = excluded.seasonality_index,
+                        forecast_mape = excluded.forecast_mape, model_version = excluded.model_version,
+                        updated_at = CURRENT_TIMESTAMP
+                """), [{"iid": c.item_id, "uid": c.user_id, "abc": c.abc_class.value,
+                        "av": round(c.annual_value, 2), "ad": round(c.avg_daily_demand, 4),
+                        "ds": round(c.demand_std, 4), "dt": round(c.demand_trend, 2),
+                        "si": round(c.seasonality_index, 4),
+                        "mape": round(c.forecast_mape, 2) if c.forecast_mape else None,
+                        "mv": c.model_version} for c in batch])
+
+    def _persist_suggestions(self, rows) -> None:
+        if IS_POSTGRES:
+            return super()._persist_suggestions(rows)
+        with DB_ENGINE.begin() as conn:
+            for batch in _batches(rows, PERSIST_BATCH_ROWS):
+                conn.execute(text("""
+                    INSERT INTO scm_suggested_orders
+                        (item_id, user_id, suggested_quantity, reason_code, abc_class,
+                         confidence_score, days_of_stock, rop, eoq, safety_stock,
+                         current_stock_at_suggestion, status)
+                    VALUES (:iid, :uid, :qty, :rcode, :abc, :conf, :days, :rop, :eoq, :ss, :stock, 'pending')
+                """), [{"iid": s.item_id, "uid": s.user_id, "qty": int(s.suggested_qty),
+                        "rcode": s.reason_code, "abc": s.abc_class.value,
+                        "conf": s.confidence_score, "days": s.days_of_stock,
+                        "rop": round(s.rop, 2), "eoq": round(s.eoq, 2),
+                        "ss": round(s.safety_stock, 2), "stock": s.current_stock} for s in batch])
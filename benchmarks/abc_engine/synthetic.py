@@ -0,0 +1,104 @@
+# benchmarks/abc_engine/synthetic.py
+"""
+Deterministic synthetic tenant for the engine benchmark.
+
+Same (items, movements, days, seed) → the same items and the same movements
+(day offsets relative to `end`), so runs on different days or machines
+profile identical workloads.  Demand per item-day is Poisson with rate
+
+    base · weekly · annual · trend        (smooth and seasonal items)
+    the same, on sale days only, / p      (intermittent items, p = P(sale))
+
+scaled so the expected total is `movements`.  Each movement sells a
+geometric quantity; SPIKE_SHARE of them are outlier spikes.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+
+SEED = 20240601
+CHUNK_ITEMS = 2000           # fixed: the random stream depends on it
+SPIKE_SHARE = 0.005
+KINDS = ('smooth', 'intermittent', 'seasonal')
+KIND_SHARES = (0.60, 0.25, 0.15)
+
+
+@dataclass
+class SyntheticTenant:
+    user_id:       int
+    start:         date          # day offset 0
+    days:          int
+    item_ids:      np.ndarray    # (items,)
+    kind:          np.ndarray    # index into KINDS
+    cost_price:    np.ndarray
+    current_stock: np.ndarray
+    product_id:    np.ndarray    # (movements,)
+    day:           np.ndarray    # offset from start
+    second:        np.ndarray    # second of the day
+    quantity:      np.ndarray    # negative: outgoing, like real sale movements
+
+    @property
+    def movements(self) -> int:
+        return len(self.product_id)
+
+
+def _rates(rows, t, dow, doy, days, base, amp, phase, trend):
+    weekly = 1 + 0.25 * np.sin(2 * np.pi * dow / 7)
+    annual = 1 + amp[rows, None] * np.sin(2 * np.pi * doy / 365.25 + phase[rows, None])
+    drift  = np.maximum(1 + trend[rows, None] * t / days, 0.05)
+    return base[rows, None] * weekly * annual * drift
+
+
+def generate_tenant(items: int, movements: int, days: int = 365, seed: int = SEED,
+                    user_id: int = 1, end: date | None = None) -> SyntheticTenant:
+    rng   = np.random.default_rng(seed)
+    end   = end or date.today()
+    start = end - timedelta(days=days)
+
+    base   = rng.lognormal(0.0, 1.2, items)                    # heavy tail → real A/B/C spread
+    kind   = rng.choice(len(KINDS), items, p=KIND_SHARES)
+    amp    = np.where(kind == 2, rng.uniform(0.4, 0.9, items), rng.uniform(0.0, 0.2, items))
+    phase  = rng.uniform(0, 2 * np.pi, items)
+    trend  = rng.normal(0.0, 0.3, items)
+    p_sale = np.where(kind == 1, rng.uniform(0.03, 0.25, items), 1.0)
+
+    t   = np.arange(days)
+    dow = np.array([(start + timedelta(days=int(k))).weekday() for k in t])
+    doy = np.array([(start + timedelta(days=int(k))).timetuple().tm_yday for k in t])
+
+    chunks = [np.arange(lo, min(lo + CHUNK_ITEMS, items)) for lo in range(0, items, CHUNK_ITEMS)]
+    expected = sum(_rates(rows, t, dow, doy, days, base, amp, phase, trend).sum() for rows in chunks)
+    scale = movements / expected if expected > 0 else 0.0
+
+    product, day = [], []
+    for rows in chunks:
+        lam  = _rates(rows, t, dow, doy, days, base, amp, phase, trend) * scale
+        sale = rng.random(lam.shape) < p_sale[rows, None]
+        counts = rng.poisson(np.where(sale, lam / p_sale[rows, None], 0.0))
+        r, d = np.nonzero(counts)
+        n = counts[r, d]
+        product.append(np.repeat(rows[r] + 1, n))
+        day.append(np.repeat(d, n))
+
+    product = np.concatenate(product) if product else np.zeros(0, dtype=np.int64)
+    day     = np.concatenate(day) if day else np.zeros(0, dtype=np.int64)
+    size    = len(product)
+    qty     = rng.geometric(0.5, size)
+    spikes  = rng.random(size) < SPIKE_SHARE
+    qty[spikes] *= rng.integers(10, 30, int(spikes.sum()))
+    second  = rng.integers(8 * 3600, 22 * 3600, size)
+
+    return SyntheticTenant(
+        user_id       = user_id,
+        start         = start,
+        days          = days,
+        item_ids      = np.arange(1, items + 1),
+        kind          = kind,
+        cost_price    = np.round(rng.lognormal(5.0, 1.0, items), 2),
+        current_stock = np.round(base * rng.uniform(0.0, 40.0, items) * scale),
+        product_id    = product,
+        day           = day,
+        second        = second,
+        quantity      = -qty,
+    )
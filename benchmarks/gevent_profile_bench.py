@@ -0,0 +1,138 @@
+# benchmarks/gevent_profile_bench.py
+"""
+Concurrent throughput of one gevent worker, with and without the gevent
+profile (gevent_profile.py + app/services/offload.py).
+
+Each simulated request is either
+  - I/O bound: one database round trip (SELECT pg_sleep(IO_SECONDS)), or
+  - CPU bound (every CPU_EVERY-th request): a pure-Python burst standing
+    in for a WeasyPrint render / ABC engine run, via offload.run_cpu().
+
+    off  patch_all() only: psycopg2 blocks the hub, CPU runs inline
+    on   patch_all() + apply_gevent_profile(): green psycopg2, CPU bursts
+         in the offload process pool
+
+Each mode runs in its own interpreter (monkey-patching is irreversible).
+
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.gevent_profile_bench \\
+        --requests 400 --concurrency 50
+
+Without BENCH_DATABASE_URL the I/O step is a gevent.sleep(); that is
+already cooperative, so only the CPU-offload half of the profile shows.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+
+def _cpu_burst(n):
+    """~100-200ms of pure-Python work (module level so it can be pickled)."""
+    total = 0
+    for i in range(n):
+        total += (i * i) % 7
+    return total
+
+
+def _child(mode, requests, concurrency, io_seconds, cpu_every, cpu_loops):
+    from gevent import monkey
+    monkey.patch_all()
+    if mode == 'on':
+        from gevent_profile import apply_gevent_profile
+        apply_gevent_profile()
+        os.environ['OFFLOAD_MODE'] = 'process'
+    else:
+        os.environ['OFFLOAD_MODE'] = 'inline'
+
+    import gevent
+    from gevent.pool import Pool
+    from app.services.offload import run_cpu
+
+    db_url = os.getenv('BENCH_DATABASE_URL')
+    engine = None
+    if db_url:
+        from sqlalchemy import create_engine, text
+        engine = create_engine(db_url, pool_size=int(os.getenv('DB_POOL_SIZE', 20)),
+                               max_overflow=int(os.getenv('DB_MAX_OVERFLOW', 10)))
+
+    def io_request():
+        if engine is not None:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT pg_sleep(:s)"), {"s": io_seconds})
+        else:
+            gevent.sleep(io_seconds)
+
+    io_latencies, cpu_latencies = [], []
+
+    def handle(i):
+        started = time.perf_counter()
+        if cpu_every and i % cpu_every == 0:
+            run_cpu(_cpu_burst, cpu_loops)
+            cpu_latencies.append(time.perf_counter() - started)
+        else:
+            io_request()
+            io_latencies.append(time.perf_counter() - started)
+
+    run_cpu(_cpu_burst, 1)          # start the pool outside the timed window
+    pool = Pool(concurrency)
+    started = time.perf_counter()
+    for i in range(requests):
+        pool.spawn(handle, i)
+    pool.join()
+    elapsed = time.perf_counter() - started
+
+    def pct(values, q):
+        if len(values) < 2:
+            return round(values[0] * 1000, 1) if values else None
+        return round(statistics.quantiles(values, n=100)[q - 1] * 1000, 1)
+
+    print(json.dumps({
+        'mode': mode,
+        'db': 'postgres' if engine is not None else 'simulated',
+        'requests': requests,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(requests / elapsed, 1),
+        'io_p50_ms': pct(io_latencies, 50),
+        'io_p95_ms': pct(io_latencies, 95),
+        'cpu_p50_ms': pct(cpu_latencies, 50),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--io-seconds', type=float, default=0.05)
+    parser.add_argument('--cpu-every', type=int, default=20)
+    parser.add_argument('--cpu-loops', type=int, default=2_000_000)
+    parser.add_argument('--child', choices=('on', 'off'))
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.requests, args.concurrency,
+               args.io_seconds, args.cpu_every, args.cpu_loops)
+        return
+
+    results = []
+    for mode in ('off', 'on'):
+        out = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.gevent_profile_bench', '--child', mode,
+             '--requests', str(args.requests), '--concurrency', str(args.concurrency),
+             '--io-seconds', str(args.io_seconds), '--cpu-every', str(args.cpu_every),
+             '--cpu-loops', str(args.cpu_loops)],
+            capture_output=True, text=True, check=True)
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"{'mode':<5} {'db':<10} {'req/s':>8} {'io p50':>8} {'io p95':>8} {'cpu p50':>8}   (ms)")
+    for r in results:
+        print(f"{r['mode']:<5} {r['db']:<10} {r['throughput_rps']:>8} {r['io_p50_ms']!s:>8} "
+              f"{r['io_p95_ms']!s:>8} {r['cpu_p50_ms']!s:>8}")
+    off, on = results
+    print(f"throughput x{on['throughput_rps'] / off['throughput_rps']:.2f} with the profile")
+
+
+if __name__ == '__main__':
+    main()
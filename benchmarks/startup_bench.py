@@ -0,0 +1,107 @@
+# benchmarks/startup_bench.py
+"""
+Cold-start benchmark: how long `import main` (module import + create_app())
+takes in a fresh interpreter, and which packages it pulls in.
+
+    python -m benchmarks.startup_bench [--runs 5] [--top 15]
+
+Budget: STARTUP_BUDGET_MS (default 1500 ms median wall time).  The old
+eager boot also loaded WeasyPrint, numpy/scipy, qrcode/PIL, Sentry and
+flasgger and ran the schema DDL; these modules must now not be imported at
+boot at all — they load on first use:
+
+    weasyprint, numpy, scipy, qrcode, PIL, sentry_sdk, flasgger
+
+Exit status 1 if the budget is exceeded or a deferred module was loaded,
+so this can gate CI.  Nothing connects to Redis or the database: the child
+uses a throwaway SQLite URL and an unused Redis URL.
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', 1500))
+DEFERRED_MODULES = ('weasyprint', 'numpy', 'scipy', 'qrcode', 'PIL', 'sentry_sdk', 'flasgger')
+
+_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _env():
+    env = dict(os.environ)
+    env['DATABASE_URL'] = f"sqlite:///{tempfile.gettempdir()}/startup_bench.db"
+    env.setdefault('REDIS_URL', 'redis://localhost:6379/0')
+    env.pop('SENTRY_DSN', None)
+    env['PYTHONDONTWRITEBYTECODE'] = '0'
+    return env
+
+
+def wall_times(runs):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import main'], cwd=_ROOT, env=_env(),
+                       check=True, capture_output=True)
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def import_profile():
+    """[(cumulative_us, package)] per top-level package, plus every module name."""
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                         cwd=_ROOT, env=_env(), check=True, capture_output=True, text=True)
+    by_package, modules = {}, set()
+    for line in out.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        cumulative, name = int(m.group(2)), m.group(4)
+        package = name.split('.')[0]
+        modules.add(package)
+        if package not in ('main', 'app'):
+            by_package[package] = max(by_package.get(package, 0), cumulative)
+    return sorted(((us, p) for p, us in by_package.items()), reverse=True), modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    wall_times(1)                   # populate __pycache__ first
+    times = wall_times(args.runs)
+    median = statistics.median(times)
+    top_level, modules = import_profile()
+
+    print(f"import main: median {median:.0f} ms, min {min(times):.0f} ms "
+          f"over {args.runs} runs (budget {STARTUP_BUDGET_MS:.0f} ms)")
+    print("\nslowest packages (cumulative import time):")
+    for cumulative, name in top_level[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    deferred = DEFERRED_MODULES
+    if not os.path.exists(os.path.join(_ROOT, 'app', 'static', 'openapi.json')):
+        print("\nnote: app/static/openapi.json missing — run build_openapi.py; "
+              "flasgger is loaded live until then")
+        deferred = tuple(m for m in deferred if m != 'flasgger')
+    loaded = sorted(m for m in deferred if m in modules)
+    failed = False
+    if loaded:
+        print(f"\nFAIL: deferred modules imported at boot: {', '.join(loaded)}")
+        failed = True
+    if median > STARTUP_BUDGET_MS:
+        print(f"\nFAIL: median {median:.0f} ms exceeds the {STARTUP_BUDGET_MS:.0f} ms budget")
+        failed = True
+    if not failed:
+        print("\nOK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
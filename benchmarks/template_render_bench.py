@@ -0,0 +1,105 @@
+# benchmarks/template_render_bench.py
+"""
+First-render vs steady-state latency of the heaviest templates.
+
+Three fresh interpreters per run, because the point is the first hit:
+
+    cold       no bytecode cache — parse + compile + render
+    bytecode   bytecode cache pre-filled (what build_templates.py or an
+               earlier worker leaves behind) — load + render
+    warm       warm_templates() ran first (preload master / worker init)
+
+plus the steady-state render time (mean of --renders renders after the
+first).  Templates are rendered in a test request context with an empty
+context (missing values render as empty via ChainableUndefined); if a
+template still needs real data, only its load/compile time is reported
+(marked "compile only").
+
+    python -m benchmarks.template_render_bench [--renders 50]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+HEAVY_TEMPLATES = (
+    'base.html', 'dashboard.html', 'form.html', 'inventory.html',
+    'purchase_orders.html', 'settings.html', 'invoice_pdf.html',
+)
+
+
+def _child(mode, renders):
+    import logging
+    logging.disable(logging.CRITICAL)
+    from jinja2 import ChainableUndefined
+    from app import create_app
+    app = create_app()
+    # Let missing context (data.items, user.name, ...) render as empty
+    app.jinja_env.undefined = ChainableUndefined
+    if mode == 'warm':
+        from app.templating import warm_templates
+        warm_templates(app)
+
+    results = {}
+    with app.test_request_context('/'):
+        for name in HEAVY_TEMPLATES:
+            started = time.perf_counter()
+            template = app.jinja_env.get_template(name)
+            loaded = time.perf_counter() - started
+            try:
+                template.render()
+                first = time.perf_counter() - started
+                started = time.perf_counter()
+                for _ in range(renders):
+                    template.render()
+                steady = (time.perf_counter() - started) / renders
+                results[name] = {'first_ms': first * 1000, 'steady_ms': steady * 1000}
+            except Exception:
+                results[name] = {'first_ms': loaded * 1000, 'steady_ms': None}
+    print(json.dumps(results))
+
+
+def _run(mode, renders, cache_dir):
+    env = dict(os.environ)
+    env.setdefault('REDIS_URL', 'redis://localhost:6379/0')
+    env['DATABASE_URL'] = f"sqlite:///{tempfile.gettempdir()}/template_bench.db"
+    env['JINJA_BYTECODE_CACHE_DIR'] = '' if mode == 'cold' else cache_dir
+    out = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.template_render_bench', '--child', mode,
+         '--renders', str(renders)],
+        env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--renders', type=int, default=50)
+    parser.add_argument('--child', choices=('cold', 'bytecode', 'warm'))
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.renders)
+        return
+
+    with tempfile.TemporaryDirectory(prefix='jinja-bench-') as cache_dir:
+        cold = _run('cold', args.renders, cache_dir)
+        _run('bytecode', 1, cache_dir)           # fill the cache
+        bytecode = _run('bytecode', args.renders, cache_dir)
+        warm = _run('warm', args.renders, cache_dir)
+
+    def fmt(value):
+        return f"{value:8.2f}" if value is not None else "       -"
+
+    print(f"{'template':<22} {'cold 1st':>8} {'bc 1st':>8} {'warm 1st':>8} {'steady':>8}   (ms)")
+    for name in HEAVY_TEMPLATES:
+        steady = cold[name]['steady_ms']
+        note = '' if steady is not None else '  compile only'
+        print(f"{name:<22} {fmt(cold[name]['first_ms'])} {fmt(bytecode[name]['first_ms'])} "
+              f"{fmt(warm[name]['first_ms'])} {fmt(steady)}{note}")
+
+
+if __name__ == '__main__':
+    main()
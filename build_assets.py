@@ -0,0 +1,111 @@
+# build_assets.py (root folder)
+"""
+Build fingerprinted, precompressed static assets (see app/assets.py).
+
+    python build_assets.py
+
+Reads app/static/{css,js,img,assets}, writes app/static/dist/ and
+app/static/dist/manifest.json.  Our own unminified CSS/JS goes through
+cssmin/jsmin; vendor *.min.* files are copied as-is (minus their dangling
+sourceMappingURL comments).  Text files get .gz and, when the brotli module
+is available (Flask-Compress depends on it), .br siblings.
+"""
+import os
+import re
+import gzip
+import json
+import shutil
+import hashlib
+from pathlib import Path
+
+os.environ.setdefault('REDIS_URL', 'redis://localhost:6379/0')
+
+from app.assets import BUNDLES, ASSET_DIST_DIR, ASSET_MANIFEST  # noqa: E402
+
+try:
+    from cssmin import cssmin
+except ImportError:
+    cssmin = None
+try:
+    from jsmin import jsmin
+except ImportError:
+    jsmin = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_ROOT = Path(__file__).parent / 'app' / 'static'
+SOURCE_DIRS = ('css', 'js', 'img', 'assets')
+TEXT_SUFFIXES = ('.css', '.js', '.svg', '.json', '.txt')
+COMPRESS_MIN_BYTES = 512
+HASH_LENGTH = 8
+
+_SOURCE_MAP = re.compile(rb'\n?/[/*][#@] sourceMappingURL=[^\n]*?(\*/)?\s*$')
+
+
+def _minify(name, data):
+    if name.endswith(('.min.css', '.min.js')):
+        return _SOURCE_MAP.sub(b'', data)
+    if name.endswith('.css') and cssmin:
+        return cssmin(data.decode('utf-8')).encode('utf-8')
+    if name.endswith('.js') and jsmin:
+        return jsmin(data.decode('utf-8')).encode('utf-8')
+    return _SOURCE_MAP.sub(b'', data) if name.endswith(('.css', '.js')) else data
+
+
+def _hashed_name(name, data):
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    stem, dot, suffix = name.rpartition('.')
+    return f"{ASSET_DIST_DIR}/{stem}.{digest}.{suffix}" if dot else f"{ASSET_DIST_DIR}/{name}.{digest}"
+
+
+def _write(rel_path, data):
+    path = STATIC_ROOT / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    written = [rel_path]
+    if path.suffix in TEXT_SUFFIXES and len(data) >= COMPRESS_MIN_BYTES:
+        # mtime=0 keeps the .gz byte-identical across builds
+        (STATIC_ROOT / (rel_path + '.gz')).write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+        written.append(rel_path + '.gz')
+        if brotli:
+            (STATIC_ROOT / (rel_path + '.br')).write_bytes(brotli.compress(data, quality=11))
+            written.append(rel_path + '.br')
+    return written
+
+
+def collect_sources():
+    sources = {}
+    for directory in SOURCE_DIRS:
+        for path in sorted((STATIC_ROOT / directory).rglob('*')):
+            if path.is_file() and not path.name.endswith('.map'):
+                sources[path.relative_to(STATIC_ROOT).as_posix()] = path.read_bytes()
+    return sources
+
+
+def build():
+    dist = STATIC_ROOT / ASSET_DIST_DIR
+    if dist.exists():
+        shutil.rmtree(dist)
+
+    sources = collect_sources()
+    outputs = {name: _minify(name, data) for name, data in sources.items()}
+    for bundle, members in BUNDLES.items():
+        outputs[bundle] = b'\n'.join(outputs[m] for m in members)
+
+    manifest, files = {}, 0
+    for name, data in sorted(outputs.items()):
+        hashed = _hashed_name(name, data)
+        files += len(_write(hashed, data))
+        manifest[name] = hashed
+
+    (STATIC_ROOT / ASSET_MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    missing = [tool for tool, mod in (('cssmin', cssmin), ('jsmin', jsmin), ('brotli', brotli)) if mod is None]
+    print(f"Assets: {len(manifest)} entries, {files} files -> {dist}"
+          + (f" (not installed: {', '.join(missing)})" if missing else ""))
+    return manifest
+
+
+if __name__ == '__main__':
+    build()
@@ -0,0 +1,28 @@
+# build_openapi.py (root folder)
+"""
+Generate the OpenAPI spec once, at build time (see app/openapi.py).
+
+    python build_openapi.py [output_path]
+
+Writes app/static/openapi.json by default.  Run it again after changing a
+route docstring; OPENAPI_LIVE=true serves the live flasgger spec meanwhile.
+"""
+import os
+import sys
+
+# Build in live mode; nothing here connects to Redis or the database.
+os.environ['OPENAPI_LIVE'] = 'true'
+os.environ.setdefault('REDIS_URL', 'redis://localhost:6379/0')
+
+from app import create_app          # noqa: E402
+from app.openapi import write_spec  # noqa: E402
+
+
+def main():
+    app = create_app()
+    path, spec = write_spec(app, sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"OpenAPI spec: {len(spec.get('paths', {}))} paths -> {path}")
+
+
+if __name__ == '__main__':
+    main()
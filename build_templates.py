@@ -0,0 +1,26 @@
+# build_templates.py (root folder)
+"""
+Pre-fill the Jinja bytecode cache at image build time (see app/templating.py).
+
+    JINJA_BYTECODE_CACHE_DIR=/app/.jinja-cache python build_templates.py
+
+Workers started from the image then load every template from bytecode
+instead of compiling it on the first request.
+"""
+import os
+
+os.environ.setdefault('REDIS_URL', 'redis://localhost:6379/0')
+
+from app import create_app                      # noqa: E402
+from app.templating import warm_templates      # noqa: E402
+
+
+def main():
+    app = create_app()
+    count, seconds = warm_templates(app)
+    cache = app.jinja_env.bytecode_cache
+    print(f"Templates: {count} compiled in {seconds:.2f}s -> {cache.directory if cache else '(cache disabled)'}")
+
+
+if __name__ == '__main__':
+    main()
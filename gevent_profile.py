@@ -0,0 +1,70 @@
+# gevent_profile.py (root folder)
+"""
+Runtime profile for gunicorn's gevent worker class.
+
+gevent's monkey.patch_all() makes sockets, locks and sleeps cooperative,
+but psycopg2 is a C extension: it talks to libpq directly, so every query
+blocked the whole worker — all of its greenlets — until Postgres answered.
+
+apply_gevent_profile() must run right after patch_all() and before anything
+imports app (gunicorn.conf.py does this).  It:
+
+  1. installs a psycopg2 wait callback (the psycogreen technique): libpq
+     runs in async mode and, whenever it would block, we park the greenlet
+     on gevent's wait_read/wait_write for that socket instead;
+  2. sets pool defaults sized for greenlet concurrency — the pool becomes
+     the limit towards Postgres and greenlets queue on it cooperatively
+     (DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT still override);
+  3. (implicitly) CPU offload: app/services/offload.py sees the patched
+     process and sends generate_pdf, the ABC engine run and logo
+     processing to a process pool so they don't stall the hub.
+
+This module must not import app — the DB engine is created on import.
+"""
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+GEVENT_DB_POOL_SIZE = int(os.getenv('GEVENT_DB_POOL_SIZE', 20))
+GEVENT_DB_MAX_OVERFLOW = int(os.getenv('GEVENT_DB_MAX_OVERFLOW', 10))
+GEVENT_DB_POOL_TIMEOUT = float(os.getenv('GEVENT_DB_POOL_TIMEOUT', 10))
+
+
+def gevent_wait_callback(conn, timeout=None):
+    """psycopg2 wait callback that yields to the gevent hub while libpq waits."""
+    import psycopg2
+    from psycopg2 import extensions
+    from gevent.socket import wait_read, wait_write
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise psycopg2.OperationalError(f"Bad result from poll: {state!r}")
+
+
+def make_psycopg2_green():
+    try:
+        from psycopg2 import extensions
+    except ImportError:
+        logger.warning("psycopg2 not installed — DB calls will not be cooperative")
+        return False
+    extensions.set_wait_callback(gevent_wait_callback)
+    return True
+
+
+def apply_gevent_profile():
+    from gevent import monkey
+    if not monkey.is_module_patched('socket'):
+        raise RuntimeError("apply_gevent_profile() needs gevent.monkey.patch_all() first")
+
+    make_psycopg2_green()
+    os.environ.setdefault('DB_POOL_SIZE', str(GEVENT_DB_POOL_SIZE))
+    os.environ.setdefault('DB_MAX_OVERFLOW', str(GEVENT_DB_MAX_OVERFLOW))
+    os.environ.setdefault('DB_POOL_TIMEOUT', str(GEVENT_DB_POOL_TIMEOUT))
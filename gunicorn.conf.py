@@ -0,0 +1,89 @@
+# gunicorn.conf.py
+"""
+Gunicorn settings for every entry point (Procfile, Dockerfile, railway.json).
+
+Workers and threads are sized from the CPU count and the worker class:
+
+    sync    2 * CPU + 1 workers, 1 thread
+    gthread CPU + 1 workers, GUNICORN_THREADS (4) threads each
+    gevent  CPU workers, GUNICORN_WORKER_CONNECTIONS (1000) greenlets each
+
+WEB_CONCURRENCY overrides the worker count; GUNICORN_MAX_WORKERS (8) caps
+the computed value so a large host doesn't fork more Postgres pools than
+the database allows (each worker holds up to pool_size + max_overflow).
+
+The app is preloaded in the master and forked; app/lifecycle.py warms
+caches and freezes the GC before fork, and gives every worker fresh DB and
+Redis pools after it.
+"""
+import os
+import multiprocessing
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # Patch before main:app is preloaded, so the locks, sockets and pools
+    # created at import time are already cooperative; then green psycopg2
+    # and size the DB pool for greenlets (see gevent_profile.py).
+    from gevent import monkey
+    monkey.patch_all()
+    from gevent_profile import apply_gevent_profile
+    apply_gevent_profile()
+
+try:
+    _cpus = len(os.sched_getaffinity(0))
+except AttributeError:
+    _cpus = multiprocessing.cpu_count()
+
+_max_workers = int(os.getenv('GUNICORN_MAX_WORKERS', 8))
+
+if worker_class == 'sync':
+    _workers, _threads = 2 * _cpus + 1, 1
+elif worker_class == 'gthread':
+    _workers, _threads = _cpus + 1, int(os.getenv('GUNICORN_THREADS', 4))
+else:
+    _workers, _threads = _cpus, 1
+
+workers = int(os.getenv('WEB_CONCURRENCY', min(_workers, _max_workers)))
+threads = _threads
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8080)}"
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers to cap slow leaks; the replacement forks from the
+# already-warm, frozen master, so recycling is cheap.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    from app.lifecycle import prepare_for_fork
+    prepare_for_fork(server.app.wsgi())
+    server.log.info(f"Preloaded: {workers} x {worker_class} workers, "
+                    f"{threads} threads, {_cpus} CPUs")
+
+
+def post_worker_init(worker):
+    # Preloaded workers inherit warm templates from the master; others warm
+    # up here, before the worker starts accepting connections.
+    if worker.cfg.preload_app:
+        return
+    from app.lifecycle import warm_worker
+    warm_worker(worker.wsgi)
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    from app.lifecycle import reset_after_fork
+    reset_after_fork(server.app.wsgi())
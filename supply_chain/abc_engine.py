@@ -6,28 +6,49 @@ ABC Inventory Intelligence Engine wired to GrowEasy's raw-SQL stack.
 Pipeline:  Classify → Control → Compute → Decide → Act
 
 Reads from:   inventory_items, stock_movements
-Writes to:    scm_item_classifications, scm_suggested_orders, scm_engine_run_logs
+Writes to:    scm_item_classifications, scm_item_demand_state,
+              scm_suggested_orders, scm_engine_run_logs
 
 Requires:  migration_scm_v3.sql run before deployment.
            numpy + scipy in requirements.txt.
+
+Incremental runs keep a learner state per item in scm_item_demand_state
+(DDL: models.CREATE_SCM_ITEM_DEMAND_STATE).  ensure_demand_state_table()
+creates or upgrades it on the first run of each process; if that fails the
+run logs a warning and every run is a full rebuild.
+
+Recommended index (the daily demand rollup is an index-only range scan):
+    CREATE INDEX IF NOT EXISTS idx_stock_movements_sales_day
+        ON stock_movements (user_id, movement_type, created_at)
+        INCLUDE (product_id, quantity);
 """
 
 from __future__ import annotations
 
+import os
 import json
 import logging
 import math
+import time
 import uuid
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from enum import Enum
 
 import numpy as np
 from scipy import stats
+from scipy.signal import lfilter
 from sqlalchemy import text
 
 from app.services.db import DB_ENGINE
 
+from .forecasting import (
+    FORECAST_MODELS, FORECAST_HOLDOUT_DAYS, FORECAST_HORIZON_DAYS, FORECASTERS,
+    Forecaster, eligible_rows, select_forecasts,
+)
+from .models import CREATE_SCM_ITEM_DEMAND_STATE
+
 logger = logging.getLogger(__name__)
 
 
@@ -85,6 +106,27 @@ DEFAULT_ABC_POLICIES: dict[ABCClass, dict] = {
 DEFAULT_ORDERING_COST    = 500.0   # PKR per PO (sensible Pakistani SME default)
 DEFAULT_HOLDING_COST_PCT = 0.25    # 25% annual holding cost as fraction
 
+# Rows of the items × days demand matrix profiled per block (bounds peak memory)
+PROFILE_CHUNK_ROWS = int(os.getenv('ABC_PROFILE_CHUNK_ROWS', 5000))
+# Product-day rows fetched per round trip by the daily demand loader
+DAILY_FETCH_ROWS = int(os.getenv('ABC_DAILY_FETCH_ROWS', 20000))
+# Rows per multi-row INSERT ... SELECT FROM unnest(...) statement
+PERSIST_BATCH_ROWS = int(os.getenv('ABC_PERSIST_BATCH_ROWS', 5000))
+
+# Incremental runs: fold new days into scm_item_demand_state instead of
+# re-learning a year of history.  force=True always rebuilds.
+INCREMENTAL_RUNS   = os.getenv('ABC_INCREMENTAL', 'true').lower() == 'true'
+STATE_REBUILD_DAYS = int(os.getenv('ABC_STATE_REBUILD_DAYS', 28))   # max age of an item's state
+STATE_TAIL_DAYS    = 60     # clean values kept for the 30/30 trend and 14-day MAPE
+# Days re-read behind last_day: a sale committed after its day was folded
+# (a transaction open across midnight, a back-dated correction) changes
+# their totals and sends the item to a rebuild.  Older back-dated rows are
+# picked up by the STATE_REBUILD_DAYS rebuild.
+STATE_SETTLE_DAYS  = max(int(os.getenv('ABC_STATE_SETTLE_DAYS', 2)), 1)
+
+# pg advisory lock namespace (key 1; key 2 = user_id) — one engine run per tenant
+ENGINE_LOCK_NAMESPACE = 0x41424345   # 'ABCE'
+
 
 # ═══════════════════════════════════════════════════════════════
 # Data Shapes
@@ -109,6 +151,199 @@ class DemandSignal:
     units_sold: float
 
 
+@dataclass
+class DemandMatrix:
+    """
+    Daily sales laid out items × days — column k is calendar day start + k.
+
+    `present` marks days with at least one sale movement: the learner works
+    on sale days only (a day without movements is absent, not zero), exactly
+    like AdaptiveDemandLearner._aggregate_to_daily.
+    """
+    item_ids: np.ndarray          # (items,) int64, row order
+    start:    date | None         # None when there are no sales at all
+    units:    np.ndarray          # (items, days) float64 — units sold per day
+    present:  np.ndarray          # (items, days) bool
+
+    @classmethod
+    def from_cells(cls, item_ids, rows, ordinals, units) -> "DemandMatrix":
+        """
+        Scatter (row, date.toordinal(), units) cells into the matrix.
+        Cells falling on the same item-day are summed in input order.
+        """
+        ids   = np.asarray(item_ids, dtype=np.int64)
+        rows  = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return cls(ids, None, np.zeros((len(ids), 0)), np.zeros((len(ids), 0), dtype=bool))
+
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        first    = int(ordinals.min())
+        n_days   = int(ordinals.max()) - first + 1
+        flat     = rows * n_days + (ordinals - first)
+        size     = len(ids) * n_days
+        totals   = np.bincount(flat, weights=np.asarray(units, dtype=float), minlength=size)
+        counts   = np.bincount(flat, minlength=size)
+        return cls(ids, date.fromordinal(first),
+                   totals.reshape(len(ids), n_days),
+                   counts.reshape(len(ids), n_days) > 0)
+
+    @classmethod
+    def from_signals(cls, item_ids: list[int], signals: list[DemandSignal]) -> "DemandMatrix":
+        index = {iid: row for row, iid in enumerate(item_ids)}
+        kept  = [s for s in signals if s.item_id in index]
+        return cls.from_cells(
+            item_ids,
+            np.fromiter((index[s.item_id] for s in kept), np.int64, len(kept)),
+            np.fromiter((s.date.date().toordinal() for s in kept), np.int64, len(kept)),
+            np.fromiter((s.units_sold for s in kept), float, len(kept)),
+        )
+
+    def column_months(self) -> np.ndarray:
+        """Calendar month (1-12) of every column."""
+        if self.start is None:
+            return np.zeros(0, dtype=np.int64)
+        first = self.start.toordinal()
+        return np.array([date.fromordinal(first + k).month for k in range(self.units.shape[1])])
+
+
+def _cold_start_row(avg: float) -> dict:
+    return {
+        "avg_daily_demand":  avg,
+        "demand_std":        avg * 0.3,
+        "demand_trend":      0.0,
+        "seasonality_index": 1.0,
+        "mape":              None,
+        "is_cold_start":     True,
+    }
+
+
+@dataclass
+class DemandState:
+    """
+    Learner state of one item after a run — a row of scm_item_demand_state.
+
+    Rebuilt from full history, it reproduces the profile exactly.  fold()
+    then adds new sale days one at a time: EWMA and the clean tail
+    (trend, MAPE) stay exact; the IQR fences are frozen at the rebuild and
+    the moments / month accumulators only grow (nothing leaves the
+    365-day window), so states are rebuilt every STATE_REBUILD_DAYS.
+    Cold-start items (cold_avg set) are rebuilt whenever they sell.
+
+    recent holds the units sold on each of the STATE_SETTLE_DAYS days
+    through recent_end (the last day the state was fully saved); see
+    unchanged().
+
+    forecast_model is the forecaster that beat the EWMA at the last rebuild
+    (None: the EWMA itself); its state is stepped through every new day, so
+    its forecast stays exact between rebuilds.
+    """
+    item_id:    int
+    last_day:   date                 # last complete day folded in
+    sale_days:  int
+    ewma_span:  int
+    rebuilt_at: datetime
+    cold_avg:   float | None = None
+    ewma:       float        = 0.0
+    clean_n:    int          = 0
+    clean_mean: float        = 0.0
+    clean_m2:   float        = 0.0   # Welford sum of squared deviations
+    fence_low:  float        = 0.0
+    fence_high: float        = 0.0
+    month_sum:  list[float]  = field(default_factory=lambda: [0.0] * 12)
+    month_cnt:  list[int]    = field(default_factory=lambda: [0] * 12)
+    tail:       list[float]  = field(default_factory=list)
+    recent:     list[float]  = field(default_factory=list)
+    recent_end: date | None  = None
+    stock:      float | None = None  # current_stock when last evaluated
+    abc_class:  str | None   = None
+    forecast_model: str | None   = None
+    forecast_state: list[float]  = field(default_factory=list)
+    forecast_std:   float | None = None  # RMS one-step error at the rebuild
+
+    @property
+    def is_cold(self) -> bool:
+        return self.cold_avg is not None
+
+    def fold(self, day: date, units: float) -> None:
+        """Add one sale day (call in date order, only for days after last_day)."""
+        self.sale_days += 1
+        self.month_sum[day.month - 1] += units
+        self.month_cnt[day.month - 1] += 1
+        if self.fence_low <= units <= self.fence_high:
+            alpha = 2.0 / (self.ewma_span + 1)
+            self.ewma = alpha * units + (1 - alpha) * self.ewma
+            self.clean_n += 1
+            delta = units - self.clean_mean
+            self.clean_mean += delta / self.clean_n
+            self.clean_m2 += delta * (units - self.clean_mean)
+            self.tail = (self.tail + [units])[-STATE_TAIL_DAYS:]
+        if self.forecast_model:
+            self.forecast_state = FORECASTERS[self.forecast_model].step(
+                self.forecast_state, day.toordinal(), units)
+
+    def unchanged(self, sold: dict[int, float]) -> bool:
+        """
+        Whether the re-read sales (day ordinal -> units) of the last
+        STATE_SETTLE_DAYS folded days still match what was folded: `recent`
+        for the days through recent_end, nothing on the sale-less days
+        advanced over since.
+        """
+        if self.recent_end is None or len(self.recent) != STATE_SETTLE_DAYS:
+            return False
+        last, end = self.last_day.toordinal(), self.recent_end.toordinal()
+        for day in range(last - STATE_SETTLE_DAYS + 1, last + 1):
+            k = day - end + STATE_SETTLE_DAYS - 1
+            expected = self.recent[k] if 0 <= k < STATE_SETTLE_DAYS else 0.0
+            if not math.isclose(sold.get(day, 0.0), expected, rel_tol=1e-9, abs_tol=1e-9):
+                return False
+        return True
+
+    def advance(self, through: date, sold: dict[int, float]) -> None:
+        """Close the run at `through`: days since the last fold had no sales."""
+        if self.forecast_model:
+            self.forecast_state = FORECASTERS[self.forecast_model].step(
+                self.forecast_state, through.toordinal(), 0.0)
+        self.last_day = through
+        end = through.toordinal()
+        self.recent = [sold.get(day, 0.0) for day in range(end - STATE_SETTLE_DAYS + 1, end + 1)]
+        self.recent_end = through
+
+    def profile(self, today_month: int) -> dict:
+        row = _cold_start_row(self.cold_avg) if self.is_cold else self._learned_profile(today_month)
+        if self.forecast_model:
+            row.update(
+                avg_daily_demand = FORECASTERS[self.forecast_model].predict(self.forecast_state,
+                                                                            FORECAST_HORIZON_DAYS),
+                demand_std       = self.forecast_std,
+                is_cold_start    = False,
+                forecast_model   = self.forecast_model,
+            )
+        return row
+
+    def _learned_profile(self, today_month: int) -> dict:
+
+        n, tail, avg = self.clean_n, self.tail, self.ewma
+        std    = math.sqrt(self.clean_m2 / (n - 1)) if n > 1 else avg * 0.2
+        recent = float(np.mean(tail[-30:])) if n >= 30 else self.clean_mean
+        prior  = float(np.mean(tail[-60:-30])) if n >= 60 else self.clean_mean
+        trend  = (recent - prior) / prior * 100 if prior > 0 else 0.0
+
+        errors = [abs(a - f) / a for a, f in zip(tail[-14:], tail[-15:-1]) if a > 0] if n >= 15 else []
+        mape   = float(np.mean(errors) * 100) if errors else 0.0
+
+        monthly = {m: self.month_sum[m] / self.month_cnt[m] for m in range(12) if self.month_cnt[m]}
+        g_avg   = float(np.mean(list(monthly.values()))) if monthly else 0.0
+        current = monthly.get(today_month - 1, g_avg)
+        return {
+            "avg_daily_demand":  max(avg, 0.0),
+            "demand_std":        max(std, 0.0),
+            "demand_trend":      float(trend),
+            "seasonality_index": current / g_avg if g_avg > 0 else 1.0,
+            "mape":              mape,
+            "is_cold_start":     False,
+        }
+
+
 @dataclass
 class ItemClassification:
     item_id:            int
@@ -254,6 +489,253 @@ class AdaptiveDemandLearner:
         }
 
 
+def _left_align(values: np.ndarray, mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pack the masked cells of each row to the left, keeping their order.
+    Returns (packed, counts); cells at or beyond counts[row] are zero.
+    """
+    counts = mask.sum(axis=1)
+    packed = np.zeros((values.shape[0], int(counts.max()) if counts.size else 0))
+    r, c   = np.nonzero(mask)
+    packed[r, (np.cumsum(mask, axis=1) - 1)[r, c]] = values[r, c]
+    return packed, counts
+
+
+def _row_percentile(ordered: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """
+    np.percentile(row[:count], q) for every row of a left-aligned, row-sorted
+    matrix — same 'linear' method and the same arithmetic, so bit-identical.
+    """
+    rows    = np.arange(len(counts))
+    last    = np.maximum(counts - 1, 0)
+    virtual = last * (q / 100.0)
+    lo      = np.floor(virtual)
+    gamma   = virtual - lo
+    lo      = lo.astype(np.int64)
+    hi      = np.minimum(lo + 1, last)
+    lo      = np.where(virtual >= last, last, lo)
+    a, b    = ordered[rows, lo], ordered[rows, hi]
+    with np.errstate(invalid="ignore"):             # empty rows are inf padding
+        diff = b - a
+        return np.where(gamma >= 0.5, b - diff * (1 - gamma), a + diff * gamma)
+
+
+class BatchDemandLearner(AdaptiveDemandLearner):
+    """
+    AdaptiveDemandLearner for every item of a tenant at once.
+
+    Works on a DemandMatrix instead of per-item DemandSignal lists, so the
+    cost is a handful of array passes over items × days rather than
+    O(items × signals) Python filtering plus a Python EWMA loop per item.
+    Each row goes through the same steps as compute_demand_profile (sale
+    days only, IQR scrub, EWMA, std, 30/30 trend, month seasonality,
+    14-day naive MAPE).  The quartiles, outlier mask and EWMA are
+    bit-identical; means/std/seasonality agree to float summation order.
+    compute_demand_profile() is still available as the per-item reference.
+
+    With `forecasters` (default: ABC_FORECAST_MODELS), items with enough
+    history also get the batch models of supply_chain/forecasting.py fitted
+    on their calendar-day series; where one beats the EWMA on the holdout,
+    its forecast and residual std replace avg_daily_demand / demand_std and
+    the profile carries "forecast_model".  Trend and seasonality_index stay
+    the learner's.
+    """
+
+    def __init__(
+        self,
+        ewma_span:   int | None               = None,
+        chunk_rows:  int                      = PROFILE_CHUNK_ROWS,
+        forecasters: list[Forecaster] | None  = None,
+    ):
+        if ewma_span is not None:
+            self.EWMA_SPAN = ewma_span
+        self.chunk_rows  = max(int(chunk_rows), 1)
+        self.forecasters = (forecasters if forecasters is not None
+                            else [FORECASTERS[name] for name in FORECAST_MODELS])
+
+    def compute_profiles(
+        self,
+        matrix:  DemandMatrix,
+        today:   datetime,
+        states:  dict[int, DemandState] | None = None,
+        through: date | None                   = None,
+    ) -> dict[int, dict]:
+        """
+        Profiles keyed by item_id.  Pass `states` (and the last complete day
+        the matrix covers as `through`) to also collect each item's
+        DemandState for incremental runs.
+        """
+        months   = matrix.column_months()
+        pad      = 0
+        if matrix.start is not None and through is not None:
+            pad = max(through.toordinal() - matrix.start.toordinal() - matrix.units.shape[1] + 1, 0)
+            months = np.concatenate([months, [(through - timedelta(days=k)).month
+                                              for k in range(pad - 1, -1, -1)]]).astype(np.int64)
+        chosen: dict[str, int] = {}
+        profiles: dict[int, dict] = {}
+        for lo in range(0, len(matrix.item_ids), self.chunk_rows):
+            hi      = lo + self.chunk_rows
+            ids     = matrix.item_ids[lo:hi].tolist()
+            units   = matrix.units[lo:hi]
+            present = matrix.present[lo:hi]
+            if pad:
+                units   = np.pad(units, ((0, 0), (0, pad)))
+                present = np.pad(present, ((0, 0), (0, pad)))
+            block = self._profile_block(units, present, months, today.month)
+            if self.forecasters and units.shape[1] > FORECAST_HOLDOUT_DAYS:
+                self._apply_forecasters(block, units, present, months, matrix.start.toordinal(),
+                                        today.month, chosen)
+            profiles.update(zip(ids, (profile for profile, _ in block)))
+            if states is not None:
+                rebuilt_at = datetime.now(timezone.utc)
+                recent     = np.pad(units[:, -STATE_SETTLE_DAYS:],
+                                    ((0, 0), (max(STATE_SETTLE_DAYS - units.shape[1], 0), 0)))
+                for iid, (_, state), days in zip(ids, block, recent.tolist()):
+                    states[iid] = DemandState(item_id=iid, last_day=through,
+                                              ewma_span=self.EWMA_SPAN,
+                                              rebuilt_at=rebuilt_at, recent=days,
+                                              recent_end=through, **state)
+        if chosen:
+            logger.info("[Learner] forecast models chosen: %s", chosen)
+        return profiles
+
+    def _apply_forecasters(self, block, units, present, months, origin, today_month, chosen) -> None:
+        """
+        Fit the forecasters on the block's eligible rows and switch the
+        profile (and DemandState fields) of every row a challenger wins.
+        The incumbent's holdout forecast is this learner's own
+        avg_daily_demand as of the holdout cut.
+        """
+        width = units.shape[1]
+        first = np.argmax(present, axis=1)
+        rows  = np.nonzero(eligible_rows(present, first, width))[0]
+        if not len(rows):
+            return
+        cut       = width - FORECAST_HOLDOUT_DAYS
+        at_cut    = self._profile_block(units[rows, :cut], present[rows, :cut], months[:cut], today_month)
+        incumbent = np.array([profile["avg_daily_demand"] for profile, _ in at_cut])
+        picked    = select_forecasts(units[rows], first[rows], origin, incumbent, self.forecasters)
+
+        for k, row in enumerate(rows.tolist()):
+            model = picked.model[k]
+            if model is None:
+                continue
+            profile, state = block[row]
+            profile.update(
+                avg_daily_demand = float(picked.forecast[k]),
+                demand_std       = float(picked.resid_std[k]),
+                is_cold_start    = False,
+                forecast_model   = model,
+            )
+            state.update(forecast_model=model, forecast_state=picked.state[k],
+                         forecast_std=float(picked.resid_std[k]))
+            chosen[model] = chosen.get(model, 0) + 1
+
+    def _profile_block(self, units, present, months, today_month) -> list[tuple[dict, dict]]:
+        """[(profile, DemandState fields)] for every row of the block."""
+        n_items   = units.shape[0]
+        rows      = np.arange(n_items)
+        daily, n  = _left_align(units, present)          # sale days, in date order
+        width     = daily.shape[1]
+        pos       = np.arange(width)
+        warm      = n >= 60
+
+        # Cold start: mean of the last 30 sale days
+        tail      = (pos >= n[:, None] - 30) & (pos < n[:, None])
+        cold_avg  = np.where(n > 0, (daily * tail).sum(axis=1) / np.maximum(tail.sum(axis=1), 1), 0.0)
+
+        if not warm.any():
+            return [(_cold_start_row(float(a)), {"sale_days": int(k), "cold_avg": float(a)})
+                    for a, k in zip(cold_avg, n)]
+
+        # IQR outlier scrub
+        ordered   = np.sort(np.where(pos < n[:, None], daily, np.inf), axis=1)
+        q1        = _row_percentile(ordered, n, 25)
+        q3        = _row_percentile(ordered, n, 75)
+        iqr       = q3 - q1
+        keep      = ((pos < n[:, None])
+                     & (daily >= (q1 - 1.5 * iqr)[:, None])
+                     & (daily <= (q3 + 1.5 * iqr)[:, None]))
+        clean, m  = _left_align(daily, keep)
+        cpos      = np.arange(clean.shape[1])
+        valid     = cpos < m[:, None]
+        m_safe    = np.maximum(m, 1)
+
+        # EWMA average: y0 = x0, y_i = α·x_i + (1-α)·y_{i-1}
+        alpha     = 2.0 / (self.EWMA_SPAN + 1)
+        avg       = clean[:, 0].copy() if clean.shape[1] else np.zeros(n_items)
+        if clean.shape[1] > 1:
+            ewma, _ = lfilter([alpha], [1.0, -(1 - alpha)], clean[:, 1:], axis=1,
+                              zi=((1 - alpha) * clean[:, 0])[:, None])
+            avg     = np.where(m > 1, ewma[rows, np.maximum(m - 2, 0)], avg)
+
+        mean      = clean.sum(axis=1) / m_safe
+        dev       = np.where(valid, clean - mean[:, None], 0.0)
+        m2        = (dev ** 2).sum(axis=1)
+        std       = np.where(m > 1, np.sqrt(m2 / np.maximum(m - 1, 1)), avg * 0.2)
+
+        # Trend: recent 30d vs prior 30d
+        recent_w  = np.where((m >= 30)[:, None], (cpos >= m[:, None] - 30) & valid, valid)
+        prior_w   = np.where((m >= 60)[:, None],
+                             (cpos >= m[:, None] - 60) & (cpos < m[:, None] - 30), valid)
+        recent    = (clean * recent_w).sum(axis=1) / np.maximum(recent_w.sum(axis=1), 1)
+        prior     = (clean * prior_w).sum(axis=1) / np.maximum(prior_w.sum(axis=1), 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            trend = np.where(prior > 0, (recent - prior) / prior * 100, 0.0)
+
+        # Seasonality: current calendar month vs mean of monthly means (sale days, unscrubbed)
+        onehot    = months[:, None] == np.arange(1, 13)[None, :]
+        m_sum     = units @ onehot
+        m_cnt     = present.astype(float) @ onehot
+        has_month = m_cnt > 0
+        m_avg     = np.where(has_month, m_sum / np.maximum(m_cnt, 1), 0.0)
+        g_avg     = m_avg.sum(axis=1) / np.maximum(has_month.sum(axis=1), 1)
+        current   = np.where(has_month[:, today_month - 1], m_avg[:, today_month - 1], g_avg)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            season = np.where(g_avg > 0, current / g_avg, 1.0)
+
+        # MAPE: last 14 days against a one-day-lag naive forecast
+        idx       = np.maximum(m[:, None] - 14, 1) + np.arange(14)[None, :]
+        idx       = np.minimum(idx, np.maximum(clean.shape[1] - 1, 0))
+        actual    = np.take_along_axis(clean, idx, axis=1) if clean.shape[1] else np.zeros((n_items, 14))
+        naive     = np.take_along_axis(clean, idx - 1, axis=1) if clean.shape[1] else actual
+        sold      = actual > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ape   = np.where(sold, np.abs(actual - naive) / actual, 0.0)
+        mape      = np.where((m >= 15) & sold.any(axis=1),
+                             ape.sum(axis=1) / np.maximum(sold.sum(axis=1), 1) * 100, 0.0)
+
+        low, high = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+        out = []
+        for i in range(n_items):
+            if not warm[i]:
+                out.append((_cold_start_row(float(cold_avg[i])),
+                            {"sale_days": int(n[i]), "cold_avg": float(cold_avg[i])}))
+                continue
+            profile = {
+                "avg_daily_demand":  max(float(avg[i]), 0.0),
+                "demand_std":        max(float(std[i]), 0.0),
+                "demand_trend":      float(trend[i]),
+                "seasonality_index": float(season[i]),
+                "mape":              float(mape[i]),
+                "is_cold_start":     False,
+            }
+            state = {
+                "sale_days":  int(n[i]),
+                "ewma":       float(avg[i]),
+                "clean_n":    int(m[i]),
+                "clean_mean": float(mean[i]),
+                "clean_m2":   float(m2[i]),
+                "fence_low":  float(low[i]),
+                "fence_high": float(high[i]),
+                "month_sum":  m_sum[i].tolist(),
+                "month_cnt":  m_cnt[i].astype(int).tolist(),
+                "tail":       clean[i, max(m[i] - STATE_TAIL_DAYS, 0):m[i]].tolist(),
+            }
+            out.append((profile, state))
+        return out
+
+
 # ═══════════════════════════════════════════════════════════════
 # Policy Repository
 # ═══════════════════════════════════════════════════════════════
@@ -353,6 +835,117 @@ class ReplenishmentCalculator:
                    float(policy["min_order_qty"]))
 
 
+    # ─── Vectorized decision stage ────────────────────────────
+
+    REASON_CODES = (None, "ROP_BREACH", "SEASONAL_SPIKE", "TREND_ALERT")
+
+    def policy_vectors(self, policies: dict[ABCClass, dict], classes: list[ABCClass]) -> dict[str, np.ndarray]:
+        """Per-class policy arrays, indexed like `classes` (z computed once per class)."""
+        return {
+            "z":           np.array([float(stats.norm.ppf(policies[c]["service_level"])) for c in classes]),
+            "lead_time":   np.array([policies[c]["lead_time_days"] for c in classes], dtype=float),
+            "dynamic_z":   np.array([policies[c]["safety_stock_method"] == "dynamic_z" for c in classes]),
+            "fixed_days":  np.array([policies[c].get("fixed_safety_days", 7) for c in classes], dtype=float),
+            "eoq_enabled": np.array([policies[c].get("eoq_enabled", False) for c in classes]),
+            "min_qty":     np.array([float(policies[c].get("min_order_qty", 1)) for c in classes]),
+        }
+
+    def evaluate_batch(
+        self,
+        class_idx:     np.ndarray,
+        policy_vec:    dict[str, np.ndarray],
+        demand:        np.ndarray,
+        std:           np.ndarray,
+        season:        np.ndarray,
+        trend:         np.ndarray,
+        mape:          np.ndarray,
+        cold:          np.ndarray,
+        stock:         np.ndarray,
+        cost:          np.ndarray,
+        ordering_cost: np.ndarray,
+        holding_pct:   np.ndarray,
+    ) -> dict[str, np.ndarray]:
+        """
+        compute_rop + compute_eoq + the ABCDecisionEngine._evaluate_item
+        decision for every row at once, with the same float operations in
+        the same order.  `mape` uses NaN for "no MAPE".  reason indexes
+        REASON_CODES (0 = no suggestion); rows with demand <= 0 get 0.
+        """
+        lead_time = policy_vec["lead_time"][class_idx]
+        min_qty   = policy_vec["min_qty"][class_idx]
+
+        adj_demand = demand * season * (1 + np.maximum(0.0, trend / 100 / 12))
+        safety     = np.where(
+            policy_vec["dynamic_z"][class_idx],
+            policy_vec["z"][class_idx] * np.sqrt(lead_time) * (std * season),
+            policy_vec["fixed_days"][class_idx] * adj_demand,
+        )
+        rop    = np.maximum(adj_demand * lead_time + safety, 0.0)
+        safety = np.maximum(safety, 0.0)
+
+        annual = demand * 365
+        hold   = cost * holding_pct
+        usable = policy_vec["eoq_enabled"][class_idx] & (annual > 0) & (hold > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            eoq  = np.where(usable, np.maximum(np.sqrt(2 * annual * ordering_cost / hold), min_qty), min_qty)
+            days = np.where(demand > 0, stock / demand, 999.0)
+
+        seasonal = (season >= 1.2) & (days < 30)
+        trending = (trend > 20) & (days < 21)
+        reason   = np.select([stock <= rop, seasonal, trending], [1, 2, 3], default=0)
+        reason   = np.where(demand > 0, reason, 0)
+
+        confidence = np.select([reason == 2, reason == 3], [0.80, 0.75], default=0.85)
+        confidence = np.where(mape > 30, confidence * 0.85, confidence)
+        confidence = np.where(cold, confidence * 0.70, confidence)
+
+        return {
+            "rop":           rop,
+            "safety_stock":  safety,
+            "eoq":           eoq,
+            "suggested_qty": np.maximum(eoq, min_qty),
+            "days_of_stock": days,
+            "reason":        reason,
+            "confidence":    confidence,
+        }
+
+
+def _batches(rows: list, size: int = PERSIST_BATCH_ROWS):
+    size = max(int(size), 1)
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _pg_array_literal(values) -> str:
+    """'{1.0,2.5}' — nested arrays can't go through unnest(), so they travel as text."""
+    return "{" + ",".join(repr(float(v)) if isinstance(v, float) else str(v) for v in values) + "}"
+
+
+_demand_state_ready = False
+
+
+def ensure_demand_state_table() -> bool:
+    """
+    Create or upgrade scm_item_demand_state once per process; whether
+    incremental runs can use it.  Postgres only (array columns) — other
+    databases always run full rebuilds.  A failure is logged and retried
+    on the next run.
+    """
+    global _demand_state_ready
+    if _demand_state_ready:
+        return True
+    if DB_ENGINE.dialect.name != "postgresql":
+        return False
+    try:
+        with DB_ENGINE.begin() as conn:
+            conn.execute(text(CREATE_SCM_ITEM_DEMAND_STATE))
+    except Exception as e:
+        logger.warning("[Engine] scm_item_demand_state unavailable, full rebuild: %s", e)
+        return False
+    _demand_state_ready = True
+    return True
+
+
 # ═══════════════════════════════════════════════════════════════
 # Main Decision Engine
 # ═══════════════════════════════════════════════════════════════
@@ -368,21 +961,29 @@ class ABCDecisionEngine:
     def __init__(
         self,
         policy_repo: PolicyRepository | None        = None,
-        learner:     AdaptiveDemandLearner | None   = None,
+        learner:     BatchDemandLearner | None      = None,
         classifier:  ABCClassifier | None           = None,
         calc:        ReplenishmentCalculator | None = None,
     ):
         self.policy_repo = policy_repo or PolicyRepository()
-        self.learner     = learner     or AdaptiveDemandLearner()
+        self.learner     = learner     or BatchDemandLearner()
         self.classifier  = classifier  or ABCClassifier()
         self.calc        = calc        or ReplenishmentCalculator()
 
     # ─── Public entry point ────────────────────────────────────
 
-    def run(self, user_id: int, triggered_by: str = "manual", force: bool = False) -> EngineRunLog:
+    def run(self, user_id: int, triggered_by: str = "manual", force: bool = False,
+            deadline: float | None = None) -> EngineRunLog:
         """
         Full pipeline in one call.
-        force=True → re-evaluates all items, skips duplicate-suggestion guard.
+        force=True → re-evaluates all items, skips duplicate-suggestion guard,
+                     rebuilds every item's demand state from a year of history.
+        Otherwise (ABC_INCREMENTAL) new complete days are folded into the
+        stored demand states and only items that sold, changed stock or
+        changed class are re-evaluated.
+        deadline (time.monotonic()) → checked between the read/learn stages;
+                     once past it the run stops as fatal before writing
+                     anything.  The writes and the run log always complete.
         """
         run_id  = str(uuid.uuid4())
         started = datetime.now(timezone.utc)
@@ -393,22 +994,42 @@ class ABCDecisionEngine:
                     run_id, user_id, triggered_by, force)
         try:
             items    = self._load_active_items(user_id)
-            signals  = self._load_demand_signals(user_id, days=365)
             policies = self.policy_repo.get_policies(user_id)
+            self._check_deadline(deadline, "profiling")
 
             if not items:
                 logger.warning("[Engine] No active items for user_id=%s", user_id)
                 return log
 
             today    = datetime.now(timezone.utc)
-            profiles = {
-                item.item_id: self.learner.compute_demand_profile(
-                    [s for s in signals if s.item_id == item.item_id], today
-                )
-                for item in items
-            }
+            db_today = self._db_today()
+            states   = None
+            if INCREMENTAL_RUNS and ensure_demand_state_table():
+                states = {} if force else self._load_demand_states(user_id)
+            if states:
+                profiles, dirty = self._incremental_profiles(user_id, items, states, today, db_today)
+            else:
+                matrix   = self._load_daily_demand(user_id, [item.item_id for item in items],
+                                                   since=db_today - timedelta(days=365), until=db_today)
+                profiles = self.learner.compute_profiles(matrix, today, states=states,
+                                                         through=db_today - timedelta(days=1))
+                dirty    = None     # everything
+            self._check_deadline(deadline, "classification")
+
+            abc_map = self.classifier.classify(items, profiles)
+            states  = states or {}
+            advance: set[int] = set()
+            if dirty is not None:
+                dirty  |= {item.item_id for item in items
+                           if states[item.item_id].abc_class != abc_map[item.item_id].value}
+                advance = {item.item_id for item in items} - dirty
+                items   = [item for item in items if item.item_id in dirty]
+            for item in items:
+                state = states.get(item.item_id)
+                if state is not None:
+                    state.stock     = item.current_stock
+                    state.abc_class = abc_map[item.item_id].value
 
-            abc_map         = self.classifier.classify(items, profiles)
             classifications = [
                 ItemClassification(
                     item_id           = item.item_id,
@@ -424,33 +1045,16 @@ class ABCDecisionEngine:
                 )
                 for item in items
             ]
+            self._check_deadline(deadline, "persisting")
             self._persist_classifications(classifications)
-
-            # Evaluate A → B → C → U priority order
-            priority   = [ABCClass.A, ABCClass.B, ABCClass.C, ABCClass.UNCLASSIFIED]
-            by_class   = {c: [] for c in priority}
-            for item in items:
-                by_class[abc_map[item.item_id]].append(item)
+            self._persist_demand_states(user_id, [states[item.item_id] for item in items
+                                                  if item.item_id in states],
+                                        advance=advance,
+                                        through=db_today - timedelta(days=1))
 
             pending_ids  = set() if force else self._load_pending_item_ids(user_id)
-            suggestions: list[SuggestedOrder] = []
-
-            for abc_class in priority:
-                for item in by_class[abc_class]:
-                    log.items_processed += 1
-                    try:
-                        sug = self._evaluate_item(
-                            item, abc_class,
-                            profiles[item.item_id],
-                            policies[abc_class],
-                            pending_ids,
-                        )
-                        if sug:
-                            suggestions.append(sug)
-                    except Exception as exc:
-                        msg = f"item_id={item.item_id}: {exc}"
-                        log.errors.append(msg)
-                        logger.exception("[Engine] %s", msg)
+            suggestions  = self._evaluate_items(items, abc_map, profiles, policies, pending_ids)
+            log.items_processed = len(items)
 
             if suggestions:
                 self._persist_suggestions(suggestions)
@@ -467,8 +1071,145 @@ class ABCDecisionEngine:
                     run_id, log.items_processed, log.suggestions_created, len(log.errors))
         return log
 
+    @staticmethod
+    def _check_deadline(deadline: float | None, stage: str) -> None:
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"engine run exceeded its time budget before {stage}")
+
+    def _incremental_profiles(
+        self,
+        user_id:  int,
+        items:    list[InventoryItem],
+        states:   dict[int, DemandState],
+        today:    datetime,
+        db_today: date,
+    ) -> tuple[dict[int, dict], set[int]]:
+        """
+        Profiles for every item from stored states plus the days since each
+        state's last_day.  Items without a usable state (missing, older than
+        STATE_REBUILD_DAYS, other EWMA span, a forecast model no longer
+        enabled, cold start with new sales, or late sales on a folded day —
+        see DemandState.unchanged) are rebuilt from history.  Returns
+        (profiles, dirty item ids).
+        """
+        stale_before = today - timedelta(days=STATE_REBUILD_DAYS)
+        through      = db_today - timedelta(days=1)
+        models       = {f.name for f in self.learner.forecasters}
+        rebuild: set[int] = set()
+        folding: dict[int, DemandState] = {}
+        for item in items:
+            st = states.get(item.item_id)
+            if (st is None or st.ewma_span != self.learner.EWMA_SPAN or st.rebuilt_at < stale_before
+                    or (st.forecast_model and st.forecast_model not in models)):
+                rebuild.add(item.item_id)
+            else:
+                folding[item.item_id] = st
+
+        sold: set[int] = set()
+        late: set[int] = set()
+        if folding:
+            since  = (min(st.last_day for st in folding.values())
+                      - timedelta(days=STATE_SETTLE_DAYS - 1))
+            matrix = self._load_daily_demand(user_id, list(folding), since=since, until=db_today)
+            days: dict[int, dict[int, float]] = {iid: {} for iid in folding}
+            if matrix.start is not None:
+                first = matrix.start.toordinal()
+                rows, cols = np.nonzero(matrix.present)             # row-major → days in order
+                for row, col in zip(rows.tolist(), cols.tolist()):
+                    days[int(matrix.item_ids[row])][first + col] = float(matrix.units[row, col])
+            late = {iid for iid, st in folding.items() if not st.unchanged(days[iid])}
+            rebuild |= late
+            for iid, st in folding.items():
+                last = st.last_day.toordinal()
+                for day, units in days[iid].items():
+                    if iid in rebuild or day <= last:
+                        continue
+                    if st.is_cold:
+                        rebuild.add(iid)
+                        continue
+                    st.fold(date.fromordinal(day), units)
+                    sold.add(iid)
+            for iid in rebuild:
+                folding.pop(iid, None)
+            for iid, st in folding.items():
+                st.advance(through, days[iid])
+
+        profiles = {iid: st.profile(today.month) for iid, st in folding.items()}
+        if rebuild:
+            matrix = self._load_daily_demand(user_id, sorted(rebuild),
+                                             since=db_today - timedelta(days=365), until=db_today)
+            profiles.update(self.learner.compute_profiles(matrix, today, states=states, through=through))
+
+        changed = {item.item_id for item in items
+                   if item.item_id in folding and folding[item.item_id].stock != item.current_stock}
+        logger.info("[Engine] incremental user=%s items=%d sold=%d stock_changed=%d rebuilt=%d late=%d",
+                    user_id, len(items), len(sold - rebuild), len(changed), len(rebuild), len(late))
+        return profiles, sold | changed | rebuild
+
     # ─── Item evaluation ───────────────────────────────────────
 
+    PRIORITY = [ABCClass.A, ABCClass.B, ABCClass.C, ABCClass.UNCLASSIFIED]
+
+    def _evaluate_items(
+        self,
+        items:       list[InventoryItem],
+        abc_map:     dict[int, ABCClass],
+        profiles:    dict[int, dict],
+        policies:    dict[ABCClass, dict],
+        pending_ids: set[int],
+    ) -> list[SuggestedOrder]:
+        """
+        Vectorized _evaluate_item over all items, emitted in A → B → C → U
+        priority order (item order within a class).  Same results as calling
+        _evaluate_item per item.
+        """
+        if not items:
+            return []
+        rank      = {c: i for i, c in enumerate(self.PRIORITY)}
+        order     = sorted(range(len(items)), key=lambda i: rank[abc_map[items[i].item_id]])
+        items     = [items[i] for i in order]
+        prof      = [profiles[item.item_id] for item in items]
+
+        def column(values, dtype=float):
+            return np.fromiter(values, dtype=dtype, count=len(items))
+
+        class_idx = column((rank[abc_map[item.item_id]] for item in items), np.int64)
+        stock     = column(item.current_stock for item in items)
+        out = self.calc.evaluate_batch(
+            class_idx     = class_idx,
+            policy_vec    = self.calc.policy_vectors(policies, self.PRIORITY),
+            demand        = column(p["avg_daily_demand"] for p in prof),
+            std           = column(p["demand_std"] for p in prof),
+            season        = column(p["seasonality_index"] for p in prof),
+            trend         = column(p["demand_trend"] for p in prof),
+            mape          = column(np.nan if p.get("mape") is None else p["mape"] for p in prof),
+            cold          = column((bool(p.get("is_cold_start")) for p in prof), bool),
+            stock         = stock,
+            cost          = column(item.cost_price for item in items),
+            ordering_cost = column(item.ordering_cost for item in items),
+            holding_pct   = column(item.holding_cost_pct for item in items),
+        )
+
+        suggestions = []
+        for i in np.flatnonzero(out["reason"]).tolist():
+            item = items[i]
+            if item.item_id in pending_ids:
+                continue
+            suggestions.append(SuggestedOrder(
+                item_id          = item.item_id,
+                user_id          = item.user_id,
+                abc_class        = self.PRIORITY[class_idx[i]],
+                current_stock    = item.current_stock,
+                rop              = float(out["rop"][i]),
+                eoq              = float(out["eoq"][i]),
+                suggested_qty    = float(out["suggested_qty"][i]),
+                safety_stock     = float(out["safety_stock"][i]),
+                days_of_stock    = round(float(out["days_of_stock"][i]), 1),
+                reason_code      = self.calc.REASON_CODES[out["reason"][i]],
+                confidence_score = round(float(out["confidence"][i]), 4),
+            ))
+        return suggestions
+
     def _evaluate_item(
         self,
         item:        InventoryItem,
@@ -567,9 +1308,55 @@ class ABCDecisionEngine:
             for r in rows
         ]
 
+    def _db_today(self) -> date:
+        """CURRENT_DATE of the database session — the day boundary the rollup uses."""
+        with DB_ENGINE.connect() as conn:
+            return conn.execute(text("SELECT CURRENT_DATE")).scalar()
+
+    def _load_daily_demand(self, user_id: int, item_ids: list[int], since: date, until: date) -> DemandMatrix:
+        """
+        Daily sales totals per product for days in [since, until), summed by
+        Postgres and streamed straight into the DemandMatrix the learner
+        works on — transfer and Python work scale with product-days, not
+        with individual movements.  Same day boundaries as
+        DemandSignal.date.date() (session time zone).  Runs stop at
+        yesterday: a partial day would be folded twice by incremental runs.
+        """
+        index = {iid: row for row, iid in enumerate(item_ids)}
+        rows, ordinals, units = [], [], []
+        with DB_ENGINE.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=DAILY_FETCH_ROWS).execute(text("""
+                SELECT product_id,
+                       CAST(date_trunc('day', created_at) AS date) AS day,
+                       SUM(ABS(quantity))                           AS units_sold
+                FROM   stock_movements
+                WHERE  user_id       = :uid
+                  AND  movement_type = 'sale'
+                  AND  created_at   >= :since
+                  AND  created_at    < :until
+                  AND  product_id    = ANY(:ids)
+                GROUP  BY product_id, day
+            """), {"uid": user_id, "since": since, "until": until, "ids": list(item_ids)})
+            for part in result.partitions():
+                kept = [(index[pid], day.toordinal(), float(sold))
+                        for pid, day, sold in part if pid in index]
+                if kept:
+                    r, o, u = zip(*kept)
+                    rows.append(np.array(r, dtype=np.int64))
+                    ordinals.append(np.array(o, dtype=np.int64))
+                    units.append(np.array(u, dtype=float))
+
+        if not rows:
+            return DemandMatrix.from_cells(item_ids, [], [], [])
+        return DemandMatrix.from_cells(item_ids, np.concatenate(rows),
+                                       np.concatenate(ordinals), np.concatenate(units))
+
     def _load_demand_signals(self, user_id: int, days: int = 365) -> list[DemandSignal]:
         """
         Sales from stock_movements.  quantity stored negative (outgoing) → ABS().
+        One row per movement — kept for the per-item reference path
+        (AdaptiveDemandLearner.compute_demand_profile); run() uses
+        _load_daily_demand.
         """
         with DB_ENGINE.connect() as conn:
             rows = conn.execute(text("""
@@ -603,19 +1390,23 @@ class ABCDecisionEngine:
         return {r[0] for r in rows}
 
     def _persist_classifications(self, rows: list[ItemClassification]) -> None:
+        """One upsert per PERSIST_BATCH_ROWS rows: column arrays unnested server-side."""
         if not rows:
             return
         with DB_ENGINE.begin() as conn:
-            for c in rows:
+            for batch in _batches(rows):
                 conn.execute(text("""
                     INSERT INTO scm_item_classifications
                         (inventory_item_id, user_id, abc_class, annual_value,
                          avg_daily_demand, demand_std, demand_trend,
                          seasonality_index, forecast_mape, model_version, updated_at)
-                    VALUES
-                        (:iid, :uid, :abc, :av,
-                         :ad, :ds, :dt,
-                         :si, :mape, :mv, CURRENT_TIMESTAMP)
+                    SELECT iid, uid, abc, av, ad, ds, dt, si, mape, mv, CURRENT_TIMESTAMP
+                    FROM unnest(
+                        CAST(:iid  AS integer[]), CAST(:uid AS integer[]), CAST(:abc AS text[]),
+                        CAST(:av   AS numeric[]), CAST(:ad  AS numeric[]), CAST(:ds  AS numeric[]),
+                        CAST(:dt   AS numeric[]), CAST(:si  AS numeric[]),
+                        CAST(:mape AS numeric[]), CAST(:mv  AS text[])
+                    ) AS t(iid, uid, abc, av, ad, ds, dt, si, mape, mv)
                     ON CONFLICT (inventory_item_id, user_id) DO UPDATE SET
                         abc_class         = EXCLUDED.abc_class,
                         annual_value      = EXCLUDED.annual_value,
@@ -627,27 +1418,180 @@ class ABCDecisionEngine:
                         model_version     = EXCLUDED.model_version,
                         updated_at        = CURRENT_TIMESTAMP
                 """), {
-                    "iid":  c.item_id, "uid": c.user_id,
-                    "abc":  c.abc_class.value,
-                    "av":   round(c.annual_value, 2),
-                    "ad":   round(c.avg_daily_demand, 4),
-                    "ds":   round(c.demand_std, 4),
-                    "dt":   round(c.demand_trend, 2),
-                    "si":   round(c.seasonality_index, 4),
-                    "mape": round(c.forecast_mape, 2) if c.forecast_mape else None,
-                    "mv":   c.model_version,
+                    "iid":  [c.item_id for c in batch],
+                    "uid":  [c.user_id for c in batch],
+                    "abc":  [c.abc_class.value for c in batch],
+                    "av":   [round(c.annual_value, 2) for c in batch],
+                    "ad":   [round(c.avg_daily_demand, 4) for c in batch],
+                    "ds":   [round(c.demand_std, 4) for c in batch],
+                    "dt":   [round(c.demand_trend, 2) for c in batch],
+                    "si":   [round(c.seasonality_index, 4) for c in batch],
+                    "mape": [round(c.forecast_mape, 2) if c.forecast_mape else None for c in batch],
+                    "mv":   [c.model_version for c in batch],
                 })
 
+    def _load_demand_states(self, user_id: int) -> dict[int, DemandState]:
+        """Stored learner states; {} (→ full rebuild) if there are none or the table is missing."""
+        try:
+            with DB_ENGINE.connect() as conn:
+                rows = conn.execute(text("""
+                    SELECT inventory_item_id, last_day, sale_days, ewma_span, rebuilt_at,
+                           cold_avg, ewma, clean_n, clean_mean, clean_m2,
+                           fence_low, fence_high, month_sum, month_cnt, tail, recent, recent_end,
+                           stock, abc_class, forecast_model, forecast_state, forecast_std
+                    FROM   scm_item_demand_state
+                    WHERE  user_id = :uid
+                """), {"uid": user_id}).mappings().all()
+        except Exception as e:
+            logger.warning("[Engine] demand state unavailable, full rebuild: %s", e)
+            return {}
+
+        return {
+            r["inventory_item_id"]: DemandState(
+                item_id    = r["inventory_item_id"],
+                last_day   = r["last_day"],
+                sale_days  = r["sale_days"],
+                ewma_span  = r["ewma_span"],
+                rebuilt_at = r["rebuilt_at"].replace(tzinfo=timezone.utc),
+                cold_avg   = r["cold_avg"],
+                ewma       = r["ewma"] or 0.0,
+                clean_n    = r["clean_n"] or 0,
+                clean_mean = r["clean_mean"] or 0.0,
+                clean_m2   = r["clean_m2"] or 0.0,
+                fence_low  = r["fence_low"] or 0.0,
+                fence_high = r["fence_high"] or 0.0,
+                month_sum  = list(r["month_sum"] or [0.0] * 12),
+                month_cnt  = list(r["month_cnt"] or [0] * 12),
+                tail       = list(r["tail"] or []),
+                recent     = list(r["recent"] or []),
+                recent_end = r["recent_end"],
+                stock      = r["stock"],
+                abc_class  = (r["abc_class"] or "").strip() or None,
+                forecast_model = r["forecast_model"] if r["forecast_state"] else None,
+                forecast_state = list(r["forecast_state"] or []),
+                forecast_std   = r["forecast_std"],
+            )
+            for r in rows
+        }
+
+    def _persist_demand_states(self, user_id: int, rows: list[DemandState],
+                               advance: set[int], through: date) -> None:
+        """
+        Upsert re-evaluated states; items in `advance` had no new sales, so
+        only their last_day moves forward (recent stays anchored at
+        recent_end).  A failed write is logged, not fatal — the run's
+        results are already computed.
+        """
+        if not rows and not advance:
+            return
+        try:
+            with DB_ENGINE.begin() as conn:
+                for batch in _batches(rows):
+                    conn.execute(text("""
+                        INSERT INTO scm_item_demand_state (
+                            inventory_item_id, user_id, last_day, sale_days, ewma_span,
+                            rebuilt_at, cold_avg, ewma, clean_n, clean_mean, clean_m2,
+                            fence_low, fence_high, month_sum, month_cnt, tail, recent, recent_end,
+                            stock, abc_class, forecast_model, forecast_state, forecast_std,
+                            updated_at
+                        )
+                        SELECT iid, :uid, :last_day, sale_days, :span,
+                               rebuilt_at, cold_avg, ewma, clean_n, clean_mean, clean_m2,
+                               fence_low, fence_high,
+                               CAST(month_sum AS double precision[]),
+                               CAST(month_cnt AS integer[]),
+                               CAST(tail      AS double precision[]),
+                               CAST(recent    AS double precision[]), :last_day,
+                               stock, abc, f_model,
+                               CAST(f_state   AS double precision[]),
+                               f_std, CURRENT_TIMESTAMP
+                        FROM unnest(
+                            CAST(:iid        AS integer[]),
+                            CAST(:sale_days  AS integer[]),
+                            CAST(:rebuilt_at AS timestamp[]),
+                            CAST(:cold_avg   AS double precision[]),
+                            CAST(:ewma       AS double precision[]),
+                            CAST(:clean_n    AS integer[]),
+                            CAST(:clean_mean AS double precision[]),
+                            CAST(:clean_m2   AS double precision[]),
+                            CAST(:fence_low  AS double precision[]),
+                            CAST(:fence_high AS double precision[]),
+                            CAST(:month_sum  AS text[]),
+                            CAST(:month_cnt  AS text[]),
+                            CAST(:tail       AS text[]),
+                            CAST(:recent     AS text[]),
+                            CAST(:stock      AS double precision[]),
+                            CAST(:abc        AS text[]),
+                            CAST(:f_model    AS text[]),
+                            CAST(:f_state    AS text[]),
+                            CAST(:f_std      AS double precision[])
+                        ) AS t(iid, sale_days, rebuilt_at, cold_avg, ewma, clean_n, clean_mean, clean_m2,
+                               fence_low, fence_high, month_sum, month_cnt, tail, recent, stock, abc,
+                               f_model, f_state, f_std)
+                        ON CONFLICT (inventory_item_id, user_id) DO UPDATE SET
+                            last_day   = EXCLUDED.last_day,
+                            sale_days  = EXCLUDED.sale_days,
+                            ewma_span  = EXCLUDED.ewma_span,
+                            rebuilt_at = EXCLUDED.rebuilt_at,
+                            cold_avg   = EXCLUDED.cold_avg,
+                            ewma       = EXCLUDED.ewma,
+                            clean_n    = EXCLUDED.clean_n,
+                            clean_mean = EXCLUDED.clean_mean,
+                            clean_m2   = EXCLUDED.clean_m2,
+                            fence_low  = EXCLUDED.fence_low,
+                            fence_high = EXCLUDED.fence_high,
+                            month_sum  = EXCLUDED.month_sum,
+                            month_cnt  = EXCLUDED.month_cnt,
+                            tail       = EXCLUDED.tail,
+                            recent     = EXCLUDED.recent,
+                            recent_end = EXCLUDED.recent_end,
+                            stock      = EXCLUDED.stock,
+                            abc_class  = EXCLUDED.abc_class,
+                            forecast_model = EXCLUDED.forecast_model,
+                            forecast_state = EXCLUDED.forecast_state,
+                            forecast_std   = EXCLUDED.forecast_std,
+                            updated_at = CURRENT_TIMESTAMP
+                    """), {
+                        "uid":        user_id,
+                        "last_day":   through,
+                        "span":       self.learner.EWMA_SPAN,
+                        "iid":        [st.item_id for st in batch],
+                        "sale_days":  [st.sale_days for st in batch],
+                        "rebuilt_at": [st.rebuilt_at.replace(tzinfo=None) for st in batch],
+                        "cold_avg":   [st.cold_avg for st in batch],
+                        "ewma":       [st.ewma for st in batch],
+                        "clean_n":    [st.clean_n for st in batch],
+                        "clean_mean": [st.clean_mean for st in batch],
+                        "clean_m2":   [st.clean_m2 for st in batch],
+                        "fence_low":  [st.fence_low for st in batch],
+                        "fence_high": [st.fence_high for st in batch],
+                        "month_sum":  [_pg_array_literal(st.month_sum) for st in batch],
+                        "month_cnt":  [_pg_array_literal(st.month_cnt) for st in batch],
+                        "tail":       [_pg_array_literal(st.tail) for st in batch],
+                        "recent":     [_pg_array_literal(st.recent) for st in batch],
+                        "stock":      [st.stock for st in batch],
+                        "abc":        [st.abc_class for st in batch],
+                        "f_model":    [st.forecast_model for st in batch],
+                        "f_state":    [_pg_array_literal(st.forecast_state) for st in batch],
+                        "f_std":      [st.forecast_std for st in batch],
+                    })
+                if advance:
+                    conn.execute(text("""
+                        UPDATE scm_item_demand_state
+                        SET    last_day = :through
+                        WHERE  user_id = :uid
+                          AND  inventory_item_id = ANY(:ids)
+                          AND  last_day < :through
+                    """), {"uid": user_id, "ids": sorted(advance), "through": through})
+        except Exception as e:
+            logger.warning("[Engine] demand state not saved for user=%s: %s", user_id, e)
+
     def _persist_suggestions(self, rows: list[SuggestedOrder]) -> None:
+        """Multi-row INSERT ... SELECT FROM unnest(...), PERSIST_BATCH_ROWS per statement."""
         if not rows:
             return
         with DB_ENGINE.begin() as conn:
-            for s in rows:
-                reason_text = (
-                    f"Stock {s.current_stock:.0f} ≤ ROP {s.rop:.0f}"
-                    if s.reason_code == "ROP_BREACH"
-                    else f"{s.reason_code}: {s.days_of_stock:.0f} days of stock"
-                )
+            for batch in _batches(rows):
                 conn.execute(text("""
                     INSERT INTO scm_suggested_orders (
                         item_id, user_id, suggested_quantity,
@@ -655,25 +1599,34 @@ class ABCDecisionEngine:
                         confidence_score, days_of_stock,
                         rop, eoq, safety_stock,
                         current_stock_at_suggestion, status
-                    ) VALUES (
-                        :iid, :uid, :qty,
-                        :reason, :rcode, :abc,
-                        :conf, :days,
-                        :rop, :eoq, :ss,
-                        :stock, 'pending'
                     )
+                    SELECT iid, uid, qty, reason, rcode, abc, conf, days,
+                           rop, eoq, ss, stock, 'pending'
+                    FROM unnest(
+                        CAST(:iid    AS integer[]), CAST(:uid   AS integer[]), CAST(:qty AS integer[]),
+                        CAST(:reason AS text[]),    CAST(:rcode AS text[]),    CAST(:abc AS text[]),
+                        CAST(:conf   AS numeric[]), CAST(:days  AS numeric[]),
+                        CAST(:rop    AS numeric[]), CAST(:eoq   AS numeric[]), CAST(:ss  AS numeric[]),
+                        CAST(:stock  AS numeric[])
+                    ) AS t(iid, uid, qty, reason, rcode, abc, conf, days, rop, eoq, ss, stock)
                 """), {
-                    "iid":   s.item_id,  "uid":   s.user_id,
-                    "qty":   int(s.suggested_qty),
-                    "reason": reason_text,
-                    "rcode": s.reason_code,
-                    "abc":   s.abc_class.value,
-                    "conf":  s.confidence_score,
-                    "days":  s.days_of_stock,
-                    "rop":   round(s.rop, 2),
-                    "eoq":   round(s.eoq, 2),
-                    "ss":    round(s.safety_stock, 2),
-                    "stock": s.current_stock,
+                    "iid":    [s.item_id for s in batch],
+                    "uid":    [s.user_id for s in batch],
+                    "qty":    [int(s.suggested_qty) for s in batch],
+                    "reason": [
+                        f"Stock {s.current_stock:.0f} ≤ ROP {s.rop:.0f}"
+                        if s.reason_code == "ROP_BREACH"
+                        else f"{s.reason_code}: {s.days_of_stock:.0f} days of stock"
+                        for s in batch
+                    ],
+                    "rcode":  [s.reason_code for s in batch],
+                    "abc":    [s.abc_class.value for s in batch],
+                    "conf":   [s.confidence_score for s in batch],
+                    "days":   [s.days_of_stock for s in batch],
+                    "rop":    [round(s.rop, 2) for s in batch],
+                    "eoq":    [round(s.eoq, 2) for s in batch],
+                    "ss":     [round(s.safety_stock, 2) for s in batch],
+                    "stock":  [s.current_stock for s in batch],
                 })
 
     def _persist_run_log(self, log: EngineRunLog) -> None:
@@ -711,3 +1664,49 @@ def build_decision_engine() -> ABCDecisionEngine:
         log = build_decision_engine().run(user_id=uid, triggered_by="manual")
     """
     return ABCDecisionEngine()
+
+
+@contextmanager
+def tenant_run_lock(user_id: int):
+    """
+    Session-level pg_try_advisory_lock for one tenant's engine run; yields
+    whether it was acquired.  Held on its own pooled connection for the
+    whole run and released on exit (or when the connection dies).  Other
+    databases (SQLite in development) have no advisory locks: always True.
+    """
+    if DB_ENGINE.dialect.name != "postgresql":
+        yield True
+        return
+    key = {"ns": ENGINE_LOCK_NAMESPACE, "uid": user_id}
+    with DB_ENGINE.connect() as conn:
+        acquired = bool(conn.execute(text("SELECT pg_try_advisory_lock(:ns, :uid)"), key).scalar())
+        conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(text("SELECT pg_advisory_unlock(:ns, :uid)"), key)
+                conn.commit()
+
+
+def run_decision_engine(user_id: int, triggered_by: str = "manual", force: bool = False,
+                        deadline: float | None = None) -> EngineRunLog:
+    """
+    Module-level entry point so the run can be shipped to the offload
+    process pool (app.services.offload.run_cpu) — bound methods of a
+    freshly built engine are not worth pickling.
+
+    Runs for the same tenant never overlap (web requests and the nightly
+    scheduler share tenant_run_lock); a run that finds the lock taken is
+    skipped and says so in its errors.  `deadline`: see ABCDecisionEngine.run.
+    """
+    with tenant_run_lock(user_id) as acquired:
+        if acquired:
+            return build_decision_engine().run(user_id, triggered_by=triggered_by, force=force,
+                                               deadline=deadline)
+
+    logger.info("[Engine] SKIP user=%s trigger=%s: run already in progress", user_id, triggered_by)
+    now = datetime.now(timezone.utc)
+    return EngineRunLog(run_id=str(uuid.uuid4()), user_id=user_id, triggered_by=triggered_by,
+                        started_at=now, finished_at=now,
+                        errors=["skipped: another engine run for this account is in progress"])
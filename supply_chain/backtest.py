@@ -0,0 +1,289 @@
+"""
+supply_chain/backtest.py
+─────────────────────────
+Rolling-origin backtest of the ABC engine's demand forecasts.
+
+    python -m supply_chain.backtest --user 12                       # current settings
+    python -m supply_chain.backtest --user 12 --span 14 --span 28 --span 56 \\
+        --thresholds 0.70,0.90 --thresholds 0.80,0.95 --models croston_sba,holt_winters --models none \\
+        --output backtest_12.json
+
+History is replayed at BACKTEST_ORIGINS origins, BACKTEST_STEP_DAYS apart,
+the last one BACKTEST_HORIZON_DAYS before today.  At each origin the
+candidate configuration's BatchDemandLearner profiles every item from the
+BACKTEST_WINDOW_DAYS before it, exactly as a run on that day would, and
+ABCClassifier classifies them with the candidate's thresholds.  The
+forecast is the demand ReplenishmentCalculator plans with (avg daily
+demand × seasonality × trend uplift) over the horizon.  It is scored
+against the units actually sold in the horizon:
+
+    MAPE   mean |F − A| / A over item-origins that sold (%)
+    WAPE   Σ|F − A| / ΣA (%)
+    bias   Σ(F − A) / ΣA (%) — positive means over-forecast
+
+Metrics are reported per item and per ABC class, where each item-origin
+counts under its class at that origin.  Configurations (the cross product
+of --span, --thresholds and --models) are evaluated in a process pool of
+BACKTEST_WORKERS.  Each pool process receives the tenant's demand matrix
+once, through its initializer.  The report is written as JSON and printed
+as a table ranked by WAPE.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
+from datetime import date, datetime, timedelta, timezone
+from itertools import product
+
+import numpy as np
+
+from .abc_engine import (
+    DEFAULT_ABC_THRESHOLDS, ABCClassifier, ABCDecisionEngine, AdaptiveDemandLearner,
+    BatchDemandLearner, DemandMatrix, InventoryItem,
+)
+from .forecasting import FORECAST_MODELS, FORECASTERS
+
+logger = logging.getLogger(__name__)
+
+BACKTEST_ORIGINS      = int(os.getenv('BACKTEST_ORIGINS', 12))
+BACKTEST_STEP_DAYS    = int(os.getenv('BACKTEST_STEP_DAYS', 7))
+BACKTEST_HORIZON_DAYS = int(os.getenv('BACKTEST_HORIZON_DAYS', 14))
+BACKTEST_WINDOW_DAYS  = 365          # what the engine loads on a full run
+BACKTEST_WORKERS      = int(os.getenv('BACKTEST_WORKERS', os.cpu_count() or 2))
+BACKTEST_START_METHOD = os.getenv('ENGINE_SCHEDULER_START_METHOD', 'forkserver')
+
+CLASSES = [c.value for c in ABCDecisionEngine.PRIORITY]
+
+
+@dataclass
+class BacktestConfig:
+    ewma_span:       int              = AdaptiveDemandLearner.EWMA_SPAN
+    thresholds:      dict             = field(default_factory=lambda: dict(DEFAULT_ABC_THRESHOLDS))
+    forecast_models: tuple[str, ...]  = tuple(FORECAST_MODELS)
+
+    @property
+    def name(self) -> str:
+        models = '+'.join(self.forecast_models) or 'ewma'
+        return (f"span={self.ewma_span} abc={self.thresholds['A']:.2f}/{self.thresholds['B']:.2f} "
+                f"models={models}")
+
+    def learner(self) -> BatchDemandLearner:
+        return BatchDemandLearner(ewma_span=self.ewma_span,
+                                  forecasters=[FORECASTERS[m] for m in self.forecast_models])
+
+
+@dataclass
+class BacktestData:
+    """A tenant's items and calendar-aligned daily sales: column 0 is `since`."""
+    user_id: int
+    items:   list[InventoryItem]
+    since:   date
+    units:   np.ndarray        # (items, days), row order = items
+    present: np.ndarray
+
+
+def backtest_origins(today: date, origins: int = BACKTEST_ORIGINS, step: int = BACKTEST_STEP_DAYS,
+                     horizon: int = BACKTEST_HORIZON_DAYS) -> list[date]:
+    """Oldest first; every horizon ends by yesterday."""
+    last = today - timedelta(days=horizon)
+    return [last - timedelta(days=step * k) for k in range(origins - 1, -1, -1)]
+
+
+def load_backtest_data(user_id: int, origins: list[date], horizon: int = BACKTEST_HORIZON_DAYS,
+                       engine: ABCDecisionEngine | None = None) -> BacktestData:
+    """Every active item's daily sales from the first origin's window to the last horizon."""
+    engine = engine or ABCDecisionEngine()
+    items  = engine._load_active_items(user_id)
+    since  = origins[0] - timedelta(days=BACKTEST_WINDOW_DAYS)
+    until  = origins[-1] + timedelta(days=horizon)
+    matrix = engine._load_daily_demand(user_id, [i.item_id for i in items], since=since, until=until)
+
+    width   = (until - since).days
+    units   = np.zeros((len(items), width))
+    present = np.zeros((len(items), width), dtype=bool)
+    if matrix.start is not None:
+        lo = (matrix.start - since).days
+        units[:, lo:lo + matrix.units.shape[1]]   = matrix.units
+        present[:, lo:lo + matrix.units.shape[1]] = matrix.present
+    return BacktestData(user_id=user_id, items=items, since=since, units=units, present=present)
+
+
+def _score(forecast: np.ndarray, actual: np.ndarray, axis=None) -> dict:
+    """MAPE / WAPE / bias (%) of horizon totals; None where nothing sold."""
+    err  = forecast - actual
+    sold = actual > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ape  = np.where(sold, np.abs(err) / actual, 0.0)
+        mape = ape.sum(axis=axis) / sold.sum(axis=axis) * 100
+        wape = np.abs(err).sum(axis=axis) / actual.sum(axis=axis) * 100
+        bias = err.sum(axis=axis) / actual.sum(axis=axis) * 100
+
+    def clean(values):
+        values = np.round(values, 2)
+        if np.ndim(values) == 0:
+            return float(values) if np.isfinite(values) else None
+        return [float(v) if np.isfinite(v) else None for v in values]
+
+    return {"mape": clean(mape), "wape": clean(wape), "bias": clean(bias)}
+
+
+def backtest_config(config: BacktestConfig, data: BacktestData, origins: list[date],
+                    horizon: int = BACKTEST_HORIZON_DAYS) -> dict:
+    """Replay every origin for one configuration; vectorized across items."""
+    started    = time.monotonic()
+    learner    = config.learner()
+    classifier = ABCClassifier(config.thresholds)
+    item_ids   = np.array([i.item_id for i in data.items], dtype=np.int64)
+    forecast   = np.zeros((len(origins), len(item_ids)))
+    actual     = np.zeros_like(forecast)
+    classes    = np.empty(forecast.shape, dtype='<U1')
+
+    for k, origin in enumerate(origins):
+        lo, hi   = ((origin - data.since).days - BACKTEST_WINDOW_DAYS, (origin - data.since).days)
+        window   = DemandMatrix(item_ids, origin - timedelta(days=BACKTEST_WINDOW_DAYS),
+                                data.units[:, lo:hi], data.present[:, lo:hi])
+        profiles = learner.compute_profiles(window, datetime.combine(origin, datetime.min.time(), timezone.utc),
+                                            through=origin - timedelta(days=1))
+        abc_map  = classifier.classify(data.items, profiles)
+        prof     = [profiles[iid] for iid in item_ids.tolist()]
+        demand   = np.array([p["avg_daily_demand"] for p in prof])
+        season   = np.array([p["seasonality_index"] for p in prof])
+        trend    = np.array([p["demand_trend"] for p in prof])
+        forecast[k] = demand * season * (1 + np.maximum(0.0, trend / 100 / 12)) * horizon
+        actual[k]   = data.units[:, hi:hi + horizon].sum(axis=1)
+        classes[k]  = [abc_map[iid].value for iid in item_ids.tolist()]
+
+    per_item = _score(forecast, actual, axis=0)
+    return {
+        "name":    config.name,
+        "config":  asdict(config),
+        "overall": {**_score(forecast, actual), "item_origins": int(actual.size)},
+        "classes": {c: {**_score(forecast[classes == c], actual[classes == c]),
+                        "item_origins": int((classes == c).sum())}
+                    for c in CLASSES if (classes == c).any()},
+        "items":   [{"item_id": iid, "abc_class": cls, "mape": mape, "wape": wape, "bias": bias}
+                    for iid, cls, mape, wape, bias in zip(item_ids.tolist(), classes[-1].tolist(),
+                                                          per_item["mape"], per_item["wape"],
+                                                          per_item["bias"])],
+        "seconds": round(time.monotonic() - started, 1),
+    }
+
+
+_worker_args: tuple = ()
+
+
+def _init_worker(data: BacktestData, origins: list[date], horizon: int) -> None:
+    global _worker_args
+    _worker_args = (data, origins, horizon)
+
+
+def _run_in_worker(config: BacktestConfig) -> dict:
+    return backtest_config(config, *_worker_args)
+
+
+def run_backtest(
+    user_id: int,
+    configs: list[BacktestConfig],
+    origins: int = BACKTEST_ORIGINS,
+    step:    int = BACKTEST_STEP_DAYS,
+    horizon: int = BACKTEST_HORIZON_DAYS,
+    workers: int = BACKTEST_WORKERS,
+    engine:  ABCDecisionEngine | None = None,
+) -> dict:
+    """Backtest every configuration for one tenant; returns the report dict."""
+    engine = engine or ABCDecisionEngine()
+    dates  = backtest_origins(engine._db_today(), origins, step, horizon)
+    data   = load_backtest_data(user_id, dates, horizon, engine)
+    logger.info("[Backtest] user=%s items=%d origins=%d configs=%d workers=%d",
+                user_id, len(data.items), len(dates), len(configs), workers)
+
+    results = []
+    if workers <= 1 or len(configs) == 1:
+        results = [backtest_config(config, data, dates, horizon) for config in configs]
+    else:
+        try:
+            context = multiprocessing.get_context(BACKTEST_START_METHOD)
+        except ValueError:
+            context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(configs)), mp_context=context,
+                                 initializer=_init_worker, initargs=(data, dates, horizon)) as pool:
+            futures = [pool.submit(_run_in_worker, config) for config in configs]
+            for future in as_completed(futures):
+                results.append(future.result())
+
+    results.sort(key=lambda r: (r["overall"]["wape"] is None, r["overall"]["wape"]))
+    return {
+        "user_id":      user_id,
+        "created_at":   datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "origins":      [d.isoformat() for d in dates],
+        "horizon_days": horizon,
+        "window_days":  BACKTEST_WINDOW_DAYS,
+        "items":        len(data.items),
+        "best":         results[0]["name"] if results else None,
+        "results":      results,
+    }
+
+
+def format_report(report: dict) -> str:
+    """Configurations ranked by overall WAPE, with per-class WAPE / bias."""
+    def pct(value):
+        return f"{value:>7.1f}" if value is not None else f"{'-':>7}"
+
+    lines = [f"user={report['user_id']} items={report['items']} origins={len(report['origins'])} "
+             f"({report['origins'][0]} .. {report['origins'][-1]}) horizon={report['horizon_days']}d",
+             f"{'configuration':<58} {'WAPE':>7} {'bias':>7} {'MAPE':>7}"
+             + ''.join(f" {c + ' WAPE':>7} {c + ' bias':>7}" for c in CLASSES) + f" {'sec':>6}"]
+    for r in report["results"]:
+        o = r["overall"]
+        line = f"{r['name']:<58} {pct(o['wape'])} {pct(o['bias'])} {pct(o['mape'])}"
+        for c in CLASSES:
+            s = r["classes"].get(c, {})
+            line += f" {pct(s.get('wape'))} {pct(s.get('bias'))}"
+        lines.append(line + f" {r['seconds']:>6.1f}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the ABC engine's forecasts.")
+    parser.add_argument('--user', type=int, required=True)
+    parser.add_argument('--span', type=int, action='append', help="EWMA span (repeatable)")
+    parser.add_argument('--thresholds', action='append', help="A,B cumulative value cut-offs (repeatable)")
+    parser.add_argument('--models', action='append',
+                        help="comma-separated forecast models, 'none' for EWMA only (repeatable)")
+    parser.add_argument('--origins', type=int, default=BACKTEST_ORIGINS)
+    parser.add_argument('--step', type=int, default=BACKTEST_STEP_DAYS)
+    parser.add_argument('--horizon', type=int, default=BACKTEST_HORIZON_DAYS)
+    parser.add_argument('--workers', type=int, default=BACKTEST_WORKERS)
+    parser.add_argument('--output', help="report JSON (default backtest_<user>.json)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    spans = args.span or [AdaptiveDemandLearner.EWMA_SPAN]
+    cuts  = [dict(zip("AB", (float(v) for v in t.split(',')))) for t in args.thresholds or []] \
+        or [dict(DEFAULT_ABC_THRESHOLDS)]
+    model_sets = [tuple(m.strip() for m in s.split(',') if m.strip() not in ('', 'none'))
+                  for s in args.models or []] or [tuple(FORECAST_MODELS)]
+    unknown = {m for s in model_sets for m in s} - set(FORECASTERS)
+    if unknown:
+        parser.error(f"unknown forecast model(s): {', '.join(sorted(unknown))}")
+    configs = [BacktestConfig(ewma_span=s, thresholds=t, forecast_models=m)
+               for s, t, m in product(spans, cuts, model_sets)]
+
+    report = run_backtest(args.user, configs, origins=args.origins, step=args.step,
+                          horizon=args.horizon, workers=args.workers)
+    output = args.output or f"backtest_{args.user}.json"
+    with open(output, 'w') as fh:
+        json.dump(report, fh, indent=2)
+    print(format_report(report))
+    print(f"written {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
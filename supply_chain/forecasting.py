@@ -0,0 +1,328 @@
+"""
+supply_chain/forecasting.py
+────────────────────────────
+Batch demand forecasters for the ABC engine.  NumPy only — no Flask/SQLAlchemy.
+
+Each Forecaster fits every SKU of a tenant at once on calendar-day series
+(items × days, zero on days without sales — unlike the learner's sale-day
+series, intermittent demand needs its zeros):
+
+    croston_sba    Croston with the Syntetos-Boylan bias correction, for
+                   intermittent (slow C) items
+    holt_winters   additive Holt-Winters, damped trend, weekly seasonality
+
+Smoothing parameters come from a small grid, evaluated for all items in
+the same time loop (state is grid × items, the series is not copied) and
+picked per item by one-step squared error before the holdout.
+select_forecasts() then compares each item's holdout MAE against the
+incumbent (the learner's EWMA) and keeps a challenger only when it wins by
+FORECAST_SWITCH_MARGIN.
+
+A fit ends in a per-item state vector; step() folds later days into it
+exactly like the batch loop would, so incremental engine runs keep the
+model current without refitting (see abc_engine.DemandState).
+"""
+
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from itertools import product
+
+import numpy as np
+
+FORECAST_MODELS = [m.strip() for m in os.getenv('ABC_FORECAST_MODELS', 'croston_sba,holt_winters').split(',')
+                   if m.strip()]
+FORECAST_HOLDOUT_DAYS     = int(os.getenv('ABC_FORECAST_HOLDOUT_DAYS', 28))
+FORECAST_HORIZON_DAYS     = int(os.getenv('ABC_FORECAST_HORIZON_DAYS', 28))
+FORECAST_MIN_HISTORY_DAYS = 3 * FORECAST_HOLDOUT_DAYS   # first sale → last day
+FORECAST_MIN_SALE_DAYS    = 6
+FORECAST_SWITCH_MARGIN    = 0.05   # challenger MAE must be 5% below the incumbent's
+
+
+@dataclass
+class ForecastFit:
+    holdout:   np.ndarray   # (items, holdout) forecasts made at the holdout cut
+    forecast:  np.ndarray   # (items,) mean daily forecast over the horizon, from the last day
+    resid_std: np.ndarray   # (items,) RMS one-step error over the whole series
+    state:     np.ndarray   # (items, k) end state — see step() / predict()
+
+
+class Forecaster(ABC):
+    """
+    Batch kernel interface.  `series` is items × days of calendar-day units,
+    column c is date ordinal `origin + c`; `first` is each row's first sale
+    column.  Rows are fitted from their own first sale on.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def fit(self, series: np.ndarray, first: np.ndarray, origin: int,
+            cut: int, horizon: int) -> ForecastFit:
+        ...
+
+    @abstractmethod
+    def step(self, state: list[float], ordinal: int, units: float) -> list[float]:
+        """Fold zero days up to `ordinal`, then `units` sold on `ordinal`."""
+
+    @abstractmethod
+    def predict(self, state: list[float], horizon: int = FORECAST_HORIZON_DAYS) -> float:
+        """Mean daily forecast over the next `horizon` days."""
+
+
+def _pick(values: np.ndarray, best: np.ndarray) -> np.ndarray:
+    """values[best[i], i] for grid-major (grid, items, ...) arrays."""
+    return values[best, np.arange(values.shape[1])]
+
+
+class CrostonSBA(Forecaster):
+    """
+    Croston's method with the SBA correction.
+
+        on a sale day:  z += α(y − z),  p += α(q − p),  q = 0
+        every day:      q += 1 (before the update)
+        forecast:       (1 − α/2) · z / p   per day, flat
+
+    z starts at the first sale, p at the mean interval over the first
+    FORECAST_MIN_SALE_DAYS sales.  State: [α, z, p, q, last ordinal].
+    """
+
+    name = "croston_sba"
+    GRID = (0.05, 0.1, 0.2, 0.3)
+
+    def fit(self, series, first, origin, cut, horizon):
+        n, width = series.shape
+        rows     = np.arange(n)
+        alpha    = np.array(self.GRID)[:, None]
+        early    = np.argmax(np.cumsum(series > 0, axis=1) >= FORECAST_MIN_SALE_DAYS, axis=1)
+        interval = np.maximum((early - first) / (FORECAST_MIN_SALE_DAYS - 1), 1.0)
+
+        z   = np.tile(series[rows, first], (len(self.GRID), 1))
+        p   = np.tile(interval, (len(self.GRID), 1))
+        q   = np.zeros_like(z)
+        sse_fit = np.zeros_like(z)
+        sse_all = np.zeros_like(z)
+        z_cut, p_cut = z.copy(), p.copy()
+        sba   = 1 - alpha / 2
+        late  = int(first.max())
+        days  = np.ascontiguousarray(series.T)
+
+        for t in range(int(first.min()) + 1, width):
+            if t == cut:
+                z_cut, p_cut = z.copy(), p.copy()
+            y   = days[t]
+            err = y - sba * z / p
+            if t <= late:
+                live = t > first
+                err  = err * live
+                q   += live
+                hit  = live & (y > 0)
+            else:
+                q   += 1.0
+                hit  = y > 0
+            err2 = err * err
+            sse_all += err2
+            if t < cut:
+                sse_fit += err2
+            if hit.any():
+                p = np.where(hit, p + alpha * (q - p), p)
+                z = np.where(hit, z + alpha * (y - z), z)
+                q = np.where(hit, 0.0, q)
+
+        best  = np.argmin(sse_fit, axis=0)
+        a     = alpha[best, 0]
+        at_cut = (1 - a / 2) * _pick(z_cut, best) / _pick(p_cut, best)
+        z, p, q = _pick(z, best), _pick(p, best), _pick(q, best)
+        return ForecastFit(
+            holdout   = np.repeat(at_cut[:, None], width - cut, axis=1),
+            forecast  = (1 - a / 2) * z / p,
+            resid_std = np.sqrt(_pick(sse_all, best) / np.maximum(width - 1 - first, 1)),
+            state     = np.column_stack([a, z, p, q, np.full(n, float(origin + width - 1))]),
+        )
+
+    def step(self, state, ordinal, units):
+        a, z, p, q, last = state
+        if ordinal <= last:
+            return state
+        q += ordinal - last
+        if units > 0:
+            p += a * (q - p)
+            z += a * (units - z)
+            q  = 0.0
+        return [a, z, p, q, float(ordinal)]
+
+    def predict(self, state, horizon=FORECAST_HORIZON_DAYS):
+        a, z, p = state[0], state[1], state[2]
+        return max((1 - a / 2) * z / p, 0.0)
+
+
+class HoltWintersWeekly(Forecaster):
+    """
+    Additive Holt-Winters with a damped trend and a 7-day season.
+
+        f  = ℓ + φb + s[d]                       (d = date ordinal mod 7)
+        ℓ' = α(y − s[d]) + (1 − α)(ℓ + φb)
+        b' = β(ℓ' − ℓ) + (1 − β)φb
+        s' = γ(y − ℓ') + (1 − γ)s[d]
+
+    Initialised from each row's first week of sales (level = mean, season =
+    deviations, trend 0).  Forecasts are clipped at zero.
+    State: [α, β, γ, ℓ, b, s0..s6, last ordinal].
+    """
+
+    name    = "holt_winters"
+    SEASON  = 7
+    DAMPING = 0.9
+    GRID    = tuple(product((0.05, 0.15, 0.3), (0.0, 0.05), (0.05, 0.2)))
+
+    def _path(self, level, trend, season, last_ordinal, horizon):
+        """(items, horizon) forecasts for the days after `last_ordinal`."""
+        h      = np.arange(1, horizon + 1)
+        damped = np.cumsum(self.DAMPING ** h)
+        slots  = (last_ordinal + h) % self.SEASON
+        return np.maximum(level[:, None] + damped[None, :] * trend[:, None] + season[:, slots], 0.0)
+
+    def fit(self, series, first, origin, cut, horizon):
+        n, width = series.shape
+        rows     = np.arange(n)
+        grid     = np.array(self.GRID)
+        alpha, beta, gamma = (grid[:, k, None] for k in range(3))
+        phi      = self.DAMPING
+
+        week     = series[rows[:, None], first[:, None] + np.arange(self.SEASON)]
+        level0   = week.mean(axis=1)
+        season0  = np.zeros((n, self.SEASON))
+        season0[rows[:, None], (origin + first[:, None] + np.arange(self.SEASON)) % self.SEASON] = \
+            week - level0[:, None]
+
+        g       = len(self.GRID)
+        level   = np.tile(level0, (g, 1))
+        trend   = np.zeros_like(level)
+        season  = np.ascontiguousarray(np.tile(season0.T[:, None, :], (1, g, 1)))   # slot × grid × items
+        sse_fit = np.zeros_like(level)
+        sse_all = np.zeros_like(level)
+        at_cut  = (level.copy(), trend.copy(), season.copy())
+        start   = first + self.SEASON
+        late    = int(start.max())
+        days    = np.ascontiguousarray(series.T)
+        keep_l, damp_b, keep_s = 1 - alpha, phi * (1 - beta), 1 - gamma
+
+        for t in range(int(start.min()), width):
+            if t == cut:
+                at_cut = (level.copy(), trend.copy(), season.copy())
+            y    = days[t]
+            d    = (origin + t) % self.SEASON
+            s_d  = season[d]
+            base = level + phi * trend
+            err  = y - (base + s_d)
+            new_level  = alpha * (y - s_d) + keep_l * base
+            new_trend  = beta * (new_level - level) + damp_b * trend
+            new_season = gamma * (y - new_level) + keep_s * s_d
+            if t < late:                        # rows still in their first week keep the initial state
+                live       = t >= start
+                err        = err * live
+                new_level  = np.where(live, new_level, level)
+                new_trend  = np.where(live, new_trend, trend)
+                new_season = np.where(live, new_season, s_d)
+            err2 = err * err
+            sse_all += err2
+            if t < cut:
+                sse_fit += err2
+            level, trend, season[d] = new_level, new_trend, new_season
+
+        season = season.transpose(1, 2, 0)                  # grid × items × slot
+        at_cut = (at_cut[0], at_cut[1], at_cut[2].transpose(1, 2, 0))
+        best = np.argmin(sse_fit, axis=0)
+        params = grid[best]
+        holdout = self._path(_pick(at_cut[0], best), _pick(at_cut[1], best), _pick(at_cut[2], best),
+                             origin + cut - 1, width - cut)
+        level, trend, season = _pick(level, best), _pick(trend, best), _pick(season, best)
+        last = origin + width - 1
+        return ForecastFit(
+            holdout   = holdout,
+            forecast  = self._path(level, trend, season, last, horizon).mean(axis=1),
+            resid_std = np.sqrt(_pick(sse_all, best) / np.maximum(width - start, 1)),
+            state     = np.column_stack([params, level, trend, season, np.full(n, float(last))]),
+        )
+
+    def step(self, state, ordinal, units):
+        a, b, g, level, trend = state[:5]
+        season, last = list(state[5:5 + self.SEASON]), int(state[-1])
+        phi = self.DAMPING
+        for day in range(last + 1, ordinal + 1):
+            y   = units if day == ordinal else 0.0
+            d   = day % self.SEASON
+            new_level = a * (y - season[d]) + (1 - a) * (level + phi * trend)
+            trend     = b * (new_level - level) + phi * (1 - b) * trend
+            season[d] = g * (y - new_level) + (1 - g) * season[d]
+            level     = new_level
+        return [a, b, g, level, trend, *season, float(max(ordinal, last))]
+
+    def predict(self, state, horizon=FORECAST_HORIZON_DAYS):
+        season = np.array([state[5:5 + self.SEASON]])
+        return float(self._path(np.array([state[3]]), np.array([state[4]]), season,
+                                int(state[-1]), horizon).mean())
+
+
+FORECASTERS: dict[str, Forecaster] = {f.name: f for f in (CrostonSBA(), HoltWintersWeekly())}
+
+
+@dataclass
+class ForecastSelection:
+    model:     list[str | None]   # per row; None → keep the incumbent
+    forecast:  np.ndarray         # selected model's mean daily forecast (NaN for the incumbent)
+    resid_std: np.ndarray
+    mae:       np.ndarray         # holdout MAE of the selected model (incumbent included)
+    state:     list[list[float] | None]
+
+
+def eligible_rows(present: np.ndarray, first: np.ndarray, width: int) -> np.ndarray:
+    """Rows with enough calendar history and sale days for a holdout comparison."""
+    sold_pre = present[:, :max(width - FORECAST_HOLDOUT_DAYS, 0)].sum(axis=1)
+    return ((present.any(axis=1))
+            & (width - first >= FORECAST_MIN_HISTORY_DAYS)
+            & (sold_pre >= FORECAST_MIN_SALE_DAYS))
+
+
+def select_forecasts(
+    series:     np.ndarray,
+    first:      np.ndarray,
+    origin:     int,
+    incumbent:  np.ndarray,
+    models:     list[Forecaster],
+    horizon:    int = FORECAST_HORIZON_DAYS,
+) -> ForecastSelection:
+    """
+    Per-row model choice by holdout MAE over the last FORECAST_HOLDOUT_DAYS
+    columns.  `incumbent` is the learner's flat daily forecast made at the
+    holdout cut.  Pass eligible rows only (see eligible_rows).
+    """
+    n, width = series.shape
+    cut      = width - FORECAST_HOLDOUT_DAYS
+    actual   = series[:, cut:]
+    best_mae = np.abs(actual - incumbent[:, None]).mean(axis=1)
+    bar      = best_mae * (1 - FORECAST_SWITCH_MARGIN)
+    choice   = np.full(n, -1)
+    fits     = [m.fit(series, first, origin, cut, horizon) for m in models]
+    for k, fit in enumerate(fits):
+        mae  = np.abs(actual - fit.holdout).mean(axis=1)
+        wins = mae < np.minimum(bar, np.where(choice >= 0, best_mae, np.inf))
+        choice   = np.where(wins, k, choice)
+        best_mae = np.where(wins, mae, best_mae)
+
+    forecast  = np.full(n, np.nan)
+    resid_std = np.full(n, np.nan)
+    states: list[list[float] | None] = [None] * n
+    for k, fit in enumerate(fits):
+        rows = np.nonzero(choice == k)[0]
+        forecast[rows]  = fit.forecast[rows]
+        resid_std[rows] = fit.resid_std[rows]
+        for r in rows.tolist():
+            states[r] = fit.state[r].tolist()
+    return ForecastSelection(
+        model     = [models[k].name if k >= 0 else None for k in choice.tolist()],
+        forecast  = np.maximum(forecast, 0.0),
+        resid_std = resid_std,
+        mae       = best_mae,
+        state     = states,
+    )
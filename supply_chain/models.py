@@ -146,6 +146,47 @@ CREATE_SCM_SUGGESTED_ORDERS = """
 """
 
 
+# Learner state of the ABC engine's incremental runs (abc_engine.DemandState).
+# Created by abc_engine.ensure_demand_state_table(); the ALTERs upgrade
+# tables created before the forecast models and the late-row check.
+CREATE_SCM_ITEM_DEMAND_STATE = """
+    CREATE TABLE IF NOT EXISTS scm_item_demand_state (
+        inventory_item_id INTEGER          NOT NULL,
+        user_id           INTEGER          NOT NULL,
+        last_day          DATE             NOT NULL,
+        sale_days         INTEGER          NOT NULL,
+        ewma_span         INTEGER          NOT NULL,
+        rebuilt_at        TIMESTAMP        NOT NULL,
+        cold_avg          DOUBLE PRECISION,
+        ewma              DOUBLE PRECISION,
+        clean_n           INTEGER,
+        clean_mean        DOUBLE PRECISION,
+        clean_m2          DOUBLE PRECISION,
+        fence_low         DOUBLE PRECISION,
+        fence_high        DOUBLE PRECISION,
+        month_sum         DOUBLE PRECISION[],
+        month_cnt         INTEGER[],
+        tail              DOUBLE PRECISION[],
+        recent            DOUBLE PRECISION[],
+        recent_end        DATE,
+        stock             DOUBLE PRECISION,
+        abc_class         CHAR(1),
+        forecast_model    TEXT,
+        forecast_state    DOUBLE PRECISION[],
+        forecast_std      DOUBLE PRECISION,
+        updated_at        TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (inventory_item_id, user_id)
+    );
+
+    ALTER TABLE scm_item_demand_state
+        ADD COLUMN IF NOT EXISTS forecast_model TEXT,
+        ADD COLUMN IF NOT EXISTS forecast_state DOUBLE PRECISION[],
+        ADD COLUMN IF NOT EXISTS forecast_std   DOUBLE PRECISION,
+        ADD COLUMN IF NOT EXISTS recent         DOUBLE PRECISION[],
+        ADD COLUMN IF NOT EXISTS recent_end     DATE;
+"""
+
+
 # ─────────────────────────────────────────────────────────
 # Typed row containers
 # ─────────────────────────────────────────────────────────
@@ -11,12 +11,11 @@ from flask import (
     flash, jsonify, session, make_response
 )
 import json
-from weasyprint import HTML
 from functools import wraps
 from sqlalchemy import text
 from app.services.number_generator import NumberGenerator
 from app.services.db import DB_ENGINE
-from .abc_engine import build_decision_engine
+from app.services.offload import run_cpu
 from . import supply_chain_bp
 from .forms import InventoryItemForm, SupplierKPIForm, LandedCostForm
 from .utils import (
@@ -775,6 +774,7 @@ def landed_cost_pdf(lc_id):
         cost_breakdown=cost_breakdown,
         company=company
     )
+    from weasyprint import HTML
     pdf = HTML(string=rendered).write_pdf()
     response = make_response(pdf)
     response.headers['Content-Type'] = 'application/pdf'
@@ -785,12 +785,25 @@ def landed_cost_pdf(lc_id):
 # ABC Analysis & Decision Engine Endpoints
 # ─────────────────────────────────────────────────────
 
+ENGINE_STILL_RUNNING = ("The engine run is taking longer than usual and continues in the background — "
+                        "check the last engine run on this dashboard in a few minutes, "
+                        "and start it again if it doesn't appear.")
+
 @supply_chain_bp.route("/abc/run", methods=["POST"])
 @login_required
 def run_abc():
     uid = get_uid()
-    log = build_decision_engine().run(uid, triggered_by="manual", force=False)
-    if log.errors:
+    from .abc_engine import run_decision_engine  # numpy/scipy load on first run
+    try:
+        log = run_cpu(run_decision_engine, uid, triggered_by="manual", force=False)
+    except TimeoutError:
+        # Still running in the offload pool (and holding the tenant lock); it logs when done.
+        # A job that was still queued was cancelled by run_cpu instead.
+        flash(ENGINE_STILL_RUNNING, "info")
+        return redirect(url_for("supply_chain.decision_dashboard"))
+    if log.errors and log.errors[0].startswith("skipped:"):
+        flash("An engine run for your account is already in progress.", "info")
+    elif log.errors:
         flash(f"ABC complete with {len(log.errors)} warning(s). "
               f"{log.items_processed} items processed.", "warning")
     else:
@@ -802,8 +815,15 @@ def run_abc():
 @login_required
 def run_decision():
     uid = get_uid()
-    log = build_decision_engine().run(uid, triggered_by="manual", force=True)
-    if log.errors:
+    from .abc_engine import run_decision_engine
+    try:
+        log = run_cpu(run_decision_engine, uid, triggered_by="manual", force=True)
+    except TimeoutError:
+        flash(ENGINE_STILL_RUNNING, "info")
+        return redirect(url_for("supply_chain.decision_dashboard"))
+    if log.errors and log.errors[0].startswith("skipped:"):
+        flash("An engine run for your account is already in progress.", "info")
+    elif log.errors:
         flash(f"Engine finished with {len(log.errors)} error(s). "
               f"{log.suggestions_created} suggestion(s) created.", "warning")
     else:
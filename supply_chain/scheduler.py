@@ -0,0 +1,136 @@
+"""
+supply_chain/scheduler.py
+──────────────────────────
+Nightly ABC decision engine for every tenant, outside the web workers.
+
+    python -m supply_chain.scheduler                 # tenants active in the last ENGINE_ACTIVITY_DAYS
+    python -m supply_chain.scheduler --force         # full rebuild (see ABCDecisionEngine.run)
+    python -m supply_chain.scheduler --users 12,40   # explicit tenants
+
+Run it from cron / a Railway cron service.  Tenants (user_id, the engine's
+tenant key) with sale movements in the activity window are run busiest
+first in a process pool of ENGINE_SCHEDULER_WORKERS (default: one per
+core).  Each run:
+
+  - takes the tenant's advisory lock (abc_engine.tenant_run_lock), so it
+    never overlaps a web-triggered run or another scheduler; a locked
+    tenant is skipped, not queued;
+  - gets ENGINE_RUN_BUDGET_SECONDS of wall time, passed to the engine as a
+    deadline it checks between its read/learn stages — past it the run
+    stops as failed before writing, so a slow tenant can't hold a worker
+    all night.  The budget is cooperative (no signal can interrupt the run
+    log write or the advisory unlock), so a run overshoots by at most the
+    stage in progress plus its writes;
+  - is recorded by the engine in scm_engine_run_logs with
+    triggered_by='scheduler'.
+
+Pool processes are started with ENGINE_SCHEDULER_START_METHOD
+('forkserver' by default) and import the engine themselves.
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sqlalchemy import text
+
+from app.services.db import DB_ENGINE
+
+logger = logging.getLogger(__name__)
+
+ENGINE_SCHEDULER_WORKERS = int(os.getenv('ENGINE_SCHEDULER_WORKERS', os.cpu_count() or 2))
+ENGINE_ACTIVITY_DAYS = int(os.getenv('ENGINE_ACTIVITY_DAYS', 2))
+ENGINE_RUN_BUDGET_SECONDS = float(os.getenv('ENGINE_RUN_BUDGET_SECONDS', 600))
+ENGINE_SCHEDULER_START_METHOD = os.getenv('ENGINE_SCHEDULER_START_METHOD', 'forkserver')
+
+
+def active_tenants(days: int = ENGINE_ACTIVITY_DAYS) -> list[int]:
+    """Tenants with sale movements in the last `days` days, busiest first."""
+    with DB_ENGINE.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT user_id, COUNT(*) AS movements
+            FROM   stock_movements
+            WHERE  movement_type = 'sale'
+              AND  created_at   >= NOW() - INTERVAL '1 day' * :days
+            GROUP  BY user_id
+            ORDER  BY movements DESC
+        """), {"days": days}).fetchall()
+    return [r[0] for r in rows]
+
+
+def run_tenant(user_id: int, force: bool = False, budget: float = ENGINE_RUN_BUDGET_SECONDS):
+    """One tenant, inside a pool process.  Returns the EngineRunLog."""
+    from .abc_engine import run_decision_engine
+
+    return run_decision_engine(user_id, triggered_by="scheduler", force=force,
+                               deadline=time.monotonic() + budget)
+
+
+def run_all(
+    user_ids: list[int] | None = None,
+    workers:  int              = ENGINE_SCHEDULER_WORKERS,
+    force:    bool             = False,
+    days:     int              = ENGINE_ACTIVITY_DAYS,
+    budget:   float            = ENGINE_RUN_BUDGET_SECONDS,
+) -> dict:
+    """Run the engine for every tenant; returns a summary dict."""
+    tenants = user_ids if user_ids is not None else active_tenants(days)
+    summary = {"tenants": len(tenants), "ok": 0, "failed": 0, "skipped": 0,
+               "items": 0, "suggestions": 0, "seconds": 0.0}
+    if not tenants:
+        logger.info("[Scheduler] no active tenants in the last %d day(s)", days)
+        return summary
+
+    try:
+        context = multiprocessing.get_context(ENGINE_SCHEDULER_START_METHOD)
+    except ValueError:
+        context = multiprocessing.get_context('spawn')
+
+    started = time.monotonic()
+    logger.info("[Scheduler] %d tenant(s), %d worker(s), budget %.0fs, force=%s",
+                len(tenants), workers, budget, force)
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(tenants))), mp_context=context) as pool:
+        futures = {pool.submit(run_tenant, uid, force, budget): uid for uid in tenants}
+        for future in as_completed(futures):
+            uid = futures[future]
+            try:
+                log = future.result()
+            except Exception as e:
+                summary["failed"] += 1
+                logger.error("[Scheduler] user=%s crashed: %s", uid, e)
+                continue
+            if log.errors and log.errors[0].startswith("skipped:"):
+                summary["skipped"] += 1
+            elif any(err.startswith("fatal:") for err in log.errors):
+                summary["failed"] += 1
+                logger.warning("[Scheduler] user=%s failed: %s", uid, log.errors[-1])
+            else:
+                summary["ok"] += 1
+            summary["items"] += log.items_processed
+            summary["suggestions"] += log.suggestions_created
+
+    summary["seconds"] = round(time.monotonic() - started, 1)
+    logger.info("[Scheduler] done %s", summary)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the ABC decision engine for all active tenants.")
+    parser.add_argument('--users', help="comma-separated user ids (default: active tenants)")
+    parser.add_argument('--workers', type=int, default=ENGINE_SCHEDULER_WORKERS)
+    parser.add_argument('--days', type=int, default=ENGINE_ACTIVITY_DAYS)
+    parser.add_argument('--budget', type=float, default=ENGINE_RUN_BUDGET_SECONDS)
+    parser.add_argument('--force', action='store_true', help="full rebuild instead of incremental runs")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    users = [int(u) for u in args.users.split(',') if u.strip()] if args.users else None
+    summary = run_all(users, workers=args.workers, force=args.force, days=args.days, budget=args.budget)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,351 @@
+"""
+supply_chain/simulation.py
+───────────────────────────
+Monte Carlo check of the ABC replenishment policies.
+
+    python -m supply_chain.simulation --user 12
+    python -m supply_chain.simulation --user 12 --service-levels 0.9,0.95,0.98 \\
+        --review-cycles 7,15 --target A=0.98 --trials 200 --workers 4 --output sim_12.json
+
+Each item's learned demand (avg_daily_demand, demand_std from the engine's
+profile) becomes a gamma distribution of daily demand.  SIM_TRIALS
+independent years of SIM_DAYS are simulated per item, after a warm-up of
+one lead time plus one review cycle.  Each class policy is replayed
+against that demand:
+
+  - every review_cycle_days, when on hand + on order <= ROP, order
+    max(suggested_qty, ROP + demand × review cycle − position), i.e.
+    the engine's suggestion, topped up to cover the review cycle;
+  - the order arrives lead_time_days later;
+  - demand beyond stock on hand is lost.
+
+ROP and suggested_qty come from ReplenishmentCalculator.evaluate_batch on
+a stationary profile (seasonality 1, no trend).  The results are:
+
+    fill_rate       units sold / units demanded
+    stockout_days   days per item-year with unmet demand
+    holding_cost    mean stock on hand × cost_price × holding_cost_pct (PKR / item-year)
+    ordering_cost   orders × ordering_cost (PKR / item-year)
+
+Per class, the current policy is compared with a grid of service levels ×
+review cycles.  Candidates use dynamic_z safety stock, since a service
+level means nothing to fixed_days.  The recommendation is the cheapest
+candidate (holding + ordering) whose simulated fill rate reaches the
+class target, by default the policy's own service_level.
+
+All candidates of a class share the same demand draws (common random
+numbers): days are drawn once per item chunk and applied to a
+candidates × items × trials state array.  The item chunks of all classes
+can be fanned out to a process pool (--workers).
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from .abc_engine import (
+    DEFAULT_ABC_POLICIES, ABCClass, ABCDecisionEngine, InventoryItem, ReplenishmentCalculator,
+)
+
+logger = logging.getLogger(__name__)
+
+SIM_TRIALS      = int(os.getenv('SIM_TRIALS', 100))
+SIM_DAYS        = int(os.getenv('SIM_DAYS', 365))
+SIM_CHUNK_ITEMS = int(os.getenv('SIM_CHUNK_ITEMS', 500))    # items per candidates × items × trials block
+SIM_WORKERS     = int(os.getenv('SIM_WORKERS', 1))
+SIM_SEED        = 20240601
+SIM_START_METHOD = os.getenv('ENGINE_SCHEDULER_START_METHOD', 'forkserver')
+
+SERVICE_LEVEL_GRID = (0.85, 0.90, 0.95, 0.98, 0.99)
+REVIEW_CYCLE_GRID  = (7, 15, 30)
+
+_SUMS = ('demand', 'sold', 'stockout_days', 'stock_days', 'orders')
+
+
+def simulate_chunk(
+    mu:        np.ndarray,     # (items,) mean daily demand
+    sigma:     np.ndarray,     # (items,) daily demand std
+    rop:       np.ndarray,     # (candidates, items)
+    order_qty: np.ndarray,     # (candidates, items)
+    up_to:     np.ndarray,     # (candidates, items) ROP + demand over the review cycle
+    review:    np.ndarray,     # (candidates,) review cycle in days
+    lead:      int,
+    trials:    int = SIM_TRIALS,
+    days:      int = SIM_DAYS,
+    seed:      int | list[int] = SIM_SEED,
+) -> dict[str, np.ndarray]:
+    """
+    Lost-sales periodic-review simulation of every candidate policy on the
+    same demand paths.  Returns (candidates, items) totals over all
+    trials: demand, sold, stockout_days, stock_days (on-hand unit-days)
+    and orders.  The warm-up is not counted.
+    """
+    rng = np.random.default_rng(seed)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shape = np.where(sigma > 0, np.minimum((mu / sigma) ** 2, 1e6), 1e6)
+        scale = np.where(mu > 0, mu / shape, 0.0)
+    review  = np.asarray(review, dtype=np.int64)
+    lead    = max(int(lead), 1)
+    warmup  = lead + int(review.max())
+
+    on_hand  = np.repeat(up_to[:, :, None], trials, axis=2).astype(float)
+    on_order = np.zeros_like(on_hand)
+    pending: list[tuple[int, np.ndarray]] = []      # (arrival day, quantities); one lead time → FIFO
+    sums = {k: np.zeros(rop.shape) for k in _SUMS}
+
+    for day in range(warmup + days):
+        while pending and pending[0][0] == day:
+            _, arriving = pending.pop(0)
+            on_hand  += arriving
+            on_order -= arriving
+
+        demand   = rng.gamma(shape[:, None], scale[:, None], (len(mu), trials))
+        sold     = np.minimum(on_hand, demand)
+        on_hand -= sold
+        counted  = day >= warmup
+        if counted:
+            sums['demand']        += demand.sum(axis=1)
+            sums['sold']          += sold.sum(axis=2)
+            sums['stockout_days'] += (sold < demand).sum(axis=2)
+            sums['stock_days']    += on_hand.sum(axis=2)
+
+        reviewing = day % review == 0
+        if reviewing.any():
+            position = on_hand + on_order
+            need     = reviewing[:, None, None] & (position <= rop[:, :, None])
+            qty      = np.where(need, np.maximum(order_qty[:, :, None], up_to[:, :, None] - position), 0.0)
+            pending.append((day + lead, qty))
+            on_order += qty
+            if counted:
+                sums['orders'] += need.sum(axis=2)
+    return sums
+
+
+def candidate_policies(policy: dict, service_levels=SERVICE_LEVEL_GRID,
+                       review_cycles=REVIEW_CYCLE_GRID) -> list[dict]:
+    """The current policy first, then the dynamic_z service level × review cycle grid."""
+    grid = [{**policy, "service_level": sl, "review_cycle_days": rc, "safety_stock_method": "dynamic_z"}
+            for sl in service_levels for rc in review_cycles]
+    return [dict(policy)] + [p for p in grid if p != policy]
+
+
+def _plan(calc: ReplenishmentCalculator, cls: ABCClass, policies: list[dict], items: list[InventoryItem],
+          mu: np.ndarray, sigma: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ROP / suggested qty / order-up-to level of every candidate for every item."""
+    n      = len(items)
+    cost   = np.array([i.cost_price for i in items])
+    oc     = np.array([i.ordering_cost for i in items])
+    hc     = np.array([i.holding_cost_pct for i in items])
+    rop, qty, up_to = (np.zeros((len(policies), n)) for _ in range(3))
+    for c, policy in enumerate(policies):
+        out = calc.evaluate_batch(
+            np.zeros(n, dtype=np.int64), calc.policy_vectors({cls: policy}, [cls]),
+            mu, sigma, np.ones(n), np.zeros(n), np.full(n, np.nan), np.zeros(n, dtype=bool),
+            np.zeros(n), cost, oc, hc,
+        )
+        rop[c]   = out["rop"]
+        qty[c]   = out["suggested_qty"]
+        up_to[c] = out["rop"] + mu * policy["review_cycle_days"]
+    return rop, qty, up_to
+
+
+def _class_tasks(cls, items, profiles, policies, trials, days, seed) -> tuple[list[InventoryItem], list[tuple]]:
+    """The class's items with demand, and one simulate_chunk argument tuple per item chunk."""
+    items = [i for i in items if profiles[i.item_id]["avg_daily_demand"] > 0]
+    if not items:
+        return items, []
+    mu    = np.array([profiles[i.item_id]["avg_daily_demand"] for i in items])
+    sigma = np.array([profiles[i.item_id]["demand_std"] for i in items])
+    rop, qty, up_to = _plan(ReplenishmentCalculator(), cls, policies, items, mu, sigma)
+    review = np.array([p["review_cycle_days"] for p in policies])
+    lead   = policies[0]["lead_time_days"]
+    return items, [(mu[lo:lo + SIM_CHUNK_ITEMS], sigma[lo:lo + SIM_CHUNK_ITEMS], rop[:, lo:lo + SIM_CHUNK_ITEMS],
+                    qty[:, lo:lo + SIM_CHUNK_ITEMS], up_to[:, lo:lo + SIM_CHUNK_ITEMS],
+                    review, lead, trials, days, [seed, ord(cls.value), lo])
+                   for lo in range(0, len(items), SIM_CHUNK_ITEMS)]
+
+
+def _summarize(items, policies, chunks, trials, days) -> list[dict]:
+    """Per-candidate metrics from the chunk totals of simulate_chunk."""
+    if not items:
+        return []
+    sums   = {k: np.concatenate([c[k] for c in chunks], axis=1) for k in _SUMS}
+    cost   = np.array([i.cost_price for i in items])
+    oc     = np.array([i.ordering_cost for i in items])
+    hc     = np.array([i.holding_cost_pct for i in items])
+    years  = trials * days / 365
+    holding  = (sums['stock_days'] / (trials * days) * cost * hc).sum(axis=1) / len(items)
+    ordering = (sums['orders'] / years * oc).sum(axis=1) / len(items)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fill = sums['sold'].sum(axis=1) / sums['demand'].sum(axis=1)
+    return [
+        {
+            "policy":          {k: policies[c][k] for k in ("service_level", "review_cycle_days",
+                                                            "safety_stock_method", "lead_time_days")},
+            "fill_rate":       round(float(fill[c]), 4),
+            "stockout_days":   round(float(sums['stockout_days'][c].sum() / years / len(items)), 2),
+            "holding_cost":    round(float(holding[c]), 2),
+            "ordering_cost":   round(float(ordering[c]), 2),
+            "total_cost":      round(float(holding[c] + ordering[c]), 2),
+            "orders_per_year": round(float(sums['orders'][c].sum() / years / len(items)), 2),
+        }
+        for c in range(len(policies))
+    ]
+
+
+def simulate_class(
+    cls:      ABCClass,
+    items:    list[InventoryItem],
+    profiles: dict[int, dict],
+    policies: list[dict],
+    trials:   int = SIM_TRIALS,
+    days:     int = SIM_DAYS,
+    seed:     int = SIM_SEED,
+) -> list[dict]:
+    """Metrics of every candidate policy over the class's items (demand > 0), in this process."""
+    items, tasks = _class_tasks(cls, items, profiles, policies, trials, days, seed)
+    return _summarize(items, policies, [simulate_chunk(*t) for t in tasks], trials, days)
+
+
+def recommend(results: list[dict], target: float) -> dict | None:
+    """Cheapest candidate reaching `target` fill rate, else the best fill rate."""
+    if not results:
+        return None
+    meeting = [r for r in results if r["fill_rate"] >= target]
+    if meeting:
+        return min(meeting, key=lambda r: r["total_cost"])
+    return max(results, key=lambda r: r["fill_rate"])
+
+
+def sweep_policies(
+    items:          list[InventoryItem],
+    profiles:       dict[int, dict],
+    abc_map:        dict[int, ABCClass],
+    policies:       dict[ABCClass, dict] = DEFAULT_ABC_POLICIES,
+    service_levels: tuple[float, ...]    = SERVICE_LEVEL_GRID,
+    review_cycles:  tuple[int, ...]      = REVIEW_CYCLE_GRID,
+    targets:        dict[ABCClass, float] | None = None,
+    trials:         int = SIM_TRIALS,
+    days:           int = SIM_DAYS,
+    workers:        int = SIM_WORKERS,
+    seed:           int = SIM_SEED,
+) -> dict:
+    """Simulate the current and candidate policies of every class; returns the report dict."""
+    targets = targets or {}
+    report  = {"created_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+               "trials": trials, "days": days, "seed": seed, "classes": {}}
+    classes = {}
+    for cls in ABCDecisionEngine.PRIORITY:
+        members = [i for i in items if abc_map.get(i.item_id) == cls]
+        if members:
+            candidates = candidate_policies(policies[cls], service_levels, review_cycles)
+            classes[cls] = (members, candidates,
+                            *_class_tasks(cls, members, profiles, candidates, trials, days, seed))
+
+    started = time.monotonic()
+    if workers > 1 and sum(len(c[3]) for c in classes.values()) > 1:
+        try:
+            context = multiprocessing.get_context(SIM_START_METHOD)
+        except ValueError:
+            context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {cls: [pool.submit(simulate_chunk, *t) for t in tasks]
+                       for cls, (_, _, _, tasks) in classes.items()}
+            chunks  = {cls: [f.result() for f in fs] for cls, fs in futures.items()}
+    else:
+        chunks = {cls: [simulate_chunk(*t) for t in tasks] for cls, (_, _, _, tasks) in classes.items()}
+
+    for cls, (members, candidates, simulated, _) in classes.items():
+        results = _summarize(simulated, candidates, chunks[cls], trials, days)
+        target  = targets.get(cls, policies[cls]["service_level"])
+        report["classes"][cls.value] = {
+            "items":       len(members),
+            "simulated":   len(simulated),
+            "target_fill": target,
+            "current":     results[0] if results else None,
+            "recommended": recommend(results, target),
+            "candidates":  results,
+        }
+    report["seconds"] = round(time.monotonic() - started, 1)
+    logger.info("[Simulation] %d items, %d classes, %d workers, %.1fs",
+                len(items), len(classes), workers, report["seconds"])
+    return report
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{report['trials']} trials x {report['days']} days per item",
+             f"{'class':<6} {'':<12} {'SL':>5} {'review':>6} {'method':<11} {'fill':>6} "
+             f"{'SO days':>8} {'holding':>10} {'ordering':>10} {'orders/yr':>9}"]
+    for cls, entry in report["classes"].items():
+        for label in ("current", "recommended"):
+            r = entry[label]
+            if r is None:
+                continue
+            p = r["policy"]
+            lines.append(f"{cls:<6} {label:<12} {p['service_level']:>5.2f} {p['review_cycle_days']:>6} "
+                         f"{p['safety_stock_method']:<11} {r['fill_rate']:>6.3f} {r['stockout_days']:>8.1f} "
+                         f"{r['holding_cost']:>10.0f} {r['ordering_cost']:>10.0f} {r['orders_per_year']:>9.1f}")
+        lines.append(f"{'':<6} target fill {entry['target_fill']:.2f}, "
+                     f"{entry['simulated']}/{entry['items']} items simulated")
+    lines.append(f"{report['seconds']}s")
+    return '\n'.join(lines)
+
+
+def load_inputs(user_id: int, engine: ABCDecisionEngine | None = None):
+    """Items, profiles and classes as a full engine run would compute them today."""
+    engine   = engine or ABCDecisionEngine()
+    items    = engine._load_active_items(user_id)
+    db_today = engine._db_today()
+    matrix   = engine._load_daily_demand(user_id, [i.item_id for i in items],
+                                         since=db_today - timedelta(days=365), until=db_today)
+    profiles = engine.learner.compute_profiles(matrix, datetime.now(timezone.utc),
+                                               through=db_today - timedelta(days=1))
+    return items, profiles, engine.classifier.classify(items, profiles)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo service-level simulation of the ABC policies.")
+    parser.add_argument('--user', type=int, required=True)
+    parser.add_argument('--service-levels', default=','.join(str(s) for s in SERVICE_LEVEL_GRID))
+    parser.add_argument('--review-cycles', default=','.join(str(r) for r in REVIEW_CYCLE_GRID))
+    parser.add_argument('--target', action='append', default=[],
+                        help="CLASS=FILL_RATE, e.g. A=0.98 (default: the class's service_level)")
+    parser.add_argument('--trials', type=int, default=SIM_TRIALS)
+    parser.add_argument('--days', type=int, default=SIM_DAYS)
+    parser.add_argument('--workers', type=int, default=SIM_WORKERS)
+    parser.add_argument('--seed', type=int, default=SIM_SEED)
+    parser.add_argument('--output', help="report JSON (default simulation_<user>.json)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    targets = {ABCClass(k.strip().upper()): float(v) for k, v in (t.split('=') for t in args.target)}
+    items, profiles, abc_map = load_inputs(args.user)
+    report = sweep_policies(
+        items, profiles, abc_map,
+        service_levels = tuple(float(s) for s in args.service_levels.split(',') if s.strip()),
+        review_cycles  = tuple(int(r) for r in args.review_cycles.split(',') if r.strip()),
+        targets        = targets,
+        trials         = args.trials,
+        days           = args.days,
+        workers        = args.workers,
+        seed           = args.seed,
+    )
+    report["user_id"] = args.user
+    output = args.output or f"simulation_{args.user}.json"
+    with open(output, 'w') as fh:
+        json.dump(report, fh, indent=2)
+    print(format_report(report))
+    print(f"written {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
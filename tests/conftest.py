@@ -0,0 +1,33 @@
+import os
+import sys
+import socket
+import threading
+
+import pytest
+
+# app.extensions builds its Redis pools at import and rejects memory://
+os.environ.setdefault('REDIS_URL', 'redis://127.0.0.1:6379/0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def redis_url():
+    """A fakeredis TCP server, with app.extensions pointed at it; yields its URL."""
+    fakeredis = pytest.importorskip('fakeredis')
+    import redis
+    from app import extensions
+
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    server = fakeredis.TcpFakeServer(('127.0.0.1', port))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f'redis://127.0.0.1:{port}/0'
+    saved = extensions._redis_pool, extensions._redis_binary_pool
+    extensions._redis_pool = redis.ConnectionPool.from_url(url, decode_responses=True)
+    extensions._redis_binary_pool = redis.ConnectionPool.from_url(url, decode_responses=False)
+    yield url
+    extensions._redis_pool, extensions._redis_binary_pool = saved
+    server.shutdown()
+    server.server_close()
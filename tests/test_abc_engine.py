@@ -0,0 +1,334 @@
+import copy
+import random
+import dataclasses
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from supply_chain.abc_engine import (
+    DEFAULT_ABC_POLICIES, ABCClass, ABCDecisionEngine, AdaptiveDemandLearner,
+    BatchDemandLearner, DemandMatrix, DemandSignal, DemandState, InventoryItem,
+    _left_align, _row_percentile,
+)
+
+TODAY = datetime(2026, 3, 15, tzinfo=timezone.utc)
+
+
+# ─── Vectorized evaluation vs _evaluate_item ──────────────────
+
+def _random_profile(rng):
+    demand = rng.choice([0.0, -1.0, rng.uniform(0.01, 0.5), rng.uniform(0.5, 40.0), rng.uniform(40.0, 500.0)])
+    return {
+        "avg_daily_demand":  demand,
+        "demand_std":        rng.choice([0.0, rng.uniform(0.0, 2.0) * max(demand, 1.0)]),
+        "demand_trend":      rng.choice([0.0, -35.0, 25.0, rng.uniform(-80.0, 150.0)]),
+        "seasonality_index": rng.choice([1.0, 1.2, rng.uniform(0.3, 2.5)]),
+        "mape":              rng.choice([None, 0.0, 30.0, rng.uniform(0.0, 30.0), rng.uniform(30.0, 200.0)]),
+        "is_cold_start":     rng.random() < 0.3,
+    }
+
+
+def _random_item(rng, item_id, profile):
+    demand = max(profile["avg_daily_demand"], 0.1)
+    return InventoryItem(
+        item_id          = item_id,
+        user_id          = 7,
+        sku              = f"SKU-{item_id}",
+        description      = f"Item {item_id}",
+        cost_price       = rng.choice([0.0, rng.uniform(1.0, 5000.0)]),
+        current_stock    = rng.choice([0.0, demand * rng.uniform(0.0, 90.0), rng.uniform(0.0, 1000.0)]),
+        ordering_cost    = rng.choice([500.0, rng.uniform(50.0, 3000.0)]),
+        holding_cost_pct = rng.choice([0.25, 0.0, rng.uniform(0.05, 0.6)]),
+    )
+
+
+POLICY_SETS = [
+    DEFAULT_ABC_POLICIES,
+    {   # every class on dynamic_z with EOQ, odd service levels
+        c: {**p, "safety_stock_method": "dynamic_z", "eoq_enabled": True,
+            "service_level": sl, "min_order_qty": 5}
+        for (c, p), sl in zip(DEFAULT_ABC_POLICIES.items(), (0.99, 0.5, 0.8, 0.975))
+    },
+    {   # every class on fixed_days without EOQ; C has no fixed_safety_days (default 7)
+        c: {k: v for k, v in {**p, "safety_stock_method": "fixed_days", "eoq_enabled": False,
+                              "fixed_safety_days": 3, "min_order_qty": 12}.items()
+            if not (c is ABCClass.C and k == "fixed_safety_days")}
+        for c, p in DEFAULT_ABC_POLICIES.items()
+    },
+]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("policies", POLICY_SETS)
+def test_evaluate_items_matches_evaluate_item(seed, policies):
+    rng      = random.Random(seed)
+    engine   = ABCDecisionEngine()
+    classes  = list(ABCClass)
+    profiles = {iid: _random_profile(rng) for iid in range(1, 401)}
+    items    = [_random_item(rng, iid, profiles[iid]) for iid in profiles]
+    abc_map  = {item.item_id: rng.choice(classes) for item in items}
+    pending  = {item.item_id for item in items if rng.random() < 0.1}
+
+    expected = []
+    for cls in engine.PRIORITY:
+        for item in items:
+            if abc_map[item.item_id] is cls:
+                suggestion = engine._evaluate_item(item, cls, profiles[item.item_id], policies[cls], pending)
+                if suggestion is not None:
+                    expected.append(suggestion)
+
+    assert engine._evaluate_items(items, abc_map, profiles, policies, pending) == expected
+    assert {s.reason_code for s in expected} >= {"ROP_BREACH"}
+
+
+def test_evaluate_items_edge_rows():
+    engine   = ABCDecisionEngine()
+    profiles = {
+        1: {"avg_daily_demand": 0.0, "demand_std": 0.0, "demand_trend": 0.0,
+            "seasonality_index": 1.0, "mape": None, "is_cold_start": True},
+        2: {"avg_daily_demand": 3.0, "demand_std": 0.9, "demand_trend": 0.0,
+            "seasonality_index": 1.0, "mape": None, "is_cold_start": True},
+        3: {"avg_daily_demand": 3.0, "demand_std": 1.0, "demand_trend": 0.0,
+            "seasonality_index": 1.5, "mape": 45.0, "is_cold_start": False},
+        4: {"avg_daily_demand": 3.0, "demand_std": 1.0, "demand_trend": 30.0,
+            "seasonality_index": 1.0, "mape": 12.0, "is_cold_start": False},
+        5: {"avg_daily_demand": -2.0, "demand_std": 1.0, "demand_trend": 0.0,
+            "seasonality_index": 1.0, "mape": 0.0, "is_cold_start": False},
+    }
+    stock = {1: 0.0, 2: 0.0, 3: 80.0, 4: 60.0, 5: 0.0}
+    items = [InventoryItem(iid, 7, f"SKU-{iid}", "", 100.0, stock[iid]) for iid in profiles]
+    abc_map = {1: ABCClass.A, 2: ABCClass.UNCLASSIFIED, 3: ABCClass.A, 4: ABCClass.B, 5: ABCClass.A}
+
+    expected = [s for cls in engine.PRIORITY for item in items if abc_map[item.item_id] is cls
+                for s in [engine._evaluate_item(item, cls, profiles[item.item_id],
+                                                DEFAULT_ABC_POLICIES[cls], set())] if s]
+    got = engine._evaluate_items(items, abc_map, profiles, DEFAULT_ABC_POLICIES, set())
+    assert got == expected
+    assert [(s.item_id, s.reason_code) for s in got] == [
+        (3, "SEASONAL_SPIKE"), (4, "TREND_ALERT"), (2, "ROP_BREACH")]
+
+
+# ─── BatchDemandLearner vs compute_demand_profile ─────────────
+
+def _signals(rng, item_id, sale_days, max_per_day=1):
+    """Movements on `sale_days` distinct days of the past year, some days with several."""
+    days    = sorted(rng.sample(range(1, 366), sale_days))
+    level   = rng.uniform(0.5, 60.0)
+    signals = []
+    for d in days:
+        for _ in range(rng.randint(1, max_per_day)):
+            units = round(level * rng.lognormvariate(0, 0.6), 2)
+            if rng.random() < 0.03:
+                units *= 25                     # outlier for the IQR scrub
+            at = TODAY - timedelta(days=d, hours=rng.randint(0, 12), minutes=rng.randint(0, 59))
+            signals.append(DemandSignal(item_id, at, units))
+    rng.shuffle(signals)
+    return signals
+
+
+SALE_DAYS = [0, 1, 14, 30, 59, 60, 61, 120, 200, 365]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_batch_learner_matches_compute_demand_profile(seed):
+    rng      = random.Random(seed)
+    item_ids = list(range(1, 201))
+    by_item  = {iid: _signals(rng, iid, SALE_DAYS[iid % len(SALE_DAYS)], max_per_day=1 + iid % 4)
+                for iid in item_ids}
+    # Date order, like the reference's sort: same-day movements then add up in the same order
+    signals  = sorted((s for iid in item_ids for s in by_item[iid]), key=lambda s: s.date)
+
+    states  = {}
+    matrix  = DemandMatrix.from_signals(item_ids, signals)
+    batch   = BatchDemandLearner(forecasters=[]).compute_profiles(
+        matrix, TODAY, states=states, through=(TODAY - timedelta(days=1)).date())
+    learner = AdaptiveDemandLearner()
+
+    for iid in item_ids:
+        expected = learner.compute_demand_profile(by_item[iid], TODAY)
+        got      = batch[iid]
+        assert got["is_cold_start"] == expected["is_cold_start"], iid
+        assert got["mape"] == expected["mape"] or np.isclose(got["mape"], expected["mape"], rtol=1e-9), iid
+        for key in ("demand_std", "demand_trend", "seasonality_index"):
+            assert np.isclose(got[key], expected[key], rtol=1e-9, atol=1e-12), (iid, key)
+
+        state = states[iid]
+        daily = np.array([v for _, v in learner._aggregate_to_daily(sorted(by_item[iid], key=lambda s: s.date))])
+        assert state.sale_days == len(daily), iid
+        if expected["is_cold_start"]:
+            assert np.isclose(got["avg_daily_demand"], expected["avg_daily_demand"], rtol=1e-12), iid
+            continue
+
+        # Quartiles, outlier mask and EWMA are bit-identical
+        q1, q3 = np.percentile(daily, [25, 75])
+        iqr    = q3 - q1
+        clean  = daily[(daily >= q1 - 1.5 * iqr) & (daily <= q3 + 1.5 * iqr)]
+        assert state.fence_low == q1 - 1.5 * iqr, iid
+        assert state.fence_high == q3 + 1.5 * iqr, iid
+        assert state.clean_n == len(clean), iid
+        assert state.ewma == learner._ewma(clean, 2.0 / (learner.EWMA_SPAN + 1))[-1], iid
+        assert got["avg_daily_demand"] == expected["avg_daily_demand"], iid
+
+
+def test_left_align_and_row_percentile_match_numpy():
+    rng     = np.random.default_rng(11)
+    values  = rng.lognormal(1.0, 1.2, (300, 400))
+    present = rng.random(values.shape) < rng.uniform(0.0, 1.0, (300, 1))
+    present[:3] = False
+    present[3, :] = True
+
+    packed, counts = _left_align(values, present)
+    ordered        = np.sort(np.where(np.arange(packed.shape[1]) < counts[:, None], packed, np.inf), axis=1)
+    for q in (25, 50, 75, 90):
+        got = _row_percentile(ordered, counts, q)
+        for row in range(len(values)):
+            kept = values[row][present[row]]
+            assert packed[row, :counts[row]].tolist() == kept.tolist()
+            if counts[row]:
+                assert got[row] == np.percentile(kept, q), (row, q)
+
+
+def test_batch_learner_several_movements_per_day_sum():
+    day     = TODAY - timedelta(days=3)
+    signals = [DemandSignal(1, day.replace(hour=h), u) for h, u in ((9, 2.0), (13, 3.5), (18, 0.5))]
+    matrix  = DemandMatrix.from_signals([1, 2], signals)
+    assert matrix.units[0].tolist() == [6.0]
+    assert matrix.present.tolist() == [[True], [False]]
+
+    profiles = BatchDemandLearner(forecasters=[]).compute_profiles(matrix, TODAY)
+    assert profiles[1] == AdaptiveDemandLearner().compute_demand_profile(signals, TODAY)
+    assert profiles[2] == AdaptiveDemandLearner().compute_demand_profile([], TODAY)
+
+
+# ─── Incremental DemandState fold vs full rebuild ─────────────
+
+class _MemoryEngine(ABCDecisionEngine):
+    """The engine with stock_movements in a list: (item_id, created_at, units)."""
+
+    def __init__(self, movements):
+        super().__init__(learner=BatchDemandLearner(forecasters=[]))
+        self.movements = movements
+
+    def _load_daily_demand(self, user_id, item_ids, since, until):
+        return DemandMatrix.from_signals(item_ids, [
+            DemandSignal(iid, at, units) for iid, at, units in self.movements
+            if since <= at.date() < until])
+
+
+def _rebuild(engine, item_ids, db_today):
+    states = {}
+    matrix = engine._load_daily_demand(7, item_ids, db_today - timedelta(days=365), db_today)
+    profiles = engine.learner.compute_profiles(
+        matrix, datetime.combine(db_today, datetime.min.time(), timezone.utc), states=states,
+        through=db_today - timedelta(days=1))
+    return profiles, states
+
+
+def _incremental(engine, items, states, db_today):
+    """One run; like _persist_demand_states, items left clean only move last_day."""
+    before = {iid: copy.deepcopy(st) for iid, st in states.items()}
+    today = datetime.combine(db_today, datetime.min.time(), timezone.utc)
+    profiles, dirty = engine._incremental_profiles(7, items, states, today, db_today)
+    for iid in set(states) - dirty:
+        states[iid] = dataclasses.replace(before[iid], last_day=db_today - timedelta(days=1))
+    return profiles, dirty
+
+
+def _sale(item_id, day, units, hour=10):
+    return item_id, datetime.combine(day, datetime.min.time()).replace(hour=hour), units
+
+
+def test_folded_states_match_full_rebuild_with_late_rows():
+    rng    = random.Random(5)
+    start  = date(2026, 1, 10)                   # first run: full rebuild
+    ids    = list(range(1, 61))
+    level  = {iid: rng.uniform(2.0, 80.0) for iid in ids}
+    items  = [InventoryItem(iid, 7, f"SKU-{iid}", "", 10.0, 5.0) for iid in ids]
+    quiet  = set(ids[40:50])                      # no sales after the rebuild
+    cold   = set(ids[50:])                        # 20 sale days: cold start
+
+    movements = []
+    for iid in ids:
+        for d in range(1, 201):
+            if rng.random() < (0.1 if iid in cold else 0.75):
+                # Fences are frozen between rebuilds: keep every value clear of them
+                units = round(level[iid] * rng.uniform(0.7, 1.3), 2)
+                if rng.random() < 0.03:
+                    units *= 25                  # outlier for the IQR scrub
+                movements.append(_sale(iid, start - timedelta(days=d), units))
+    engine = _MemoryEngine(movements)
+
+    def sell(first, last):
+        """Sales inside the frozen fences, some days split over several movements."""
+        for iid in ids:
+            if iid in quiet:
+                continue
+            for d in range((last - first).days + 1):
+                split = rng.randint(1, 3)
+                for hour in range(9, 9 + split):
+                    movements.append(_sale(iid, first + timedelta(days=d),
+                                           round(level[iid] * rng.uniform(0.9, 1.1) / split, 2), hour))
+
+    _, states = _rebuild(engine, ids, start)
+    for st in states.values():
+        st.stock = 5.0                          # as run() records it
+    assert {iid for iid, st in states.items() if st.is_cold} == cold
+    assert all(st.recent_end == start - timedelta(days=1) for st in states.values())
+
+    run1 = start + timedelta(days=4)
+    sell(start, run1)                           # the run1 rows are the open day: not folded yet
+    _, dirty = _incremental(engine, items, states, run1)
+    assert dirty == set(ids) - quiet
+
+    late = {ids[0], ids[40]}                    # a folded day and an advanced-over day
+    movements += [_sale(iid, run1 - timedelta(days=1), 9.5, hour=23) for iid in late]
+    run2 = run1 + timedelta(days=3)
+    sell(run1 + timedelta(days=1), run2 - timedelta(days=1))
+    rebuilt = set()
+    original = engine.learner.compute_profiles
+
+    def spy(matrix, *args, **kwargs):
+        rebuilt.update(matrix.item_ids.tolist())
+        return original(matrix, *args, **kwargs)
+
+    engine.learner.compute_profiles = spy
+    profiles, dirty = _incremental(engine, items, states, run2)
+    assert rebuilt == late | cold
+    assert dirty == set(ids) - (quiet - late)
+
+    engine.learner.compute_profiles = original
+    expected, ref = _rebuild(engine, ids, run2)
+    for iid in ids:
+        for key, value in expected[iid].items():
+            if value is None or isinstance(value, bool):
+                assert profiles[iid][key] == value, (iid, key)
+            else:
+                assert np.isclose(profiles[iid][key], value, rtol=1e-9, atol=1e-9), (iid, key)
+        if iid in quiet - late:
+            continue
+        got, want = states[iid], ref[iid]
+        assert (got.last_day, got.recent_end) == (run2 - timedelta(days=1),) * 2, iid
+        assert got.sale_days == want.sale_days and got.clean_n == want.clean_n, iid
+        assert got.month_cnt == want.month_cnt, iid
+        assert np.allclose(got.month_sum, want.month_sum, rtol=1e-12), iid
+        assert got.tail == want.tail and got.recent == want.recent, iid
+        # EWMA and the Welford moments of the clean values
+        for key in ("ewma", "clean_mean", "clean_m2"):
+            assert np.isclose(getattr(got, key), getattr(want, key), rtol=1e-9), (iid, key)
+
+
+def test_unchanged_checks_the_settle_window():
+    last  = date(2026, 2, 10)
+    state = DemandState(item_id=1, last_day=last, sale_days=80, ewma_span=14,
+                        rebuilt_at=TODAY, recent=[4.0, 0.0], recent_end=last - timedelta(days=1))
+    day   = {k: (last - timedelta(days=k)).toordinal() for k in range(4)}
+
+    # checked: last-1 (recent[1]) and last (advanced over, no sales then)
+    assert state.unchanged({day[3]: 1.0, day[2]: 4.0})
+    assert not state.unchanged({day[2]: 4.0, day[1]: 1.0})     # late sale on a folded day
+    assert not state.unchanged({day[2]: 4.0, day[0]: 1.0})     # ... on an advanced-over day
+    state.recent_end, state.recent = last, [0.0, 6.0]
+    assert state.unchanged({day[0]: 6.0, day[3]: 99.0})        # older days are not re-checked
+    assert not state.unchanged({day[0]: 6.5})
+    assert not dataclasses.replace(state, recent=[]).unchanged({day[0]: 6.0})
@@ -0,0 +1,57 @@
+import time
+import threading
+from types import SimpleNamespace
+
+import redis
+
+from app.services import api_keys
+
+KEY_HASH = api_keys.hash_key('gk_test_key')
+
+
+class _RevokedDuringSelect:
+    """DB_ENGINE whose SELECT returns the active row while a revocation lands."""
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, *args):
+        api_keys.evict_principal(KEY_HASH)      # the broadcast, mid-query
+        return self
+
+    def first(self):
+        return SimpleNamespace(account_id=42, is_active=True, expires_at=None)
+
+
+def test_load_racing_a_revocation_is_not_cached(monkeypatch):
+    monkeypatch.setattr(api_keys, 'DB_ENGINE', _RevokedDuringSelect())
+    api_keys.clear_principals()
+
+    entry = api_keys._load_principal(KEY_HASH)
+
+    assert entry[:2] == (42, True)
+    assert KEY_HASH not in api_keys._principal_cache
+
+
+def test_listener_clears_the_cache_when_it_subscribes(redis_url):
+    api_keys._principal_cache[KEY_HASH] = (42, True, None, time.monotonic())
+    threading.Thread(target=api_keys._revocation_listener, daemon=True).start()
+
+    deadline = time.monotonic() + 5
+    while KEY_HASH in api_keys._principal_cache:
+        assert time.monotonic() < deadline, 'cache survived the (re)subscribe'
+        time.sleep(0.02)
+
+    other = redis.Redis.from_url(redis_url)
+    assert other.pubsub_numsub(api_keys.REVOCATION_CHANNEL)[0][1] == 1
+    api_keys._principal_cache[KEY_HASH] = (42, True, None, time.monotonic())
+    other.publish(api_keys.REVOCATION_CHANNEL, KEY_HASH)
+    while KEY_HASH in api_keys._principal_cache:
+        assert time.monotonic() < deadline, 'revocation was not applied'
+        time.sleep(0.02)
@@ -0,0 +1,44 @@
+import threading
+
+from app import extensions
+from app.services import data_versions
+
+
+class _Record:
+    def __init__(self):
+        self.info = {}
+
+
+def _redis_down():
+    raise ConnectionError('redis is down')
+
+
+def test_checkin_defers_the_db_fallback_to_the_flusher(monkeypatch):
+    applied = []
+    done = threading.Event()
+
+    def apply_db(by_account):
+        applied.append((threading.current_thread().name, by_account))
+        done.set()
+
+    monkeypatch.setattr(extensions, 'get_redis', _redis_down)
+    monkeypatch.setattr(data_versions, '_apply_db', apply_db)
+    record = _Record()
+    record.info[data_versions._PENDING] = {(42, 'inventory'), (42, 'locations'), (7, 'invoices')}
+
+    data_versions._apply_on_checkin(None, record)
+
+    assert done.wait(5)
+    assert applied == [('data-version-flush', {42: {'inventory', 'locations'}, 7: {'invoices'}})]
+    assert data_versions._PENDING not in record.info
+
+
+def test_direct_bump_still_writes_the_fallback_inline(monkeypatch):
+    applied = []
+    monkeypatch.setattr(extensions, 'get_redis', _redis_down)
+    monkeypatch.setattr(data_versions, '_apply_db',
+                        lambda by_account: applied.append((threading.current_thread().name, by_account)))
+
+    data_versions.bump(42, 'customers')
+
+    assert applied == [(threading.current_thread().name, {42: {'customers'}})]
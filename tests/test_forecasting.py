@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from supply_chain.forecasting import (
+    FORECAST_HOLDOUT_DAYS, CrostonSBA, Forecaster, HoltWintersWeekly,
+)
+
+ORIGIN = 739_000            # date ordinal of column 0; only ordinal mod 7 matters
+WIDTH  = 140
+CUT    = WIDTH - FORECAST_HOLDOUT_DAYS
+SPLIT  = CUT + 10           # the prefix fit ends here, step() folds the rest
+
+
+def _intermittent(rng, n):
+    first  = rng.integers(0, 20, n)
+    series = np.where(rng.random((n, WIDTH)) < rng.uniform(0.1, 0.5, (n, 1)),
+                      rng.integers(1, 12, (n, WIDTH)), 0).astype(float)
+    series[np.arange(WIDTH) < first[:, None]] = 0.0
+    series[np.arange(n), first] = rng.integers(1, 12, n)
+    return series, first
+
+
+def _weekly(rng, n):
+    first   = rng.integers(0, 20, n)
+    profile = rng.uniform(0.3, 1.8, (n, 7))
+    days    = (ORIGIN + np.arange(WIDTH)) % 7
+    series  = rng.poisson(rng.uniform(2, 30, (n, 1)) * profile[:, days]).astype(float)
+    series[np.arange(WIDTH) < first[:, None]] = 0.0
+    series[np.arange(n), first] = np.maximum(series[np.arange(n), first], 1.0)
+    return series, first
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("model, make", [(CrostonSBA(), _intermittent), (HoltWintersWeekly(), _weekly)])
+def test_step_continues_the_batch_fit(seed, model, make):
+    rng           = np.random.default_rng(seed)
+    series, first = make(rng, 40)
+
+    full   = model.fit(series, first, ORIGIN, CUT, 28)
+    prefix = model.fit(series[:, :SPLIT], first, ORIGIN, CUT, 28)
+    np.testing.assert_array_equal(prefix.holdout, full.holdout[:, :SPLIT - CUT])
+
+    for i in range(len(series)):
+        state = prefix.state[i].tolist()
+        for c in np.nonzero(series[i, SPLIT:])[0] + SPLIT:     # sale days only; gaps fold inside step()
+            state = model.step(state, ORIGIN + int(c), float(series[i, c]))
+        state = model.step(state, ORIGIN + WIDTH - 1, 0.0)
+        np.testing.assert_allclose(state, full.state[i], rtol=1e-9, atol=1e-12, err_msg=str(i))
+        assert np.isclose(model.predict(state, 28), max(full.forecast[i], 0.0), rtol=1e-9, atol=1e-12), i
+
+
+def test_step_ignores_days_already_folded():
+    croston = CrostonSBA()
+    state   = [0.1, 4.0, 3.0, 2.0, float(ORIGIN)]
+    assert croston.step(state, ORIGIN, 9.0) == state
+    assert croston.step(state, ORIGIN - 3, 9.0) == state
+
+    hw    = HoltWintersWeekly()
+    state = [0.15, 0.05, 0.2, 10.0, 0.5, *range(7), float(ORIGIN)]
+    assert hw.step(state, ORIGIN, 9.0) == state
+
+
+def test_forecaster_is_abstract():
+    with pytest.raises(TypeError):
+        Forecaster()
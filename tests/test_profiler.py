@@ -0,0 +1,33 @@
+import stat
+from collections import Counter
+
+from app.services import profiler
+
+
+def test_record_creates_private_directory_and_no_temp_files(tmp_path):
+    directory = tmp_path / 'profiles'
+    sampler = profiler.SamplingProfiler(directory=directory)
+    profile = profiler._RequestProfile('reports.sales', 'header', thread=1)
+    profile.samples = Counter({'app/routes/reports.py:sales;app/services/reports.py:query': 3})
+
+    sampler._record(profile, 12.0)
+    sampler._record(profile, 12.0)
+
+    assert stat.S_IMODE(directory.stat().st_mode) == 0o700
+    assert [p.suffix for p in directory.iterdir()] == ['.collapsed']
+    assert profiler.load_collapsed('reports.sales', directory) == Counter(
+        {'app/routes/reports.py:sales;app/services/reports.py:query': 6})
+
+
+def test_malformed_lines_are_skipped(tmp_path):
+    (tmp_path / 'reports.sales.101.collapsed').write_text(
+        'a;b 4\n'
+        'no-count-here\n'
+        '\n'
+        'a;c many\n'
+        'a;b 1\n')
+    (tmp_path / 'reports.sales.102.collapsed').write_bytes(b'a;\xff 2\n')
+
+    [entry] = profiler.list_profiles(tmp_path)
+    assert (entry['endpoint'], entry['samples'], entry['workers']) == ('reports.sales', 7, 2)
+    assert profiler.load_collapsed('reports.sales', tmp_path) == Counter({'a;b': 5, 'a;�': 2})
@@ -0,0 +1,55 @@
+import time
+import multiprocessing
+
+import pytest
+import redis
+
+fakeredis = pytest.importorskip('fakeredis')
+
+from app import extensions
+from app.services import single_flight
+
+KEY = 'reports.sales:(7,):[]'
+# Not valid UTF-8 once pickled — what broke the decode_responses client
+RESULT = {'rows': [(1, 'Tea', 12.5)], 'blob': b'\x80\xff\x00'}
+
+
+def _use_server(url):
+    extensions._redis_pool = redis.ConnectionPool.from_url(url, decode_responses=True)
+    extensions._redis_binary_pool = redis.ConnectionPool.from_url(url, decode_responses=False)
+
+
+def _lead(url, hold):
+    _use_server(url)
+
+    def compute():
+        time.sleep(hold)
+        return RESULT
+
+    single_flight.run_single_flight(KEY, compute)
+
+
+def test_waiter_in_another_process_gets_leader_result(redis_url):
+    leader = multiprocessing.get_context('spawn').Process(target=_lead, args=(redis_url, 1.5))
+    leader.start()
+    try:
+        r = extensions.get_redis()
+        lock_key = single_flight._LOCK_KEY.format(KEY)
+        deadline = time.monotonic() + 20
+        while r.get(lock_key) is None:
+            assert leader.is_alive() and time.monotonic() < deadline, 'leader never took the lock'
+            time.sleep(0.02)
+
+        def recompute():
+            raise AssertionError('waiter recomputed instead of sharing the leader result')
+
+        before = single_flight.single_flight_stats()
+        value = single_flight.run_single_flight(KEY, recompute)
+        after = single_flight.single_flight_stats()
+    finally:
+        leader.join(20)
+
+    assert value == RESULT
+    assert after['shared_remote'] == before['shared_remote'] + 1
+    assert after['fallback'] == before['fallback']
+    assert leader.exitcode == 0
@@ -0,0 +1,101 @@
+from collections import Counter
+
+import pytest
+from flask import Flask, g, session
+
+from app.services import tenant as tenant_module
+from app.services.tenant import TenantContext, current_tenant, tenant_for_user
+
+LOCATIONS = [{'id': 3, 'name': 'Depot'}, {'id': 5, 'name': 'Shop'}]
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Counts loader calls; user 11 owns account 42, user 12 is staff there."""
+    calls = Counter()
+
+    def loader(name, fn):
+        def load(key):
+            calls[name, key] += 1
+            return fn(key)
+        monkeypatch.setattr(tenant_module, name, load)
+
+    loader('get_user_identity_cached',
+           lambda uid: {11: {'account_id': 42, 'role': 'owner'},
+                        12: {'account_id': 42, 'role': 'staff'}}.get(uid))
+    loader('get_account_owner_cached', lambda aid: 11 if aid == 42 else None)
+    loader('get_account_cached', lambda aid: {'id': aid, 'subscription_plan': 'pro'})
+    loader('get_user_profile_cached', lambda uid: {'preferred_currency': 'USD'} if uid == 11 else None)
+    loader('get_account_locations_cached', lambda aid: LOCATIONS)
+    return calls
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    return app
+
+
+def test_attributes_load_lazily_and_once(loads):
+    tenant = TenantContext(user_id=12)
+    assert not loads
+
+    assert (tenant.account_id, tenant.role, tenant.owner_user_id) == (42, 'staff', 11)
+    assert (tenant.plan, tenant.currency, tenant.currency_symbol) == ('pro', 'PKR', 'Rs.')
+    assert tenant.location('5') == LOCATIONS[1]
+    assert tenant.location(4) is None and tenant.location('x') is None and tenant.location(None) is None
+    assert tenant.location(3) == LOCATIONS[0] and tenant.profile == {}
+
+    assert loads == Counter({
+        ('get_user_identity_cached', 12): 1,
+        ('get_account_owner_cached', 42): 1,
+        ('get_account_cached', 42): 1,
+        ('get_user_profile_cached', 12): 1,
+        ('get_account_locations_cached', 42): 1,
+    })
+
+
+def test_api_key_tenant_acts_as_the_owner(loads):
+    tenant = TenantContext(account_id=42)
+
+    assert tenant.role is None
+    assert tenant.acting_user_id == 11
+    assert tenant.currency_symbol == '$'
+    assert ('get_user_identity_cached', None) not in loads
+
+
+def test_tenant_needs_a_user_or_an_account():
+    with pytest.raises(ValueError):
+        TenantContext()
+
+
+def test_current_tenant_is_memoized_per_request(app, loads):
+    with app.test_request_context():
+        session.update(user_id=11, account_id=42, role='owner')
+        tenant = current_tenant()
+        assert current_tenant() is tenant
+        assert tenant_for_user('11') is tenant
+        assert tenant_for_user(12) is not tenant
+        assert (tenant.account_id, tenant.role) == (42, 'owner')
+
+    with app.test_request_context():
+        session.update(user_id=11, account_id=42, role='owner')
+        assert current_tenant() is not tenant
+
+    assert not any(name == 'get_user_identity_cached' and key == 11 for name, key in loads)
+
+
+def test_current_tenant_from_api_key(app, loads):
+    with app.test_request_context():
+        assert current_tenant() is None
+        g.api_account_id = 42
+        tenant = current_tenant()
+        assert (tenant.user_id, tenant.account_id, tenant.owner_user_id) == (None, 42, 11)
+
+    with app.test_request_context():
+        session.update(user_id=99, account_id=7)   # a session for another account loses to the key
+        g.api_account_id = 42
+        assert (current_tenant().user_id, current_tenant().account_id) == (None, 42)
+
+    assert current_tenant() is None
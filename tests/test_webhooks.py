@@ -0,0 +1,66 @@
+import time
+import threading
+
+import redis
+
+from app.services import webhooks
+from app.services.webhooks import WEBHOOK_MAX_ATTEMPTS, group_into_batches, retry_plan
+
+
+def _row(outbox_id, product_id, attempts, event='stock.low'):
+    return {'id': outbox_id, 'webhook_id': 3, 'url': 'https://hooks.example/in', 'event': event,
+            'payload': {'product_id': product_id, 'stock': outbox_id}, 'attempts': attempts}
+
+
+def test_new_event_coalesced_into_failing_row_keeps_its_own_attempts():
+    rows = [_row(1, 42, WEBHOOK_MAX_ATTEMPTS - 1), _row(2, 7, 2), _row(3, 42, 0)]
+    [batch] = group_into_batches(rows)
+    assert batch.ids == [3, 2]
+    assert batch.superseded_ids == [1]
+    assert batch.payloads[0] == {'product_id': 42, 'stock': 3}
+
+    plan = {outbox_id: (attempts, dead) for outbox_id, attempts, dead in retry_plan(batch)}
+    assert plan == {1: (WEBHOOK_MAX_ATTEMPTS, True), 2: (3, False), 3: (1, False)}
+
+
+def test_retry_plan_dead_letters_rows_one_by_one():
+    rows = [_row(1, 5, WEBHOOK_MAX_ATTEMPTS - 1, 'invoice.created'),
+            _row(2, 6, WEBHOOK_MAX_ATTEMPTS - 2, 'invoice.created')]
+    [batch] = group_into_batches(rows)
+    assert retry_plan(batch) == [(1, WEBHOOK_MAX_ATTEMPTS, True), (2, WEBHOOK_MAX_ATTEMPTS - 1, False)]
+
+    # the surviving row carries its own count into the next failure
+    [batch] = group_into_batches([_row(2, 6, WEBHOOK_MAX_ATTEMPTS - 1, 'invoice.created')])
+    assert retry_plan(batch) == [(2, WEBHOOK_MAX_ATTEMPTS, True)]
+
+
+def test_invalidation_reaches_other_workers(redis_url):
+    other = redis.Redis.from_url(redis_url)
+    webhooks._subscription_cache[41] = (time.monotonic(), [])
+    threading.Thread(target=webhooks._subscription_listener, daemon=True).start()
+    deadline = time.monotonic() + 5
+    # (re)subscribing drops whatever was cached while disconnected
+    while 41 in webhooks._subscription_cache:
+        assert time.monotonic() < deadline, 'listener never subscribed'
+        time.sleep(0.02)
+    assert other.pubsub_numsub(webhooks.SUBSCRIPTION_CHANNEL)[0][1] == 1
+    webhooks._subscription_cache[42] = (time.monotonic(), [(3, 'https://hooks.example/in', frozenset())])
+    webhooks._subscription_cache[43] = (time.monotonic(), [])
+
+    # another worker edited account 42's webhooks
+    generation = webhooks._subscription_gen.get(42, 0)
+    other.publish(webhooks.SUBSCRIPTION_CHANNEL, 42)
+    while 42 in webhooks._subscription_cache:
+        assert time.monotonic() < deadline, 'cache entry was not evicted'
+        time.sleep(0.02)
+    assert webhooks._subscription_gen[42] == generation + 1
+    assert 43 in webhooks._subscription_cache
+
+    # and this worker's edits are broadcast
+    pubsub = other.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(webhooks.SUBSCRIPTION_CHANNEL)
+    pubsub.get_message(timeout=1)
+    webhooks.invalidate_subscriptions(43)
+    assert 43 not in webhooks._subscription_cache
+    message = pubsub.get_message(timeout=2)
+    assert message and message['data'] == b'43'